@@ -0,0 +1,126 @@
+"""
+Time lineup-aware solves over a full-size simulated draft, and compare their lineups with whole-roster solves.
+
+Teams draft in snake order by ADP over a synthetic pool whose pro teams each have a bye. At every pick, the team on
+the clock is re-optimized with the lineup search alone ("lineup"), the search plus the exact MILP over candidates
+("lineup_exact"), and the whole-roster heuristic ("greedy"). Every roster is scored by its min weekly lineup points.
+Run from the repo root (after `make install`):
+
+    python benchmarks/bench_lineup.py
+    python benchmarks/bench_lineup.py --num-players 1000 --num-teams 10 --output bench_lineup.json
+"""
+
+import argparse
+import json
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from bench_solvers import POS_CONSTS, snake_order
+from synthetic import make_players, make_schedule
+
+from draft_optimizer.app.heuristic import allowed_positions
+from draft_optimizer.app.lineup import LineupSolver, availability
+from draft_optimizer.app.optimize import GreedySolver, OptimizerContext, RosterSolver
+from draft_optimizer.app.table import PlayerTable
+
+STAGES = ["early", "mid", "late"]
+
+
+def run(num_players: int, num_teams: int, roster_size: int, seed: int) -> pd.DataFrame:
+    # Make players and their schedule
+    players = make_players(num_players, seed=seed)
+    table = PlayerTable.from_players(players)
+    schedule, team_ids = make_schedule(players)
+    available_weeks = availability(table, schedule, team_ids)
+
+    # Make solvers
+    context = OptimizerContext.from_table(table, roster_size, POS_CONSTS)
+    lineup = LineupSolver(context, available_weeks, exact=False)
+    solvers: Dict[str, RosterSolver] = {
+        "lineup": lineup,
+        "lineup_exact": LineupSolver(context, available_weeks),
+        "greedy": GreedySolver(context),
+    }
+
+    # Draft by ADP, re-optimizing the team on the clock at every pick
+    draft_order = snake_order(num_teams, roster_size)
+    by_adp = np.argsort(table.adp, kind="stable")
+    pos_idx, min_pos, max_pos = context.pos_limits()
+    available = context.pool.copy()
+    fixed = {team: np.zeros(table.num_players, dtype=bool) for team in range(num_teams)}
+    records: List[Dict] = []
+    for pick, team in enumerate(draft_order):
+        # Optimize
+        for backend, solver in solvers.items():
+            result = solver.solve(available | fixed[team], fixed[team])
+            value = -np.inf if result.roster is None else float(lineup.weekly_points(result.roster).min())
+            records.append(
+                {
+                    "pick": pick,
+                    "stage": STAGES[3 * pick // len(draft_order)],
+                    "backend": backend,
+                    "lineup_value": value,
+                    "gap": result.gap,
+                    "solve_time": result.solve_time,
+                }
+            )
+
+        # Take the best available player by ADP at a position the team can still fill
+        roster = fixed[team]
+        counts = np.bincount(pos_idx[roster], minlength=len(min_pos))
+        allowed = allowed_positions(counts, min_pos, max_pos, roster_size - roster.sum())
+        row = by_adp[available[by_adp] & allowed[pos_idx[by_adp]]][0]
+        available[row] = False
+        roster[row] = True
+
+    # Compare lineups against the exact solves
+    results = pd.DataFrame(records)
+    exact = results[results["backend"] == "lineup_exact"].set_index("pick")["lineup_value"]
+    results["vs_exact"] = results["lineup_value"] / results["pick"].map(exact) - 1
+
+    return results
+
+
+def summarize(results: pd.DataFrame) -> pd.DataFrame:
+    summary = results.groupby(["backend", "stage"], sort=False).agg(
+        solve_ms=("solve_time", lambda x: 1000 * x.mean()),
+        p95_ms=("solve_time", lambda x: 1000 * x.quantile(0.95)),
+        max_ms=("solve_time", lambda x: 1000 * x.max()),
+        mean_gap=("gap", "mean"),
+        mean_vs_exact=("vs_exact", "mean"),
+        min_vs_exact=("vs_exact", "min"),
+    )
+
+    return summary
+
+
+def main():
+    # Parse args
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--num-players", type=int, default=2000)
+    parser.add_argument("--num-teams", type=int, default=12)
+    parser.add_argument("--roster-size", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write per-pick results and the summary as JSON")
+    args = parser.parse_args()
+
+    # Run
+    results = run(args.num_players, args.num_teams, args.roster_size, args.seed)
+    summary = summarize(results)
+    print(f"{args.num_players} players, {args.num_teams} teams, {args.roster_size} rounds")
+    print(summary.to_string(float_format=lambda x: f"{x:.4g}"))
+
+    # Maybe save
+    if args.output is not None:
+        out = {
+            "args": vars(args),
+            "summary": summary.reset_index().to_dict("records"),
+            "picks": results.replace({np.nan: None, -np.inf: None}).to_dict("records"),
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(out, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Time marginal-value scoring against re-solving the roster once per player, over a full-size simulated draft.
+
+Teams draft in snake order by ADP over a synthetic pool. At evenly spaced picks, the team on the clock scores every
+available player with `MarginalScorer`, and, as the naive baseline, re-solves its roster with each player in the
+best-available tabs forced on. Naive solves use the MILP, so they're the reference values. Run from the repo root
+(after `make install`):
+
+    python benchmarks/bench_marginal.py
+    python benchmarks/bench_marginal.py --num-players 1000 --num-picks 8 --output bench_marginal.json
+"""
+
+import argparse
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from bench_solvers import POS_CONSTS, snake_order
+from synthetic import make_players
+
+from draft_optimizer.app.board import ALL_POSITIONS, DraftBoard
+from draft_optimizer.app.heuristic import allowed_positions
+from draft_optimizer.app.marginal import NUM_EXACT, MarginalScorer
+from draft_optimizer.app.optimize import OptimizerContext, RosterOptimizer
+from draft_optimizer.app.table import PlayerTable
+
+
+def run(num_players: int, num_teams: int, roster_size: int, num_picks: int, backend: str, seed: int) -> pd.DataFrame:
+    # Make players and optimizers (the naive one keeps no warm-starts between players)
+    table = PlayerTable.from_players(make_players(num_players, seed=seed))
+    context = OptimizerContext.from_table(table, roster_size, POS_CONSTS)
+    scorer = MarginalScorer(RosterOptimizer(context))
+    naive = RosterOptimizer(context, backend="milp")
+    board = DraftBoard(table)
+
+    # Draft by ADP, scoring players for the team on the clock at evenly spaced picks
+    draft_order = snake_order(num_teams, roster_size)
+    scored_picks = set(np.linspace(0, len(draft_order) - 2, num_picks).astype(int).tolist())
+    by_adp = np.argsort(table.adp, kind="stable")
+    pos_idx, min_pos, max_pos = context.pos_limits()
+    picks_idx: Dict[int, set] = {team: set() for team in range(num_teams)}
+    draft_rows: List[int] = []
+    records: List[Dict] = []
+    try:
+        for pick, team in enumerate(draft_order):
+            if pick in scored_picks:
+                # Score every player
+                marginals = scorer.score(team, picks_idx, set(draft_rows), backend=backend)
+
+                # Re-solve for each player in the tabs
+                board.sync(draft_rows)
+                tab_rows = np.unique(np.concatenate([board.top(pos) for pos in [ALL_POSITIONS] + list(POS_CONSTS)]))
+                available, fixed = context.masks({team: picks_idx[team]}, set(draft_rows))
+                start = time.perf_counter()
+                truth = np.array(
+                    [naive.solve(available, fixed[team] | table.mask([row])).value for row in tab_rows.tolist()]
+                )
+                naive_time = time.perf_counter() - start
+
+                # Compare (over players that fit the roster)
+                fits = np.isfinite(truth)
+                tab_rows, truth = tab_rows[fits], truth[fits]
+                values = marginals.value[tab_rows]
+                best = int(np.argmax(values))
+                records.append(
+                    {
+                        "pick": pick,
+                        "scored": int(np.isfinite(marginals.bound).sum()),
+                        "tab_players": len(fits),
+                        "marginal_ms": 1000 * marginals.solve_time,
+                        "naive_ms": 1000 * naive_time,
+                        "solved": marginals.num_solved,
+                        "tab_exact": float(marginals.exact[tab_rows].mean()),
+                        "mean_error": float(np.mean(truth - values)),
+                        "max_error": float(np.max(truth - values)),
+                        "best_regret": float(truth.max() - truth[best]),
+                        "bounds_hold": bool(np.all(marginals.bound[tab_rows] >= truth - 1e-6)),
+                    }
+                )
+
+            # Take the best available player by ADP at a position the team can still fill
+            roster = table.mask(picks_idx[team])
+            counts = np.bincount(pos_idx[roster], minlength=len(min_pos))
+            allowed = allowed_positions(counts, min_pos, max_pos, roster_size - roster.sum())
+            open_rows = by_adp[context.pool[by_adp] & ~table.mask(draft_rows)[by_adp] & allowed[pos_idx[by_adp]]]
+            row = int(open_rows[0])
+            picks_idx[team].add(row)
+            draft_rows.append(row)
+    finally:
+        scorer.optimizer.shutdown()
+
+    return pd.DataFrame(records)
+
+
+def main():
+    # Parse args
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--num-players", type=int, default=2000)
+    parser.add_argument("--num-teams", type=int, default=12)
+    parser.add_argument("--roster-size", type=int, default=16)
+    parser.add_argument("--num-picks", type=int, default=6, help="picks to score, evenly spaced over the draft")
+    parser.add_argument("--backend", default="auto", help="backend for the shortlist's re-solves")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write per-pick results as JSON")
+    args = parser.parse_args()
+
+    # Run
+    results = run(args.num_players, args.num_teams, args.roster_size, args.num_picks, args.backend, args.seed)
+    print(f"{args.num_players} players, {args.num_teams} teams, {args.roster_size} rounds, {NUM_EXACT} re-solves")
+    print(results.to_string(index=False, float_format=lambda x: f"{x:.4g}"))
+
+    # Maybe save
+    if args.output is not None:
+        out = {"args": vars(args), "picks": results.to_dict("records")}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(out, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
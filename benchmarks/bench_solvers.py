@@ -0,0 +1,133 @@
+"""
+Compare solver backends' latency and solution quality over a simulated draft of the production player data.
+
+Teams draft in snake order by ADP and, at every pick, the team on the clock is re-optimized with each backend. Run
+from the repo root (after `make install`):
+
+    python benchmarks/bench_solvers.py --year 2022 --points-mode "Half PPR"
+    python benchmarks/bench_solvers.py --players path/to/players.csv --output bench_solvers.json
+"""
+
+import argparse
+import json
+import os
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from draft_optimizer.app.heuristic import allowed_positions
+from draft_optimizer.app.optimize import OptimizerContext, RosterOptimizer
+from draft_optimizer.app.table import PlayerTable
+from draft_optimizer.src.utils import DATA_DIR
+
+# Specify default league (matches the settings page defaults)
+POS_CONSTS = {"QB": (1, 2), "RB": (2, 6), "WR": (2, 6), "TE": (2, 4), "K": (1, 1), "D/ST": (1, 2)}
+
+
+def snake_order(num_teams: int, num_rounds: int) -> np.ndarray:
+    rounds = [np.arange(num_teams) if r % 2 == 0 else np.arange(num_teams)[::-1] for r in range(num_rounds)]
+    return np.concatenate(rounds)
+
+
+def run(table: PlayerTable, num_teams: int, roster_size: int, backends: List[str]) -> pd.DataFrame:
+    # Make one optimizer per backend, so each keeps its own warm starts
+    context = OptimizerContext.from_table(table, roster_size, POS_CONSTS)
+    optimizers = {backend: RosterOptimizer(context, backend=backend) for backend in backends}
+
+    # Draft by ADP, re-optimizing the team on the clock at every pick
+    draft_order = snake_order(num_teams, roster_size)
+    by_adp = np.argsort(table.adp, kind="stable")
+    pos_idx, min_pos, max_pos = context.pos_limits()
+    available = context.pool.copy()
+    fixed = {team: np.zeros(table.num_players, dtype=bool) for team in range(num_teams)}
+    records: List[Dict] = []
+    for pick, team in enumerate(draft_order):
+        # Optimize
+        for backend, optimizer in optimizers.items():
+            result = optimizer.solve(available, fixed[team], key=team)
+            records.append(
+                {
+                    "pick": pick,
+                    "team": int(team),
+                    "backend": backend,
+                    "result_backend": result.backend,
+                    "value": result.value,
+                    "bound": result.bound,
+                    "gap": result.gap,
+                    "solve_time": result.solve_time,
+                }
+            )
+
+        # Take the best available player by ADP at a position the team can still fill
+        roster = fixed[team]
+        counts = np.bincount(pos_idx[roster], minlength=len(min_pos))
+        allowed = allowed_positions(counts, min_pos, max_pos, roster_size - roster.sum())
+        row = by_adp[available[by_adp] & allowed[pos_idx[by_adp]]][0]
+        available[row] = False
+        roster[row] = True
+
+    # Compare against the exact optimum where it's known
+    results = pd.DataFrame(records)
+    if "milp" in backends:
+        exact = results[results["backend"] == "milp"].set_index("pick")["value"]
+        results["true_gap"] = 1 - results["value"] / results["pick"].map(exact)
+
+    return results
+
+
+def summarize(results: pd.DataFrame) -> pd.DataFrame:
+    agg = {
+        "solve_ms": ("solve_time", lambda x: 1000 * x.mean()),
+        "p95_ms": ("solve_time", lambda x: 1000 * x.quantile(0.95)),
+        "max_ms": ("solve_time", lambda x: 1000 * x.max()),
+        "mean_gap": ("gap", "mean"),
+        "max_gap": ("gap", "max"),
+    }
+    if "true_gap" in results.columns:
+        agg["mean_true_gap"] = ("true_gap", "mean")
+        agg["max_true_gap"] = ("true_gap", "max")
+        agg["pct_optimal"] = ("true_gap", lambda x: (x <= 1e-6).mean())
+    summary = results.groupby("backend").agg(**agg)
+
+    return summary
+
+
+def main():
+    # Parse args
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", help="players CSV (default: the production CSV for --year/--points-mode)")
+    parser.add_argument("--year", type=int, default=2022)
+    parser.add_argument("--points-mode", default="Half PPR")
+    parser.add_argument("--num-teams", type=int, default=10)
+    parser.add_argument("--roster-size", type=int, default=16)
+    parser.add_argument("--backends", nargs="+", default=["greedy", "auto", "milp"])
+    parser.add_argument("--output", help="write per-pick results and the summary as JSON")
+    args = parser.parse_args()
+
+    # Load players
+    players_path = args.players
+    if players_path is None:
+        points_mode = args.points_mode.lower().replace(" ", "_")
+        players_path = os.path.join(DATA_DIR, "production", str(args.year), f"players_{points_mode}.csv")
+    table = PlayerTable.from_csv(players_path, write_bundle=False)
+
+    # Run
+    results = run(table, args.num_teams, args.roster_size, args.backends)
+    summary = summarize(results)
+    print(f"{players_path}: {table.num_players} players, {len(table.weeks)} weeks")
+    print(summary.to_string(float_format=lambda x: f"{x:.4g}"))
+
+    # Maybe save
+    if args.output is not None:
+        out = {
+            "players": players_path,
+            "summary": summary.reset_index().to_dict("records"),
+            "picks": results.to_dict("records"),
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(out, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
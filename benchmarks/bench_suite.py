@@ -0,0 +1,234 @@
+"""
+Time the draft data paths offline, over synthetic player pools: player loading (cold and warm), the draft page's
+per-rerun data prep, and solve latency at each stage of a simulated draft.
+
+Each scenario is `<players>x<teams>x<rounds>`. Teams draft in snake order by ADP; at every pick the draft page's data
+is rebuilt and the team on the clock is optimized, and all teams are optimized at the start of each stage (early, mid,
+and late draft). Exact solves over 2000 players early in a draft take seconds; pass `--time-budget` for a quicker run.
+Run from the repo root (after `make install`), then compare runs between commits:
+
+    python benchmarks/bench_suite.py --output bench_before.json
+    python benchmarks/bench_suite.py --output bench_after.json --compare bench_before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from bench_solvers import POS_CONSTS, snake_order
+from synthetic import make_players
+
+from draft_optimizer.app.board import ALL_POSITIONS, DraftBoard
+from draft_optimizer.app.cache import ResultCache
+from draft_optimizer.app.heuristic import allowed_positions
+from draft_optimizer.app.optimize import OptimizerContext, RosterOptimizer, poss_opt_picks, poss_opt_picks_all
+from draft_optimizer.app.table import PlayerTable, read_players
+
+# Specify default scenarios (players x teams x rounds)
+SCENARIOS = ["200x8x16", "500x10x17", "500x14x18", "2000x12x16", "2000x14x18"]
+STAGES = ["early", "mid", "late"]
+
+
+def parse_scenario(scenario: str) -> Tuple[int, int, int]:
+    num_players, num_teams, num_rounds = (int(v) for v in scenario.lower().split("x"))
+    if num_teams * num_rounds > num_players:
+        raise ValueError(f"{scenario}: more picks than players")
+
+    return num_players, num_teams, num_rounds
+
+
+def timed(fn: Callable, repeat: int = 1) -> Tuple[float, Any]:
+    # Get the median time (ms) and the last result
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(1000 * (time.perf_counter() - start))
+
+    return float(np.median(times)), result
+
+
+def bench_loaders(players: pd.DataFrame, repeat: int) -> List[Dict]:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Write the CSV like the production notebooks do
+        players_path = os.path.join(tmp_dir, "players.csv")
+        players.to_csv(players_path)
+
+        # Parse the CSV (`load_players`), then compile and load the bundle (`load_table`, cold then warm)
+        records = [{"metric": "load_csv", "ms": timed(lambda: read_players(players_path), repeat)[0]}]
+        cold_ms, _ = timed(lambda: PlayerTable.from_csv(players_path), 1)
+        warm_ms, _ = timed(lambda: PlayerTable.from_csv(players_path), repeat)
+        records += [{"metric": "load_table_cold", "ms": cold_ms}, {"metric": "load_table_warm", "ms": warm_ms}]
+
+    return records
+
+
+def page_prep(
+    table: PlayerTable, board: DraftBoard, draft_picks: List[str], draft_order: np.ndarray, pos_keys: List[str]
+):
+    # Mirror the draft page's rerun (everything but optimizing); the board persists between reruns, as in a session
+    draft_rows = table.rows_of(draft_picks)
+    board.sync(draft_rows.tolist())
+    possible_picks = [None] + board.options()
+    best = [table.frame(board.top(pos, 25)) for pos in [ALL_POSITIONS] + pos_keys]
+    pick_teams = draft_order[0 : len(draft_rows)]
+    rosters = []
+    for team in range(int(draft_order.max()) + 1):
+        roster_rows = draft_rows[pick_teams == team]
+        rosters.append(table.frame(table.top(table.mask(roster_rows), len(roster_rows))))
+
+    return possible_picks, best, rosters
+
+
+def run_scenario(
+    scenario: str, backend: str, repeat: int, seed: int, time_budget: Optional[float] = None
+) -> List[Dict]:
+    # Make players
+    num_players, num_teams, num_rounds = parse_scenario(scenario)
+    players = make_players(num_players, seed=seed)
+    records = bench_loaders(players, repeat)
+    table = PlayerTable.from_players(players)
+
+    # Prepare to draft
+    context = OptimizerContext.from_table(table, num_rounds, POS_CONSTS)
+    optimizer = RosterOptimizer(context, backend=backend, cache=ResultCache())
+    board = DraftBoard(table)
+    draft_order = snake_order(num_teams, num_rounds)
+    by_adp = np.argsort(table.adp, kind="stable")
+    pos_idx, min_pos, max_pos = context.pos_limits()
+    available = context.pool.copy()
+    picks_idx: Dict[int, set] = {team: set() for team in range(num_teams)}
+    draft_picks: List[str] = []
+
+    # Draft by ADP
+    for pick, team in enumerate(draft_order.tolist()):
+        round_num = pick // num_teams
+        stage = STAGES[3 * round_num // num_rounds]
+        picked_idx = set(np.flatnonzero(~available).tolist())
+
+        # Time the page and the solves the app would run
+        ms, _ = timed(lambda: page_prep(table, board, draft_picks, draft_order, list(POS_CONSTS.keys())))
+        records.append({"metric": "page_prep", "stage": stage, "pick": pick, "ms": ms})
+        ms, result = timed(lambda: poss_opt_picks(optimizer, team, picks_idx, picked_idx, time_budget=time_budget))
+        records.append({"metric": "solve", "stage": stage, "pick": pick, "ms": ms, "gap": result.gap})
+        if pick % num_teams == 0 and round_num in [0, num_rounds // 3, 2 * num_rounds // 3]:
+            ms, _ = timed(
+                lambda: poss_opt_picks_all(optimizer, picks_idx, picked_idx, max_workers=1, time_budget=time_budget)
+            )
+            records.append({"metric": "solve_all", "stage": stage, "pick": pick, "ms": ms})
+
+        # Take the best available player by ADP at a position the team can still fill
+        roster = np.zeros(table.num_players, dtype=bool)
+        roster[list(picks_idx[team])] = True
+        counts = np.bincount(pos_idx[roster], minlength=len(min_pos))
+        allowed = allowed_positions(counts, min_pos, max_pos, num_rounds - roster.sum())
+        row = int(by_adp[available[by_adp] & allowed[pos_idx[by_adp]]][0])
+        available[row] = False
+        picks_idx[team].add(row)
+        draft_picks.append(str(table.ids[row]))
+
+    # Label
+    for record in records:
+        record.update({"scenario": scenario, "num_players": num_players, "num_teams": num_teams})
+        record.update({"num_rounds": num_rounds, "backend": backend})
+        record.setdefault("stage", "all")
+
+    return records
+
+
+def summarize(results: pd.DataFrame) -> pd.DataFrame:
+    summary = results.groupby(["scenario", "metric", "stage"], sort=False)["ms"].agg(
+        n="count",
+        mean_ms="mean",
+        p50_ms="median",
+        p95_ms=lambda x: x.quantile(0.95),
+        max_ms="max",
+    )
+
+    return summary
+
+
+def compare(summary: pd.DataFrame, baseline_path: str, tolerance: float) -> pd.DataFrame:
+    # Compare median times against a previous run
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = pd.DataFrame(json.load(f)["summary"]).set_index(["scenario", "metric", "stage"])
+    joined = summary[["p50_ms"]].join(baseline[["p50_ms"]], rsuffix="_baseline", how="inner")
+    joined["ratio"] = joined["p50_ms"] / joined["p50_ms_baseline"]
+    joined["regressed"] = joined["ratio"] > 1 + tolerance
+
+    return joined
+
+
+def metadata(args: argparse.Namespace) -> Dict:
+    # Describe the run, so results can be matched to commits and machines
+    try:
+        commit: Optional[str] = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": vars(args),
+    }
+
+
+def main():
+    # Parse args
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", default=SCENARIOS, help="<players>x<teams>x<rounds>")
+    parser.add_argument("--backend", default="auto")
+    parser.add_argument("--time-budget", type=float, help="seconds per solve (default: solve to optimality)")
+    parser.add_argument("--repeat", type=int, default=5, help="repeats for loader timings (median)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write metadata, the summary, and every timing as JSON")
+    parser.add_argument("--compare", help="a previous --output to compare median times against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    # Run
+    records = []
+    for scenario in args.scenarios:
+        start = time.perf_counter()
+        records += run_scenario(scenario, args.backend, args.repeat, args.seed, time_budget=args.time_budget)
+        print(f"{scenario}: {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    results = pd.DataFrame(records)
+    summary = summarize(results)
+    print(summary.to_string(float_format=lambda x: f"{x:.4g}"))
+
+    # Maybe save
+    if args.output is not None:
+        out = {
+            "metadata": metadata(args),
+            "summary": summary.reset_index().to_dict("records"),
+            "results": results.replace({np.nan: None}).to_dict("records"),
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(out, f, indent=4)
+
+    # Maybe compare
+    if args.compare is not None:
+        comparison = compare(summary, args.compare, args.tolerance)
+        print(comparison.to_string(float_format=lambda x: f"{x:.4g}"))
+        if comparison["regressed"].any():
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Synthetic player pools shaped like the production players CSV, for benchmarks that shouldn't need scraped data.
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from draft_optimizer.app.table import INDEX_COLS
+from draft_optimizer.src.models import ProSchedule
+
+# Specify pool shape; shares roughly follow the production data
+POSITION_SHARES = {"QB": 0.15, "RB": 0.25, "WR": 0.3, "TE": 0.15, "K": 0.07, "D/ST": 0.08}
+POSITION_SCALES = {"QB": 20, "RB": 15, "WR": 14, "TE": 10, "K": 8, "D/ST": 7}
+PRO_TEAMS = [f"T{i:02d}" for i in range(32)]
+
+
+def make_players(num_players: int, num_weeks: int = 17, seed: int = 0) -> pd.DataFrame:
+    # Draw positions and skill (long-tailed, so a few players stand out)
+    rng = np.random.default_rng(seed)
+    positions = rng.choice(list(POSITION_SHARES.keys()), num_players, p=list(POSITION_SHARES.values()))
+    pro_teams = rng.choice(PRO_TEAMS, num_players)
+    scales = np.array([POSITION_SCALES[pos] for pos in positions])
+    skill = scales * rng.exponential(0.6, num_players)
+
+    # Draw weekly points around skill, with a bye per pro team
+    points = np.clip(skill[:, None] * (1 + 0.1 * rng.normal(size=(num_players, num_weeks))), 0, None).round(2)
+    byes = {team: week for team, week in zip(PRO_TEAMS, rng.integers(4, min(14, num_weeks), len(PRO_TEAMS)))}
+    points[np.arange(num_players), [byes[team] for team in pro_teams]] = 0
+
+    # Make frame
+    players = pd.DataFrame(points, columns=[f"week{i + 1}" for i in range(num_weeks)])
+    players["sum_weeks"] = points.sum(axis=1)
+    players["adp"] = (players["sum_weeks"] * rng.lognormal(0, 0.1, num_players)).rank(ascending=False)
+    players.index = pd.MultiIndex.from_arrays(
+        [[str(i) for i in range(num_players)], [f"Player {i}" for i in range(num_players)], positions, pro_teams],
+        names=INDEX_COLS,
+    )
+
+    return players
+
+
+def make_schedule(players: pd.DataFrame) -> Tuple[ProSchedule, Dict[str, int]]:
+    # Pair up pro teams every week but their bye (the week all their players score 0); returns the team IDs too
+    week_cols = [c for c in players.columns if c.startswith("week")]
+    pro_teams = players.index.get_level_values("pro_team")
+    team_ids = {team: i for i, team in enumerate(PRO_TEAMS)}
+    played = pd.DataFrame(players[week_cols].to_numpy() > 0, index=pro_teams).groupby(level=0).any()
+    home_ids, away_ids, weeks = [], [], []
+    for w, col in enumerate(played.columns):
+        teams = [team_ids[team] for team in played.index[played[col]]]
+        if len(teams) % 2 == 1:
+            teams.append(teams[0])  # a doubleheader, so every team plays
+        home_ids += teams[0::2]
+        away_ids += teams[1::2]
+        weeks += [w + 1] * (len(teams) // 2)
+    dates = np.datetime64("2022-09-08") + 7 * (np.array(weeks, dtype=np.int64) - 1)
+    schedule = ProSchedule.from_arrays(home_ids, away_ids, weeks, dates)
+
+    return schedule, team_ids
@@ -1,24 +1,138 @@
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
 import numpy as np
-import pandas as pd
 import streamlit as st
 
-from draft_optimizer.app.optimize import poss_opt_picks, set_lookup
-from draft_optimizer.app.players import load_players  # , sync_picks
-from draft_optimizer.app.settings import list_settings, load_settings, save_settings
+from draft_optimizer.app.board import ALL_POSITIONS, DraftBoard
+from draft_optimizer.app.cache import CACHE_DIR, ResultCache
+from draft_optimizer.app.draft_log import open_draft_log
+from draft_optimizer.app.lineup import LINEUP_SLOTS, LineupSolver
+from draft_optimizer.app.marginal import NUM_EXACT
+from draft_optimizer.app.optimize import BACKENDS, GAP_TOL, OptimizerContext, RosterOptimizer, RosterSolver
+from draft_optimizer.app.players import load_availability, load_samples, load_table, sync_picks
+from draft_optimizer.app.service import TIME_BUDGET, OptimizeService, job_key
+from draft_optimizer.app.settings import list_settings, load_settings
+from draft_optimizer.app.simulate import simulate_picks
+from draft_optimizer.app.stochastic import ALPHA, OBJECTIVES, StochasticSolver
+from draft_optimizer.app.survival import PickSurvival
+from draft_optimizer.app.sync import DraftSync, diff_picks, refresh_optimizer, resolve_picks
+from draft_optimizer.app.table import PlayerTable
+from draft_optimizer.src.trace import TRACER, count, span
+
+
+@st.experimental_memo(show_spinner=False)
+def load_context(points_mode: str, year: int, roster_size: int, pos_consts: Dict[str, List[int]]) -> OptimizerContext:
+    # Cached per league and season; immutable and picklable, so it's safe to share between sessions
+    count("memo.load_context.misses")
+    table = load_table(points_mode, year)
+    context = OptimizerContext.from_table(table, roster_size, pos_consts)
+
+    return context
+
+
+@st.experimental_singleton(show_spinner=False)
+def get_optimizer(
+    settings_file: str,
+    points_mode: str,
+    year: int,
+    roster_size: int,
+    pos_consts: Dict[str, List[int]],
+    objective: str = "cvar",
+    alpha: float = ALPHA,
+    lineup_slots: Optional[Dict[str, int]] = None,
+    league_id: Optional[str] = None,
+    platform: Optional[str] = None,
+) -> RosterOptimizer:
+    # Build over the full player pool; picks are handled via the optimizer's bounds
+    # note: `settings_file` keeps one optimizer (and its warm-starts) per draft
+    count("memo.get_optimizer.misses")
+    context = load_context(points_mode, year, roster_size, pos_consts)
+    cache = ResultCache(cache_dir=os.path.join(CACHE_DIR, "optimize"))  # keyed by draft state, so safe to share
+
+    # Optimize starting lineups, with byes from the pro schedule if there is one
+    available_weeks = load_availability(points_mode, year, league_id, platform)
+    extra_backends: Dict[str, RosterSolver] = {"lineup": LineupSolver(context, available_weeks, lineup_slots)}
+
+    # Optimize for risk too if there are projection samples
+    samples = load_samples(points_mode, year)
+    if samples is not None:
+        extra_backends["stochastic"] = StochasticSolver(context, samples, objective=objective, alpha=alpha)
+    optimizer = RosterOptimizer(context, cache=cache, extra_backends=extra_backends)
+
+    return optimizer
+
+
+@st.experimental_singleton(show_spinner=False)
+def get_draft_sync(
+    settings_file: str, league_id: str, platform: str, year: int, points_mode: str, max_picks: int
+) -> DraftSync:
+    # One background worker per draft, shared between sessions; started and stopped by the page
+    sync = DraftSync(lambda: sync_picks(league_id, platform, year, points_mode), max_picks=max_picks)
 
+    return sync
 
-def get_possible_picks(draft_picks: np.ndarray, players: pd.DataFrame) -> pd.Series:
-    # Reset index
-    players = players.reset_index(level=["name", "position", "pro_team"])
 
-    # Exclude picks
-    players = players.loc[~players.index.isin(draft_picks)]
+@st.experimental_singleton(show_spinner=False)
+def get_optimize_service(*optimizer_args) -> OptimizeService:
+    # One background worker per optimizer, so solves never block the page; started by the page
+    service = OptimizeService(get_optimizer(*optimizer_args))
 
-    # Build str
-    possible_picks = players["name"] + " (" + players["position"] + ", " + players["pro_team"] + ")"
-    possible_picks = possible_picks.sort_values()
+    return service
 
-    return possible_picks
+
+def get_draft_board(settings_file: str, table: PlayerTable) -> DraftBoard:
+    # One board per session and draft (sessions can view different picks); rebuilt if the players change
+    key = f"draft_board_{settings_file}"
+    board = st.session_state.get(key)
+    if board is None or board.table.digest != table.digest:
+        count("draft_board.builds")
+        board = DraftBoard(table)
+        st.session_state[key] = board
+
+    return board
+
+
+def get_pick_survival(settings_file: str, table: PlayerTable) -> PickSurvival:
+    # Per session and draft, like the board
+    key = f"pick_survival_{settings_file}"
+    survival = st.session_state.get(key)
+    if survival is None or survival.table.digest != table.digest:
+        count("pick_survival.builds")
+        survival = PickSurvival(table)
+        st.session_state[key] = survival
+
+    return survival
+
+
+def display_timings():
+    # Show where reruns spend their time, and how often memoized loads hit
+    with st.sidebar.expander("Timings"):
+        summary = TRACER.summary()
+        if len(summary) == 0:
+            st.caption("Nothing timed yet.")
+        else:
+            st.dataframe(summary)
+        memo_stats = TRACER.memo_stats()
+        if len(memo_stats) > 0:
+            st.markdown("Memoized")
+            st.dataframe(memo_stats)
+        if len(TRACER.counters) > 0:
+            st.markdown("Counters")
+            st.dataframe([{"name": k, "count": v} for k, v in sorted(TRACER.counters.items())])
+        solves = TRACER.recent("solve.", 10)
+        if len(solves) > 0:
+            st.markdown("Recent Solves")
+            st.dataframe(solves)
+
+        # Persist or clear
+        cols = st.columns(2)
+        if cols[0].button("Dump to Log"):
+            st.caption(f"Saved to {TRACER.dump()}")
+        if cols[1].button("Reset"):
+            TRACER.reset()
 
 
 def display():
@@ -26,8 +140,6 @@ def display():
     st.markdown("# Draft")
     st.sidebar.markdown("---")
 
-    # TODO: go to round/pick (so can revert; will be point-in-time)
-
     # List settings
     settings_files = list_settings()
     settings_file = st.sidebar.selectbox("Settings", settings_files)
@@ -36,57 +148,99 @@ def display():
         st.stop()
 
     # Load settings
-    settings = load_settings(settings_file)
+    with span("load_settings"):
+        settings = load_settings(settings_file)
     year = settings["year"]
-    # league_id = settings["league_id"]
-    # platform = settings["platform"]
+    league_id = settings["league_id"]
+    platform = settings["platform"]
     points_mode = settings["points_mode"]
     num_teams = settings["num_teams"]
     roster_size = settings["roster_size"]
     pos_consts = settings["pos_consts"]
+    lineup_slots = settings.get("lineup_slots", LINEUP_SLOTS)
     draft_order = np.array(settings["draft_order"], dtype=int)
-    draft_picks = np.array(settings["draft_picks"], dtype=str)
     teams = [i for i in range(num_teams)]
     max_overall_pick = num_teams * roster_size
-    overall_pick = len(draft_picks)
 
-    # Enable go-to draft picks
-    pick_strs = [f"Round: {p // num_teams + 1}, Pick: {p % num_teams + 1}" for p in range(len(draft_picks) + 1)]
-    if overall_pick >= max_overall_pick:
+    # Load the draft's latest state
+    with span("load_draft"):
+        draft_log = open_draft_log(settings_file, settings)
+        latest = draft_log.state()
+
+    # Maybe follow the draft live; only picks not already saved are applied
+    sync = None
+    if league_id is not None and platform is not None:
+        live_sync = st.sidebar.checkbox("Live Sync", value=False)
+        sync = get_draft_sync(settings_file, league_id, platform, year, points_mode, max_overall_pick)
+        if not live_sync:
+            sync.stop()
+            sync = None
+        else:
+            sync.start()
+            sync.on_update = None  # set below when optimizing every pick
+            sync_version = sync.version
+            num_kept, new_picks = diff_picks(latest.picks, sync.picks)
+            if num_kept < latest.pick or len(new_picks) > 0:
+                latest = draft_log.append(new_picks, start=num_kept, rewind=True)
+            if sync.last_error is not None:
+                st.sidebar.warning(f"Sync failed: {sync.last_error}")
+
+    # Enable go-to draft picks; earlier picks are read from their snapshots
+    pick_strs = [f"Round: {p // num_teams + 1}, Pick: {p % num_teams + 1}" for p in range(latest.pick + 1)]
+    if latest.pick >= max_overall_pick:
         pick_strs[-1] = "Draft Conclusion"
     reversed_pick_strs = pick_strs[::-1]
     selected_pick = st.sidebar.selectbox("Go-to Pick", reversed_pick_strs, index=0)
     selected_pick_idx = pick_strs.index(selected_pick)
-    draft_picks = draft_picks[:selected_pick_idx]
+    draft_state = latest if selected_pick_idx == latest.pick else draft_log.state(selected_pick_idx)
+    draft_picks = np.array(draft_state.picks, dtype=str)
+
+    # Get optimizer options
+    auto_optimize = st.sidebar.checkbox("Optimize Every Pick", value=False)
+    score_picks = st.sidebar.checkbox("Score Picks", value=False, help="Marginal value of each available player")
+    backends = BACKENDS + ["lineup"] + (["stochastic"] if load_samples(points_mode, year) is not None else [])
+    backend = st.sidebar.selectbox("Solver", backends)
+    objective, alpha = "cvar", ALPHA
+    if backend == "stochastic":
+        objective = st.sidebar.selectbox("Risk", OBJECTIVES, format_func=lambda o: {"cvar": "CVaR"}.get(o, o.title()))
+        if objective == "cvar":
+            alpha = st.sidebar.slider("Worst Samples", 0.05, 0.5, ALPHA, 0.05, help="Tail of min weekly points")
+    time_budget = st.sidebar.number_input(
+        "Time Budget (s)", min_value=0.5, value=TIME_BUDGET, step=1.0, help="Best rosters found in time are shown"
+    )
+    optimizer_args = (
+        settings_file,
+        points_mode,
+        year,
+        roster_size,
+        pos_consts,
+        objective,
+        alpha,
+        lineup_slots,
+        league_id,
+        platform,
+    )
+    service = None
+    polling = {}  # background jobs still running; job ID -> version shown
 
     # Load players
-    players = load_players(points_mode, year)
-    possible_picks = get_possible_picks(draft_picks, players)
+    with span("load_table"):
+        table = load_table(points_mode, year)
+    with span("draft_state", picks=len(draft_picks)) as attrs:
+        draft_rows, picks_idx, missing = resolve_picks(table, draft_order, draft_state.picks)
+        board = get_draft_board(settings_file, table)
+        attrs["undone"], attrs["picked"] = board.sync(draft_rows)
+        survival = get_pick_survival(settings_file, table)
+        survival.sync(draft_rows)
+    picked_idx = set(draft_rows.tolist())
+    if len(missing) > 0:
+        st.sidebar.warning(f"Skipped picks without player data: {', '.join(missing)}")
 
     # Display last pick
-    if len(draft_picks) > 0:
-        last_pick_id = str(draft_picks[-1])
-        player_tuple = players.loc[last_pick_id].index[0]
-        player_str = f"{player_tuple[0]} ({player_tuple[1]}, {player_tuple[2]})"
+    if len(draft_rows) > 0:
+        player_str = table.display_names[draft_rows[-1]]
         st.sidebar.markdown(f"Last pick: {player_str}")
 
-    # Maybe display sync
-    # if league_id is not None and platform is not None:
-    #     # Display button
-    #     st.sidebar.markdown("---")
-    #     sync = st.sidebar.button("Sync Draft")
-    #
-    #     # Sync
-    #     if sync:
-    #         # Get picks
-    #         synced_pick_ids = sync_picks(league_id, platform, year)
-    #         synced_pick_ids = synced_pick_ids[0:max_overall_pick]
-    #
-    #         # Update and re-run
-    #         settings["draft_picks"] = synced_pick_ids
-    #         save_settings(settings_file, settings)
-    #         st.experimental_rerun()
-
     # Display pick form
     overall_pick = len(draft_picks)
     if overall_pick >= max_overall_pick:
@@ -97,92 +251,189 @@ def display():
         pick_num = overall_pick % num_teams + 1
         team = draft_order[overall_pick] + 1
 
+        # Maybe score every available player for the team on the clock (in min weekly points, whatever the solver), in
+        # the background like optimizing
+        marginals = None
+        score_job = None
+        if score_picks:
+            service = get_optimize_service(*optimizer_args)
+            service.start()
+            marginal_backend = backend if backend in BACKENDS else "auto"
+            score_team = int(draft_order[overall_pick])
+            score_job = service.submit(picks_idx, picked_idx, latest.seq, marginal_backend, None, team=score_team)
+            if not score_job.done:
+                polling[score_job.id] = score_job.version
+            marginals = score_job.marginals
+
         # Display pick options
         with st.form("draft"):
             # Draft section
             cols = st.columns(2)
             cols[0].markdown(f"### Round: {round_num}, Pick: {pick_num}")
             cols[0].markdown(f"On the clock: Team {team}")
-            pick = cols[0].selectbox("Player", ["None"] + possible_picks.tolist())
+            pick = cols[0].selectbox(
+                "Player",
+                [None] + board.options(),
+                format_func=lambda row: "None" if row is None else table.display_names[row],
+            )
 
             # Best available section
             cols[1].markdown("### Best Available")
-            positions = ["All"] + list(pos_consts.keys())
+            cols[1].caption(f"p_next_pick: chance of lasting to Team {team}'s next pick")
+            if score_job is not None and score_job.status == "failed":
+                cols[1].error(f"Scoring failed: {score_job.error}")
+            elif score_job is not None and marginals is None:
+                cols[1].caption("Scoring players...")
+            if marginals is not None:
+                cols[1].caption(
+                    "marginal: change in min weekly points from drafting the player (exact for the top "
+                    f"{NUM_EXACT} contenders, else the best roster found); marginal_max: the most it could be"
+                )
+            positions = [ALL_POSITIONS] + list(pos_consts.keys())
             pos_tabs = cols[1].tabs(positions)
-            for i, pos_tab in enumerate(pos_tabs):
-                pos = positions[i]
-                if pos != "All":
-                    to_display = players.loc[players.index.get_level_values("position") == pos]
-                else:
-                    to_display = players
-                to_display = to_display.loc[to_display.index.get_level_values("id").isin(possible_picks.index)]
-                pos_tab.dataframe(to_display["sum_weeks"].nlargest(25).reset_index())
+            with span("best_available"):
+                for pos, pos_tab in zip(positions, pos_tabs):
+                    rows = board.top(pos, 25)
+                    best = table.frame(rows)
+                    best["p_next_pick"] = survival.next_pick_probs(rows, draft_order, draft_order[overall_pick])
+                    if marginals is not None:
+                        best["marginal"] = marginals.delta(rows)
+                        best["marginal_max"] = marginals.delta_bound(rows)
+                    pos_tab.dataframe(best)
 
             # Submit
             submit = cols[0].form_submit_button("Draft")
 
         # Handle submit
         if submit:
-            if pick == "None":
+            if pick is None:
                 cols[0].error("No player selected.")
                 st.stop()
 
-            # Save pick
-            player_id = str(possible_picks[possible_picks == pick].index[0])
-            draft_picks_list = draft_picks.tolist()
-            draft_picks_list.append(player_id)
-            settings["draft_picks"] = draft_picks_list
-            save_settings(settings_file, settings)
+            # Save pick; picking from an earlier pick undoes the picks after it
+            player_id = str(table.ids[pick])
+            try:
+                draft_log.append([player_id], start=overall_pick, rewind=overall_pick < latest.pick)
+            except ValueError:
+                cols[0].error("Another pick was made first; reload to see it.")
+                st.stop()
             st.experimental_rerun()
 
-    # Make team tabs
+        # Rank picks for the team on the clock over simulated drafts
+        simulate = st.button("Simulate Picks")
+        if simulate:
+            context = load_context(points_mode, year, roster_size, pos_consts)
+            with st.spinner("Simulating drafts..."):
+                sim_picks = simulate_picks(context, draft_order, draft_rows, draft_order[overall_pick])
+            st.dataframe(sim_picks)
+
+    # Maybe optimize all teams in the background; newer picks cancel older jobs
     st.markdown("---")
+    optimize = st.button("Optimize All Teams")
+    opt_picks_all = {}
+    opt_results = {}
+    job = None
+    job_state = f"optimize_job_{settings_file}"
+    if optimize or auto_optimize or job_state in st.session_state:
+        with span("get_optimizer"):
+            service = get_optimize_service(*optimizer_args)
+            service.start()
+        if optimize or auto_optimize:
+            # Submit, warm-starting from rosters saved with the draft (ex: before a restart); reruns find the same job
+            saved = {t: table.mask(table.rows_of(ids, skip_missing=True)) for t, ids in draft_state.warm_starts.items()}
+            job = service.submit(picks_idx, picked_idx, latest.seq, backend, time_budget, saved)
+            st.session_state[job_state] = job.id
+        else:
+            # Keep showing a requested job until the draft (or the optimizer options) move on
+            job = service.get(st.session_state[job_state])
+            if job is None or job.key != job_key(picks_idx, picked_idx, backend, time_budget):
+                job = None
+                del st.session_state[job_state]
+
+    if job is not None:
+        # Get the best rosters so far (the version first, so no update is missed while polling)
+        if not job.done:
+            polling[job.id] = job.version
+        opt_results = job.results
+        if job.status == "failed":
+            st.error(f"Optimization failed: {job.error}")
+        else:
+            st.caption(f"Optimizer: {job.status} ({job.elapsed:.1f}s of {time_budget:g}s budget)")
+
+        # Save warm-starts with the draft (keeping saved ones for teams not solved yet)
+        warm_starts = {
+            **draft_state.warm_starts,
+            **{
+                team: table.ids[sorted(result.rows)].tolist()
+                for team, result in opt_results.items()
+                if result.gap <= GAP_TOL
+            },
+        }
+        if warm_starts != draft_state.warm_starts:
+            draft_log.save_warm_starts(draft_state.pick, warm_starts)
+        for team, opt_result in opt_results.items():
+            poss_picks = opt_result.rows
+            opt_rows = table.top(table.mask(poss_picks - picks_idx[team]), len(poss_picks))
+            opt_picks_all[team] = table.frame(opt_rows)
+            opt_picks_all[team]["p_next_pick"] = survival.next_pick_probs(opt_rows, draft_order, team)
+
+    # Make team tabs
     teams = [f"Team {t + 1}" for t in teams]
     team_tabs = st.tabs(teams)
-    for team, team_tab in enumerate(team_tabs):
-        # Roster section
-        cols = team_tab.columns(2)
-        cols[0].markdown("### Roster")
-        picks_idx = draft_order == team
-        picks_idx = picks_idx[0 : len(draft_picks)]
-        picks_ids = draft_picks[picks_idx]
-        roster = players.loc[players.index.get_level_values("id").isin(picks_ids)]
-        cols[0].dataframe(roster["sum_weeks"].sort_values(ascending=False).reset_index())
-
-        # Optimizer section
-        cols[1].markdown("### Optimal Picks")
-        optimize = cols[1].button("Optimize", key=f"optimize{team}")
-        if optimize:
-            # Prepare to optimize
-            week_cols = [c for c in players.columns if c.startswith("week")]
-            min_pos_const, max_pos_const = {}, {}
-            for pos, consts in pos_consts.items():
-                min_pos_const[pos] = consts[0]
-                max_pos_const[pos] = consts[1]
-            players_opt = players.reset_index()
-            to_keep = players_opt["sum_weeks"] > 0  # remove players with poor projections
-            to_keep |= players_opt["id"].isin(draft_picks)  # keep any picks
-            players_opt = players_opt.loc[to_keep]
-            all_idx = set(players_opt.index)
-            set_lookup(
-                WEEK_COLS=week_cols,
-                ALL_IDX=all_idx,
-                PLAYERS=players_opt,
-                NUM_PLAYERS_CONST=roster_size,
-                MIN_POS_CONST=min_pos_const,
-                MAX_POS_CONST=max_pos_const,
-            )
+    with span("team_tabs"):
+        for team, team_tab in enumerate(team_tabs):
+            # Roster section
+            cols = team_tab.columns(2)
+            cols[0].markdown("### Roster")
+            roster_rows = picks_idx.get(team, set())
+            roster = table.frame(table.top(table.mask(roster_rows), len(roster_rows)))
+            cols[0].dataframe(roster)
+
+            # Optimizer section
+            cols[1].markdown("### Optimal Picks")
+            if team in opt_picks_all:
+                opt_result = opt_results[team]
+                if opt_result.roster is None:
+                    cols[1].warning("No roster could be found.")
+                else:
+                    label = "Min weekly points"
+                    if opt_result.backend == "lineup":
+                        label = "Min weekly lineup points"
+                    elif opt_result.backend == "stochastic":
+                        label = f"{'CVaR' if objective == 'cvar' else 'Expected'} min weekly points"
+                    cols[1].caption(
+                        f"{label}: {opt_result.value:.1f} (gap: {opt_result.gap:.1%}, {opt_result.backend})"
+                    )
+                    cols[1].dataframe(opt_picks_all[team])
+            elif job is not None and not job.done:
+                cols[1].caption("Optimizing...")
+
+    # Save synced picks and queue their solves as they come in, so reruns find them running
+    if sync is not None and auto_optimize and service is not None:
+
+        def on_update(picks: List[str], *_):
+            num_kept, new_picks = diff_picks(draft_log.state().picks, picks)
+            state = draft_log.append(new_picks, start=num_kept, rewind=True)
+            refresh_optimizer(service, draft_order, state.picks, state.seq, backend, time_budget)
+
+        sync.on_update = on_update
+
+    # Display timings (before any wait, so they show while following the draft)
+    display_timings()
 
-            # Optimize
-            picks_idx = {k: set() for k in range(num_teams)}
-            picked_idx = set()
-            for i, player_id in enumerate(draft_picks):
-                team_pick = draft_order[i]
-                player_idx = players_opt.loc[players_opt["id"] == player_id].index[0]
-                picks_idx[team_pick] |= {player_idx}
-                picked_idx |= {player_idx}
-            poss_picks = poss_opt_picks(team, picks_idx, picked_idx)
-            opt_picks = players_opt.loc[list(poss_picks), ["id", "name", "position", "pro_team", "sum_weeks"]].copy()
-            opt_picks = opt_picks.loc[~opt_picks.index.isin(picks_idx[team])]
-            opt_picks = opt_picks.sort_values("sum_weeks", ascending=False)
-            cols[1].dataframe(opt_picks)
+    # Maybe wait for synced picks or background results, then rerun; the status updates let Streamlit interrupt the wait
+    # on user input
+    if sync is not None or len(polling) > 0:
+        status = st.sidebar.empty()
+        start = time.time()
+        while True:
+            if sync is not None and sync.wait(sync_version, timeout=0.25 if len(polling) > 0 else 1.0):
+                break
+            if len(polling) > 0 and service.wait(polling, timeout=0.25):
+                break
+            if sync is not None:
+                last_poll = "never" if sync.last_poll is None else datetime.fromtimestamp(sync.last_poll).strftime("%X")
+                status.caption(f"Last synced: {last_poll}")
+            else:
+                status.caption(f"Waiting on results: {time.time() - start:.1f}s")
+        st.experimental_rerun()
@@ -1,5 +1,7 @@
 import streamlit as st
 
+from draft_optimizer.app.draft_log import open_draft_log
+from draft_optimizer.app.lineup import LINEUP_SLOTS
 from draft_optimizer.app.settings import save_settings
 
 
@@ -29,6 +31,13 @@ def display():
             pos_const = cols[i % 2].select_slider(pos, limit_options, (default_min[pos], default_max[pos]))
             pos_consts[pos] = (int(pos_const[0]), int(pos_const[1]))
 
+    # Specify lineup slots (starters per week)
+    lineup_slots = {}
+    with st.expander("Lineup Slots"):
+        cols = st.columns(len(LINEUP_SLOTS))
+        for col, (slot, default) in zip(cols, LINEUP_SLOTS.items()):
+            lineup_slots[slot] = int(col.number_input(slot, value=default, min_value=0, max_value=4))
+
     # Specify draft order
     with st.expander("Draft Order"):
         # Get default draft order (snake)
@@ -78,8 +87,11 @@ def display():
             "num_teams": num_teams,
             "roster_size": roster_size,
             "pos_consts": pos_consts,
+            "lineup_slots": lineup_slots,
             "draft_order": draft_order,
-            "draft_picks": [],
         }
         settings_file = f"{league_name}.json"
         save_settings(settings_file, settings)
+
+        # Start the draft over (the log keeps its history)
+        open_draft_log(settings_file, settings).rewind(0)
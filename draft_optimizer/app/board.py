@@ -0,0 +1,108 @@
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from draft_optimizer.app.table import PlayerTable
+
+# Specify key for all positions
+ALL_POSITIONS = "All"
+
+
+class DraftBoard:
+    """
+    Best-available rankings and pick options for a draft in progress, updated pick by pick.
+
+    Rows are ranked once (by points, overall and per position, and by display name). Picking or un-picking a player
+    only touches that player's entries, and rankings are read from the top, so syncing to a new draft state costs time
+    proportional to the picks that changed rather than to the player pool.
+    """
+
+    def __init__(self, table: PlayerTable):
+        # Rank rows by points (ties by row), overall and per position
+        self.table = table
+        num_players = table.num_players
+        rows = np.arange(num_players)
+        by_points = np.lexsort((rows, -table.sum_weeks))
+        self._orders: Dict[str, np.ndarray] = {ALL_POSITIONS: by_points}
+        for code, pos in enumerate(table.pos_keys):
+            self._orders[pos] = by_points[table.positions[by_points] == code]
+        self._ranks: Dict[str, np.ndarray] = {}
+        for key, order in self._orders.items():
+            self._ranks[key] = np.full(num_players, -1, dtype=np.int64)
+            self._ranks[key][order] = np.arange(len(order))
+        self._heads = {key: 0 for key in self._orders.keys()}  # ranks above these are all picked
+
+        # Keep pick options sorted by display name
+        self._display_ranks = np.empty(num_players, dtype=np.int64)
+        self._display_ranks[table.display_order] = rows
+        self._option_ranks: List[int] = list(range(num_players))
+        self._options: List[int] = table.display_order.tolist()
+
+        # Track picks
+        self.picks: List[int] = []
+        self.available = np.ones(num_players, dtype=bool)
+
+    def _pick(self, row: int):
+        self.available[row] = False
+        i = bisect_left(self._option_ranks, self._display_ranks[row])
+        del self._option_ranks[i]
+        del self._options[i]
+
+    def _unpick(self, row: int):
+        # Make the player available again, moving heads back above it if needed
+        self.available[row] = True
+        rank = int(self._display_ranks[row])
+        i = bisect_left(self._option_ranks, rank)
+        self._option_ranks.insert(i, rank)
+        self._options.insert(i, row)
+        for key in (ALL_POSITIONS, self.table.pos_keys[self.table.positions[row]]):
+            self._heads[key] = min(self._heads[key], int(self._ranks[key][row]))
+
+    def sync(self, draft_rows: Sequence[int]) -> Tuple[int, int]:
+        """
+        Match the board to a draft's picks (in order); returns `(num_undone, num_picked)`.
+
+        Picks after the first difference are undone (ex: going back to an earlier pick), then the new ones applied.
+        """
+        # Get the common prefix
+        draft_rows = [int(row) for row in draft_rows]
+        num_kept = 0
+        for row, draft_row in zip(self.picks, draft_rows):
+            if row != draft_row:
+                break
+            num_kept += 1
+
+        # Undo, then pick
+        num_undone = len(self.picks) - num_kept
+        for row in reversed(self.picks[num_kept:]):
+            self._unpick(row)
+        for row in draft_rows[num_kept:]:
+            self._pick(row)
+        self.picks = draft_rows
+
+        return num_undone, len(draft_rows) - num_kept
+
+    def top(self, pos: str = ALL_POSITIONS, n: int = 25) -> np.ndarray:
+        # Get the best available rows at a position, sorted; the head skips players picked off the top
+        order = self._orders.get(pos)
+        if order is None:
+            return np.zeros(0, dtype=np.int64)
+        start = self._heads[pos]
+        while start < len(order) and not self.available[order[start]]:
+            start += 1
+        self._heads[pos] = start
+
+        # Read down from the head
+        rows: List[int] = []
+        i = start
+        while i < len(order) and len(rows) < n:
+            if self.available[order[i]]:
+                rows.append(int(order[i]))
+            i += 1
+
+        return np.array(rows, dtype=np.int64)
+
+    def options(self) -> List[int]:
+        # Available rows sorted by display name (shared; don't modify)
+        return self._options
@@ -0,0 +1,157 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable, List, Mapping, Optional, Sequence
+
+from draft_optimizer.src.trace import count
+from draft_optimizer.src.utils import DATA_DIR
+
+# Specify cache directory
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+
+
+def draft_key(
+    digest: str,
+    num_players: int,
+    pos_consts: Mapping[str, Sequence[int]],
+    team: int,
+    team_picks: Iterable[int],
+    picked: Iterable[int],
+    backend: str,
+) -> str:
+    """
+    Hash a draft state: the player data, roster constraints, team, its picks, every pick made, and the solver backend.
+
+    Pick order doesn't matter, so going back to an earlier pick (or re-running a page) maps to the same key.
+    """
+    consts = sorted((pos, tuple(int(c) for c in consts)) for pos, consts in pos_consts.items())
+    state = (digest, int(num_players), consts, int(team), sorted(team_picks), sorted(picked), backend)
+
+    return hashlib.sha1(repr(state).encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Bounded LRU cache of solver results in memory, optionally backed by pickle files in `cache_dir`.
+
+    Results on disk survive restarts and are shared between processes; writes are atomic, so concurrent writers can't
+    leave partial files. The disk is bounded too: files are touched when read, and once there are more than
+    `max_disk_size`, the least recently used are removed (down to 90% of it).
+    """
+
+    def __init__(self, max_size: int = 1024, cache_dir: Optional[str] = None, max_disk_size: int = 16384):
+        # Save data
+        self.max_size = max_size
+        self.cache_dir = cache_dir
+        self.max_disk_size = max_disk_size
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        # Save entries (least recently used first) and counters
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        # Count files on disk; other processes may write too, so this is recounted when pruning
+        self._disk_size = len(self._disk_files())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(str(self.cache_dir), f"{key}.pkl")
+
+    def _disk_files(self) -> List[str]:
+        if self.cache_dir is None:
+            return []
+        return [os.path.join(self.cache_dir, file) for file in os.listdir(self.cache_dir) if file.endswith(".pkl")]
+
+    def _prune_disk(self):
+        # Remove the least recently used files (by modification time), leaving room so writes don't prune every time
+        num_keep = self.max_disk_size - self.max_disk_size // 10
+        files = []
+        for path in self._disk_files():
+            try:
+                files.append((os.path.getmtime(path), path))
+            except OSError:  # removed by another process
+                pass
+        files.sort()
+        for _, path in files[0 : max(0, len(files) - num_keep)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._disk_size = min(len(files), num_keep)
+        count("result_cache.prunes")
+
+    def _put_memory(self, key: str, value: Any):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        # Check memory
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                count("result_cache.hits")
+                return self._entries[key]
+
+        # Check disk
+        value = None
+        if self.cache_dir is not None:
+            try:
+                with open(self._path(key), "rb") as f:
+                    value = pickle.load(f)
+                os.utime(self._path(key))  # recently used
+            except (OSError, EOFError, pickle.UnpicklingError):
+                value = None
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._put_memory(key, value)
+        count("result_cache.misses" if value is None else "result_cache.hits")
+
+        return value
+
+    def put(self, key: str, value: Any):
+        # Save to memory
+        with self._lock:
+            self._put_memory(key, value)
+
+        # Save to disk
+        if self.cache_dir is not None:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self._path(key))
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return
+
+            # Maybe prune
+            with self._lock:
+                self._disk_size += 1
+                if self._disk_size > self.max_disk_size:
+                    self._prune_disk()
+
+    def clear(self, disk: bool = False):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+        if disk and self.cache_dir is not None:
+            for path in self._disk_files():
+                os.remove(path)
+            self._disk_size = 0
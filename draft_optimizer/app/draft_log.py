@@ -0,0 +1,193 @@
+import os
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from pydantic import BaseModel
+
+from draft_optimizer.app.settings import SETTINGS_DIR
+
+# Specify drafts directory (one log per settings file)
+DRAFTS_DIR = os.path.join(SETTINGS_DIR, "drafts")
+
+# Specify how long writers wait on each other (seconds)
+TIMEOUT = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    pick INTEGER NOT NULL,
+    player_id TEXT,
+    team INTEGER
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    pick INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    state TEXT NOT NULL
+);
+"""
+
+
+def draft_log_path(settings_file: str) -> str:
+    return os.path.join(DRAFTS_DIR, f"{os.path.splitext(settings_file)[0]}.sqlite")
+
+
+class DraftState(BaseModel):
+    """
+    A draft as of a pick: the picks made (player IDs, in order), each team's roster, and warm-starts (the last optimal
+    roster found for each team, if saved).
+    """
+
+    pick: int = 0
+    seq: int = 0  # last event applied
+    picks: List[str] = []
+    rosters: Dict[int, List[str]] = {}
+    warm_starts: Dict[int, List[str]] = {}
+
+    def next(self, player_id: str, team: int, seq: int) -> "DraftState":
+        rosters = {t: list(roster) for t, roster in self.rosters.items()}
+        rosters.setdefault(team, []).append(player_id)
+
+        return DraftState(pick=self.pick + 1, seq=seq, picks=self.picks + [player_id], rosters=rosters)
+
+
+class DraftLog:
+    """
+    Append-only log of a draft's picks in SQLite, with the derived state snapshotted after every pick.
+
+    Going to any pick reads one snapshot, and rewinding drops the snapshots after it (the events stay, so the log is a
+    full history). Writes are transactions that lock the database, so concurrent writers (sessions, live sync, other
+    processes) can't interleave or corrupt it; appends name the pick they follow and fail if the draft moved on.
+    """
+
+    def __init__(self, path: str, draft_order: Sequence[int]):
+        # Save data
+        self.path = path
+        self.draft_order = [int(team) for team in draft_order]
+
+        # Make tables; WAL lets readers proceed while a writer commits
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections are cheap and per-call, so logs are safe to share between threads
+        return sqlite3.connect(self.path, timeout=TIMEOUT, isolation_level=None)
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @staticmethod
+    def _read_state(conn: sqlite3.Connection, pick: Optional[int]) -> Optional[DraftState]:
+        if pick is None:
+            row = conn.execute("SELECT state FROM snapshots ORDER BY pick DESC LIMIT 1").fetchone()
+        else:
+            row = conn.execute("SELECT state FROM snapshots WHERE pick = ?", (pick,)).fetchone()
+        if row is None:
+            return DraftState() if pick in (None, 0) else None
+
+        return DraftState.parse_raw(row[0])
+
+    @staticmethod
+    def _write_state(conn: sqlite3.Connection, state: DraftState):
+        conn.execute(
+            "INSERT OR REPLACE INTO snapshots (pick, seq, state) VALUES (?, ?, ?)",
+            (state.pick, state.seq, state.json()),
+        )
+
+    def state(self, pick: Optional[int] = None) -> DraftState:
+        """
+        Get the draft as of a pick (the number of picks made), or as of the latest pick.
+        """
+        with closing(self._connect()) as conn:
+            state = self._read_state(conn, pick)
+        if state is None:
+            raise ValueError(f"Pick {pick} hasn't been made")
+
+        return state
+
+    def append(self, player_ids: Sequence[str], start: Optional[int] = None, rewind: bool = False) -> DraftState:
+        """
+        Append picks after pick `start` (default: the latest) and return the new latest state.
+
+        Raises `ValueError` if the draft is past `start` (ex: another session picked first), unless `rewind` is set, in
+        which case the picks after `start` are undone first.
+        """
+        with self._write() as conn:
+            # Check the draft hasn't moved on
+            state = self._read_state(conn, None)
+            assert state is not None
+            start = state.pick if start is None else start
+            if start > state.pick or (start < state.pick and not rewind):
+                raise ValueError(f"Expected to append after pick {start}, but the draft is at pick {state.pick}")
+
+            # Maybe rewind
+            ts = time.time()
+            if start < state.pick:
+                cursor = conn.execute("INSERT INTO events (ts, kind, pick) VALUES (?, 'rewind', ?)", (ts, start))
+                conn.execute("DELETE FROM snapshots WHERE pick > ?", (start,))
+                state = self._read_state(conn, start)
+                assert state is not None
+                state.seq = int(cursor.lastrowid or 0)
+
+            # Append
+            for player_id in player_ids:
+                team = self.draft_order[state.pick] if state.pick < len(self.draft_order) else -1
+                cursor = conn.execute(
+                    "INSERT INTO events (ts, kind, pick, player_id, team) VALUES (?, 'pick', ?, ?, ?)",
+                    (ts, state.pick, str(player_id), team),
+                )
+                state = state.next(str(player_id), team, int(cursor.lastrowid or 0))
+                self._write_state(conn, state)
+
+        return state
+
+    def rewind(self, pick: int) -> DraftState:
+        return self.append([], start=pick, rewind=True)
+
+    def save_warm_starts(self, pick: int, warm_starts: Dict[int, List[str]]):
+        # Attach rosters to a pick's snapshot, so solves after going back to it (or restarting) can warm-start
+        with self._write() as conn:
+            state = self._read_state(conn, pick)
+            if state is not None:
+                state.warm_starts = {int(team): list(roster) for team, roster in warm_starts.items()}
+                self._write_state(conn, state)
+
+    def is_empty(self) -> bool:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT 1 FROM events LIMIT 1").fetchone() is None
+
+    def events(self, since: int = 0) -> List[Dict[str, Any]]:
+        # Get the full history after event `since`, including rewound picks
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute("SELECT * FROM events WHERE seq > ? ORDER BY seq", (since,)).fetchall()
+
+        return [dict(row) for row in rows]
+
+
+def open_draft_log(settings_file: str, settings: Dict[str, Any]) -> DraftLog:
+    """
+    Open a settings file's draft log, importing picks saved in the settings (before drafts had logs) on first use.
+    """
+    log = DraftLog(draft_log_path(settings_file), settings["draft_order"])
+    legacy_picks = settings.get("draft_picks") or []
+    if len(legacy_picks) > 0 and log.is_empty():
+        try:
+            log.append(legacy_picks, start=0)
+        except ValueError:
+            pass  # imported by another session
+
+    return log
@@ -0,0 +1,206 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Specify tolerance for comparing points
+TOL = 1e-6
+
+
+def allowed_positions(counts: np.ndarray, min_pos: np.ndarray, max_pos: np.ndarray, num_remaining: int) -> np.ndarray:
+    # Positions that can take another player while leaving room to fill position minimums
+    unmet = np.maximum(min_pos - counts, 0).sum()
+    if unmet >= num_remaining:
+        return counts < min_pos
+    return counts < max_pos
+
+
+def greedy_fill(
+    points: np.ndarray,
+    pos_idx: np.ndarray,
+    min_pos: np.ndarray,
+    max_pos: np.ndarray,
+    num_players: int,
+    available: np.ndarray,
+    fixed: np.ndarray,
+) -> Optional[np.ndarray]:
+    """
+    Fill a roster around the fixed players, one slot at a time, with the player that most raises min weekly points.
+
+    `points` is weeks x players and `pos_idx` maps players to rows of `min_pos`/`max_pos`. Returns a boolean roster
+    mask, or `None` if the position limits can't be met.
+    """
+    # Start from the fixed players
+    roster = fixed.copy()
+    counts = np.bincount(pos_idx[roster], minlength=len(min_pos))
+    totals = points[:, roster].sum(axis=1, dtype=np.float64)
+    candidates = np.flatnonzero(available & ~fixed)
+    cand_points = points[:, candidates].astype(np.float64)
+    cand_sums = cand_points.sum(axis=0)
+    cand_pos = pos_idx[candidates]
+    open_cands = np.ones(len(candidates), dtype=bool)
+
+    # Fill one slot at a time (ties go to total points)
+    for num_remaining in range(num_players - roster.sum(), 0, -1):
+        ok = open_cands & allowed_positions(counts, min_pos, max_pos, num_remaining)[cand_pos]
+        if not ok.any():
+            return None
+        gain = np.where(ok, (totals[:, None] + cand_points).min(axis=0) + TOL * cand_sums, -np.inf)
+        best = np.argmax(gain)
+        roster[candidates[best]] = True
+        open_cands[best] = False
+        counts[cand_pos[best]] += 1
+        totals += cand_points[:, best]
+
+    # Validate
+    if np.any(counts < min_pos) or np.any(counts > max_pos):
+        return None
+
+    return roster
+
+
+def local_search(
+    points: np.ndarray,
+    pos_idx: np.ndarray,
+    min_pos: np.ndarray,
+    max_pos: np.ndarray,
+    roster: np.ndarray,
+    available: np.ndarray,
+    fixed: np.ndarray,
+    top_k: int = 30,
+    max_iters: int = 100,
+) -> np.ndarray:
+    """
+    Improve a roster with one-for-one swaps until no swap raises its min weekly points (or total points at equal min).
+
+    Swaps are drawn from the `top_k` most projected players left at each position.
+    """
+    # Get swap candidates
+    roster = roster.copy()
+    sums = points.sum(axis=0, dtype=np.float64)
+    candidates = np.flatnonzero(available & ~roster)
+    keep = np.zeros(len(candidates), dtype=bool)
+    for pos in np.unique(pos_idx[candidates]):
+        is_pos = np.flatnonzero(pos_idx[candidates] == pos)
+        keep[is_pos[np.argsort(-sums[candidates[is_pos]], kind="stable")[:top_k]]] = True
+    candidates = candidates[keep]
+
+    # Swap
+    counts = np.bincount(pos_idx[roster], minlength=len(min_pos))
+    totals = points[:, roster].sum(axis=1, dtype=np.float64)
+    for _ in range(max_iters):
+        # Get swappable pairs (out x in) that keep position limits
+        outs = np.flatnonzero(roster & ~fixed)
+        ins = candidates[~roster[candidates]]
+        if len(outs) == 0 or len(ins) == 0:
+            break
+        out_pos, in_pos = pos_idx[outs][:, None], pos_idx[ins][None, :]
+        same = out_pos == in_pos
+        ok = same | ((counts[out_pos] - 1 >= min_pos[out_pos]) & (counts[in_pos] + 1 <= max_pos[in_pos]))
+
+        # Score swaps
+        new_totals = totals[:, None, None] - points[:, outs][:, :, None] + points[:, ins][:, None, :]
+        new_min = np.where(ok, new_totals.min(axis=0), -np.inf)
+        new_sum = totals.sum() - sums[outs][:, None] + sums[ins][None, :]
+
+        # Find the best improving swap
+        cur_min, cur_sum = totals.min(), totals.sum()
+        best_min = new_min.max()
+        if best_min > cur_min + TOL:
+            i, j = np.unravel_index(np.argmax(new_min), new_min.shape)
+        else:
+            new_sum = np.where(new_min >= cur_min - TOL, new_sum, -np.inf)
+            i, j = np.unravel_index(np.argmax(new_sum), new_sum.shape)
+            if new_sum[i, j] <= cur_sum + TOL:
+                break
+
+        # Apply
+        roster[outs[i]], roster[ins[j]] = False, True
+        counts[pos_idx[outs[i]]] -= 1
+        counts[pos_idx[ins[j]]] += 1
+        totals += points[:, ins[j]] - points[:, outs[i]]
+
+    return roster
+
+
+def week_bounds(
+    points: np.ndarray,
+    pos_idx: np.ndarray,
+    max_pos: np.ndarray,
+    num_players: int,
+    available: np.ndarray,
+    fixed: np.ndarray,
+) -> np.ndarray:
+    """
+    Upper bounds on each week's points: the week's best roster on its own (ignoring position minimums).
+
+    `points` is weeks x players, optionally with leading dimensions (ex: samples x weeks x players); bounds have the
+    same shape without the players dimension. Each week is solved exactly by taking the top players left under the
+    position maximums.
+    """
+    # Get capacities
+    counts = np.bincount(pos_idx[fixed], minlength=len(max_pos))
+    capacity = np.maximum(max_pos - counts, 0)
+    num_remaining = num_players - fixed.sum()
+    totals = points[..., fixed].sum(axis=-1, dtype=np.float64)
+    if num_remaining <= 0:
+        return totals
+
+    # Get each position's top players by week
+    candidates = available & ~fixed
+    tops = []
+    for pos in range(len(max_pos)):
+        num_keep = int(min(capacity[pos], num_remaining))
+        if num_keep == 0:
+            continue
+        pos_points = points[..., candidates & (pos_idx == pos)]
+        if pos_points.shape[-1] > num_keep:
+            pos_points = -np.partition(-pos_points, num_keep - 1, axis=-1)[..., :num_keep]
+        tops.append(pos_points)
+    if len(tops) == 0:
+        return np.full(totals.shape, -np.inf)
+    top = np.concatenate(tops, axis=-1)
+    if top.shape[-1] < num_remaining:
+        return np.full(totals.shape, -np.inf)
+    if top.shape[-1] > num_remaining:
+        top = -np.partition(-top, num_remaining - 1, axis=-1)[..., :num_remaining]
+
+    return totals + top.sum(axis=-1, dtype=np.float64)
+
+
+def weekly_bound(
+    points: np.ndarray,
+    pos_idx: np.ndarray,
+    max_pos: np.ndarray,
+    num_players: int,
+    available: np.ndarray,
+    fixed: np.ndarray,
+) -> float:
+    """
+    Upper bound on the best min weekly points: the min over weeks of each week's best roster on its own.
+    """
+    return float(week_bounds(points, pos_idx, max_pos, num_players, available, fixed).min())
+
+
+def solve_greedy(
+    points: np.ndarray,
+    pos_idx: np.ndarray,
+    min_pos: np.ndarray,
+    max_pos: np.ndarray,
+    num_players: int,
+    available: np.ndarray,
+    fixed: np.ndarray,
+) -> Tuple[Optional[np.ndarray], float, float]:
+    """
+    Greedy fill followed by local search; returns `(roster, value, bound)`.
+    """
+    # Get bound
+    bound = weekly_bound(points, pos_idx, max_pos, num_players, available, fixed)
+
+    # Solve
+    roster = greedy_fill(points, pos_idx, min_pos, max_pos, num_players, available, fixed)
+    if roster is None:
+        return None, -np.inf, bound
+    roster = local_search(points, pos_idx, min_pos, max_pos, roster, available, fixed)
+    value = float(points[:, roster].sum(axis=1, dtype=np.float64).min())
+
+    return roster, value, bound
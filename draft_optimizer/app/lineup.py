@@ -0,0 +1,341 @@
+import hashlib
+import time
+import warnings
+from typing import Mapping, Optional, Tuple
+
+import cvxpy as cp
+import numpy as np
+
+from draft_optimizer.app.heuristic import TOL, allowed_positions
+from draft_optimizer.app.optimize import GAP_TOL, SOLVER, OptimizerContext, RosterResult, RosterSolver
+from draft_optimizer.app.table import PlayerTable
+from draft_optimizer.src.models import ProSchedule
+
+# Specify default lineup slots (starters per week); a FLEX slot takes one more player at any of `FLEX_POSITIONS`
+LINEUP_SLOTS = {"QB": 1, "RB": 2, "WR": 2, "TE": 1, "FLEX": 1, "K": 1, "D/ST": 1}
+FLEX = "FLEX"
+FLEX_POSITIONS = ["RB", "WR", "TE"]
+
+# Specify candidates per position (on top of each week's best starters)
+TOP_K = 12
+
+
+def availability(table: PlayerTable, schedule: ProSchedule, team_ids: Mapping[str, int]) -> np.ndarray:
+    """
+    Weeks x players mask of whether each player's pro team plays that week (`False` on byes).
+
+    `team_ids` maps the table's pro team abbreviations to the schedule's team IDs. Players on other teams (ex: free
+    agents) and weeks past the schedule are left available, so their projections alone decide.
+    """
+    # Map players to schedule rows
+    team_idx = np.array([team_ids.get(str(team), -1) for team in table.pro_teams], dtype=np.int64)
+    team_idx[team_idx >= len(schedule.opponents)] = -1
+    weeks = np.array([int(week[len("week") :]) for week in table.weeks], dtype=np.int64)
+    scheduled = weeks < schedule.opponents.shape[1]
+
+    # Look up games
+    available = np.ones((len(weeks), table.num_players), dtype=bool)
+    known = np.flatnonzero(team_idx >= 0)
+    games = schedule.opponents[team_idx[known][None, :], np.where(scheduled, weeks, 0)[:, None]] >= 0
+    available[:, known] = games | ~scheduled[:, None]
+
+    return available
+
+
+class LineupSlots:
+    """
+    Lineup slots mapped onto a context's positions (see `OptimizerContext.pos_limits`).
+
+    Slots at positions without roster limits are ignored, since those players share one unlimited position.
+    """
+
+    def __init__(self, context: OptimizerContext, slots: Mapping[str, int]):
+        pos_keys = list(context.min_pos_const.keys())
+        self.slots = np.array([int(slots.get(pos, 0)) for pos in pos_keys] + [0])
+        self.is_flex = np.array([pos in FLEX_POSITIONS for pos in pos_keys] + [False])
+        self.num_flex = int(slots.get(FLEX, 0)) if self.is_flex.any() else 0
+        self.max_starters = self.slots + self.num_flex * self.is_flex  # starters at each position, at most
+
+    def weekly_points(self, points: np.ndarray, available: np.ndarray, pos_idx: np.ndarray) -> np.ndarray:
+        """
+        Each week's best lineup points from a set of players; `points` and `available` are weeks x those players,
+        optionally with leading dimensions (ex: rosters x weeks x players).
+
+        Filling each position's slots with its best players and then the FLEX slots with the best left over is
+        optimal. Players on byes and negative points don't start.
+        """
+        points = np.where(available, np.maximum(points, 0), 0)
+        totals = np.zeros(points.shape[:-1])
+        leftovers = [np.zeros(points.shape[:-1] + (0,))]
+        for pos in np.flatnonzero(self.max_starters > 0):
+            # Get the position's best players each week
+            pos_points = points[..., pos_idx == pos]
+            num_top = int(self.max_starters[pos])
+            if pos_points.shape[-1] > num_top:
+                pos_points = np.partition(pos_points, pos_points.shape[-1] - num_top, axis=-1)[..., -num_top:]
+            pos_points = -np.sort(-pos_points, axis=-1)
+
+            # Start them, keeping the rest for FLEX
+            totals += pos_points[..., 0 : self.slots[pos]].sum(axis=-1)
+            if self.is_flex[pos]:
+                leftovers.append(pos_points[..., self.slots[pos] :])
+        leftover = np.concatenate(leftovers, axis=-1)
+        if self.num_flex > 0 and leftover.shape[-1] > 0:
+            totals += -np.sort(-leftover, axis=-1)[..., 0 : self.num_flex].sum(axis=-1)
+
+        return totals
+
+
+def lineup_candidates(
+    points: np.ndarray,
+    available_weeks: np.ndarray,
+    pos_idx: np.ndarray,
+    max_starters: np.ndarray,
+    available: np.ndarray,
+    top_k: int,
+) -> np.ndarray:
+    # Get the `top_k` most projected players left at each position, plus each week's best starters
+    points = np.where(available_weeks, points, 0)
+    sums = points.sum(axis=0)
+    keep = np.zeros(len(available), dtype=bool)
+    for pos in np.unique(pos_idx[available]):
+        rows = np.flatnonzero(available & (pos_idx == pos))
+        keep[rows[np.argsort(-sums[rows], kind="stable")[:top_k]]] = True
+        num_top = int(max_starters[pos])
+        if 0 < num_top < len(rows):
+            week_top = np.argpartition(-points[:, rows], num_top - 1, axis=1)[:, 0:num_top]
+            keep[rows[week_top.ravel()]] = True
+
+    return keep
+
+
+def lineup_search(
+    slots: LineupSlots,
+    points: np.ndarray,
+    available_weeks: np.ndarray,
+    pos_idx: np.ndarray,
+    min_pos: np.ndarray,
+    max_pos: np.ndarray,
+    num_players: int,
+    fixed: np.ndarray,
+    max_iters: int = 100,
+) -> Optional[np.ndarray]:
+    """
+    Greedy fill followed by one-for-one swaps, scoring rosters by min weekly lineup points (ties by total lineup
+    points); arrays are over candidates, like `solve_stochastic`. Returns a boolean roster mask, or `None` if the
+    position limits can't be met.
+    """
+
+    def score(rosters: np.ndarray) -> np.ndarray:
+        # Score rosters (boolean masks, rosters x candidates) all at once
+        weekly = slots.weekly_points(points, available_weeks & rosters[:, None, :], pos_idx)
+        return weekly.min(axis=-1) + TOL * weekly.sum(axis=-1)
+
+    # Fill one slot at a time
+    in_roster = fixed.copy()
+    counts = np.bincount(pos_idx[in_roster], minlength=len(min_pos))
+    for num_remaining in range(num_players - int(in_roster.sum()), 0, -1):
+        ok = np.flatnonzero(~in_roster & allowed_positions(counts, min_pos, max_pos, num_remaining)[pos_idx])
+        if len(ok) == 0:
+            return None
+        rosters = np.repeat(in_roster[None, :], len(ok), axis=0)
+        rosters[np.arange(len(ok)), ok] = True
+        best = ok[np.argmax(score(rosters))]
+        in_roster[best] = True
+        counts[pos_idx[best]] += 1
+    if np.any(counts < min_pos) or np.any(counts > max_pos):
+        return None
+
+    # Swap while it helps
+    value = float(score(in_roster[None, :])[0])
+    for _ in range(max_iters):
+        best_value, best_swap = value + TOL, None
+        ins = np.flatnonzero(~in_roster)
+        for out in np.flatnonzero(in_roster & ~fixed):
+            # Get swaps that keep position limits
+            out_pos, in_pos = pos_idx[out], pos_idx[ins]
+            ok = (in_pos == out_pos) | (
+                (counts[out_pos] - 1 >= min_pos[out_pos]) & (counts[in_pos] + 1 <= max_pos[in_pos])
+            )
+            if not ok.any():
+                continue
+
+            # Score them
+            rosters = np.repeat(in_roster[None, :], ok.sum(), axis=0)
+            rosters[:, out] = False
+            rosters[np.arange(ok.sum()), ins[ok]] = True
+            scores = score(rosters)
+            j = int(np.argmax(scores))
+            if scores[j] > best_value:
+                best_value, best_swap = float(scores[j]), (out, ins[ok][j])
+        if best_swap is None:
+            break
+
+        # Apply
+        out, new = best_swap
+        in_roster[out], in_roster[new] = False, True
+        counts[pos_idx[out]] -= 1
+        counts[pos_idx[new]] += 1
+        value = best_value
+
+    return in_roster
+
+
+class LineupSolver(RosterSolver):
+    """
+    Rosters that maximize min weekly points of the starting lineup, rather than of every rostered player.
+
+    Each week starts the best available players in the lineup slots (byes come from the `availability` mask), so bench
+    players only count when they cover a bye or beat a starter. The problem is a MILP over a roster and continuous
+    weekly starters in position and FLEX slots; for a fixed roster, filling the slots is a flow problem, so the
+    starters are integral. It's built per solve over candidates (see
+    `lineup_candidates`), which keeps it to a few hundred binaries; values and bounds are exact lineup points, the
+    bound being each week's best lineup over all available players.
+    """
+
+    name = "lineup"
+
+    def __init__(
+        self,
+        context: OptimizerContext,
+        available_weeks: Optional[np.ndarray] = None,
+        slots: Optional[Mapping[str, int]] = None,
+        solver: Optional[str] = None,
+        top_k: int = TOP_K,
+        exact: bool = True,
+    ):
+        # Call super
+        super().__init__(context)
+
+        # Save data
+        table = context.table
+        if available_weeks is None:
+            available_weeks = np.ones(table.points.shape, dtype=bool)
+        if available_weeks.shape != table.points.shape:
+            raise ValueError("Availability doesn't match the player table")
+        self.available_weeks = np.asarray(available_weeks, dtype=bool)
+        self.slot_consts = dict(LINEUP_SLOTS if slots is None else slots)
+        self.slots = LineupSlots(context, self.slot_consts)
+        self.solver = SOLVER if solver is None else solver
+        self.top_k = top_k
+        self.exact = exact
+        self.pos_idx, self.min_pos, self.max_pos = context.pos_limits()
+
+        # Hash settings and availability
+        hasher = hashlib.sha1(str(sorted(self.slot_consts.items())).encode())
+        hasher.update(np.packbits(self.available_weeks).tobytes())
+        self.digest = f"{hasher.hexdigest()}:{top_k}:{exact}"
+
+    @property
+    def cache_id(self) -> str:
+        return f"{self.name}:{self.digest}"
+
+    def weekly_points(self, roster: np.ndarray) -> np.ndarray:
+        # Each week's best lineup points from a roster (boolean mask)
+        points = self.context.table.points[:, roster]
+        return self.slots.weekly_points(points, self.available_weeks[:, roster], self.pos_idx[roster])
+
+    def _problem(self, candidates: np.ndarray, lower: np.ndarray) -> Tuple[cp.Problem, cp.Variable]:
+        # Get data
+        points = self.context.table.points[:, candidates].astype(np.float64)
+        pos_idx = self.pos_idx[candidates]
+        can_start = self.available_weeks[:, candidates] & (self.slots.max_starters[pos_idx] > 0)[None, :]
+        num_weeks, num_cands = points.shape
+
+        # Roster and weekly starters, in position slots and in FLEX slots
+        roster = cp.Variable(num_cands, boolean=True)
+        starters = cp.Variable((num_weeks, num_cands), nonneg=True)
+        flex_starters = cp.Variable((num_weeks, num_cands), nonneg=True)
+
+        # Roster constraints
+        is_pos = (pos_idx[None, :] == np.arange(len(self.min_pos))[:, None]).astype(float)
+        constraints = [
+            cp.sum(roster) == self.context.num_players,
+            is_pos @ roster >= self.min_pos,
+            is_pos @ roster <= self.max_pos,
+            roster >= lower[candidates].astype(float),
+        ]
+
+        # Start rostered players with games once a week, up to each position's slots and the FLEX slots
+        rostered = cp.vstack([roster] * num_weeks)
+        constraints.append(starters + flex_starters <= cp.multiply(can_start.astype(float), rostered))
+        for pos in np.flatnonzero(self.slots.slots > 0):
+            constraints.append(starters @ is_pos[pos] <= self.slots.slots[pos])
+        is_flex = self.slots.is_flex[pos_idx]
+        constraints.append(flex_starters[:, ~is_flex] == 0)
+        constraints.append(cp.sum(flex_starters, axis=1) <= self.slots.num_flex)
+
+        # Maximize min weekly lineup points
+        objective = cp.Maximize(cp.min(cp.sum(cp.multiply(points, starters + flex_starters), axis=1)))
+
+        return cp.Problem(objective, constraints), roster
+
+    def solve(
+        self,
+        upper: np.ndarray,
+        lower: np.ndarray,
+        warm_start: Optional[np.ndarray] = None,
+        time_limit: Optional[float] = None,
+    ) -> RosterResult:
+        # Get bound
+        start = time.perf_counter()
+        bound = float(self.weekly_points(upper).min())
+
+        # Get candidates
+        keep = lineup_candidates(
+            self.context.table.points,
+            self.available_weeks,
+            self.pos_idx,
+            self.slots.max_starters,
+            upper & ~lower,
+            self.top_k,
+        )
+        keep |= lower
+        if warm_start is not None:
+            keep |= warm_start & upper
+        candidates = np.flatnonzero(keep)
+
+        # Search
+        cand_fixed = lower[candidates]
+        pos_limits = (self.pos_idx[candidates], self.min_pos, self.max_pos, self.context.num_players)
+        points = self.context.table.points[:, candidates]
+        available_weeks = self.available_weeks[:, candidates]
+        in_roster = lineup_search(self.slots, points, available_weeks, *pos_limits, cand_fixed)
+        roster = None
+        value = -np.inf
+        status = "infeasible"
+        if in_roster is not None:
+            roster = self.context.table.mask(candidates[in_roster])
+            value = float(self.weekly_points(roster).min())
+            status = "feasible"
+
+        # Maybe solve exactly over the candidates, within the time left (stopped solves return their incumbent)
+        time_left = None if time_limit is None else time_limit - (time.perf_counter() - start)
+        exact = self.exact and (time_left is None or time_left > 0)
+        if exact and (roster is None or max(bound - value, 0.0) / max(abs(bound), GAP_TOL) > GAP_TOL):
+            problem, roster_var = self._problem(candidates, lower)
+            options = {}
+            if time_left is not None and self.solver == cp.GLPK_MI:
+                options["tm_lim"] = max(1, int(1000 * time_left))
+            try:
+                with warnings.catch_warnings():
+                    warnings.filterwarnings("ignore", message="Solution may be inaccurate")  # stopped early
+                    problem.solve(solver=self.solver, **options)
+                status = str(problem.status)
+                if roster_var.value is not None:
+                    exact_roster = self.context.table.mask(candidates[roster_var.value > 0.5])
+                    exact_value = float(self.weekly_points(exact_roster).min())
+                    if exact_value >= value:
+                        roster, value = exact_roster, exact_value
+            except cp.SolverError:
+                status = "solver_error"
+
+        # Get result
+        result = RosterResult(
+            roster=roster, value=value, bound=bound, backend=self.name, solve_time=time.perf_counter() - start
+        )
+        if roster is not None and result.gap <= GAP_TOL:
+            status = "optimal"
+        self._trace(result, upper, lower, status)
+
+        return result
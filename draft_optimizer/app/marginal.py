@@ -0,0 +1,359 @@
+import time
+from typing import Dict, Optional, Set, Tuple
+
+import cvxpy as cp
+import numpy as np
+
+from draft_optimizer.app.heuristic import allowed_positions
+from draft_optimizer.app.optimize import (
+    BACKENDS,
+    GAP_TOL,
+    OptimizerContext,
+    RosterOptimizer,
+    RosterResult,
+    cacheable,
+    poss_opt_picks,
+)
+from draft_optimizer.app.table import ArrayModel
+from draft_optimizer.src.trace import record
+
+# Specify the LP solver for relaxations (HiGHS through SciPy, which cvxpy requires; much faster than GLPK here)
+LP_SOLVER = cp.SCIPY
+
+# Specify how many players get exact re-solves per scoring
+NUM_EXACT = 8
+MAX_ELEMENTS = 4_000_000  # outs x players x weeks scored at once
+
+
+class RosterRelaxation:
+    """
+    LP relaxation of the roster problem (players can be picked fractionally), built once like `MILPSolver`.
+
+    Its duals price the problem's constraints: weights on weeks (summing to 1) and prices on position minimums and
+    maximums. Any such prices give an upper bound on the roster problem with a player forced on (see `forced_bounds`),
+    so inexact duals only loosen the bounds.
+    """
+
+    def __init__(self, context: OptimizerContext, solver: Optional[str] = None):
+        # Save data
+        self.context = context
+        self.solver = LP_SOLVER if solver is None else solver
+        self.pos_idx, self.min_pos, self.max_pos = context.pos_limits()
+        table = context.table
+        num_all = table.num_players
+
+        # Make variables and bounds
+        self.roster = cp.Variable(num_all)
+        self.min_points = cp.Variable()
+        self.upper = cp.Parameter(num_all, nonneg=True)
+        self.lower = cp.Parameter(num_all, nonneg=True)
+
+        # Define constraints; the priced ones are saved for their duals
+        is_pos = (self.pos_idx[None, :] == np.arange(len(self.min_pos))[:, None]).astype(float)
+        self.weekly = table.points.astype(np.float64) @ self.roster >= self.min_points
+        self.pos_min = is_pos @ self.roster >= self.min_pos
+        self.pos_max = is_pos @ self.roster <= self.max_pos
+        constraints = [
+            cp.sum(self.roster) == context.num_players,
+            self.weekly,
+            self.pos_min,
+            self.pos_max,
+            self.roster <= self.upper,
+            self.roster >= self.lower,
+        ]
+
+        # Save problem
+        self.problem = cp.Problem(cp.Maximize(self.min_points), constraints)
+
+    def solve(self, upper: np.ndarray, lower: np.ndarray) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Solve for the relaxation's prices; returns `(week_weights, min_prices, max_prices)`, or `None` if it failed.
+        """
+        # Update parameters and solve
+        self.upper.value = upper.astype(float)
+        self.lower.value = lower.astype(float)
+        try:
+            self.problem.solve(solver=self.solver)
+        except cp.SolverError:
+            return None
+        if self.problem.status != cp.OPTIMAL:
+            return None
+
+        # Get prices (clipped, so they stay valid multipliers)
+        weights = np.maximum(np.asarray(self.weekly.dual_value, dtype=np.float64).ravel(), 0)
+        if weights.sum() <= 0:
+            return None
+        weights /= weights.sum()
+        min_prices = np.maximum(np.asarray(self.pos_min.dual_value, dtype=np.float64).ravel(), 0)
+        max_prices = np.maximum(np.asarray(self.pos_max.dual_value, dtype=np.float64).ravel(), 0)
+
+        return weights, min_prices, max_prices
+
+
+def forced_bounds(
+    points: np.ndarray,
+    pos_idx: np.ndarray,
+    min_pos: np.ndarray,
+    max_pos: np.ndarray,
+    num_players: int,
+    available: np.ndarray,
+    fixed: np.ndarray,
+    week_weights: np.ndarray,
+    min_prices: np.ndarray,
+    max_prices: np.ndarray,
+) -> np.ndarray:
+    """
+    Upper bounds on min weekly points with each available player forced onto the roster, from Lagrangian prices.
+
+    Weighting weeks and pricing position limits turns any roster's min weekly points into at most a constant plus
+    the sum of its players' reduced values, which is maximized by the fixed players, the forced player, and the top
+    reduced values left. Returns bounds by row; -inf for players that aren't available or don't fit.
+    """
+    # Get reduced values
+    reduced = week_weights @ points.astype(np.float64) - max_prices[pos_idx] + min_prices[pos_idx]
+    const = float(max_prices @ max_pos - min_prices @ min_pos) + reduced[fixed].sum()
+    bounds = np.full(len(reduced), -np.inf)
+
+    # Fill the roster's other slots with the top reduced values (skipping the forced player)
+    free = np.flatnonzero(available & ~fixed)
+    num_other = num_players - int(fixed.sum()) - 1
+    if num_other < 0 or num_other + 1 > len(free):
+        return bounds
+    top = -np.partition(-reduced[free], num_other)[: num_other + 1] if num_other + 1 < len(free) else reduced[free]
+    top = np.sort(top)[::-1]
+    sum_other, sum_all = top[:num_other].sum(), top.sum()
+    bounds[free] = const + np.minimum(sum_all, sum_other + reduced[free])
+
+    # Players at positions that can't take another player don't fit
+    counts = np.bincount(pos_idx[fixed], minlength=len(max_pos))
+    allowed = allowed_positions(counts, min_pos, max_pos, num_other + 1)
+    bounds[free[~allowed[pos_idx[free]]]] = -np.inf
+
+    return bounds
+
+
+def swap_values(
+    points: np.ndarray,
+    pos_idx: np.ndarray,
+    min_pos: np.ndarray,
+    max_pos: np.ndarray,
+    roster: np.ndarray,
+    fixed: np.ndarray,
+    rows: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Min weekly points of the best one-for-one swap that puts each player (row) onto a roster; players already on it
+    keep the roster. Returns `(values, outs)`, with the row swapped out for each player (-1 if none is needed or none
+    keeps position limits, in which case the value is -inf).
+    """
+    # Get swappable players
+    rows = np.asarray(rows, dtype=np.int64)
+    outs = np.flatnonzero(roster & ~fixed)
+    counts = np.bincount(pos_idx[roster], minlength=len(min_pos))
+    totals = points[:, roster].sum(axis=1, dtype=np.float64)
+    values = np.full(len(rows), -np.inf)
+    best_outs = np.full(len(rows), -1)
+    on_roster = roster[rows]
+    values[on_roster] = totals.min()
+    ins = np.flatnonzero(~on_roster)
+    if len(outs) == 0 or len(ins) == 0:
+        return values, best_outs
+
+    # Score swaps (outs x ins), in batches of players
+    out_pos = pos_idx[outs][:, None]
+    out_points = points[:, outs].astype(np.float64)
+    batch_size = max(MAX_ELEMENTS // (len(outs) * len(totals)), 1)
+    for start in range(0, len(ins), batch_size):
+        batch = ins[start : start + batch_size]
+        in_rows = rows[batch]
+        in_pos = pos_idx[in_rows][None, :]
+        ok = (out_pos == in_pos) | ((counts[out_pos] - 1 >= min_pos[out_pos]) & (counts[in_pos] + 1 <= max_pos[in_pos]))
+        new_totals = totals[:, None, None] - out_points[:, :, None] + points[:, in_rows][:, None, :]
+        new_min = np.where(ok, new_totals.min(axis=0), -np.inf)
+        best = np.argmax(new_min, axis=0)
+        values[batch] = new_min[best, np.arange(len(batch))]
+        best_outs[batch] = np.where(np.isfinite(values[batch]), outs[best], -1)
+
+    return values, best_outs
+
+
+class MarginalValues(ArrayModel):
+    """
+    Best min weekly points with each available player forced onto a team's roster, next to its optimal roster.
+
+    `value` is the best roster found with each player and `bound` an upper bound on it; players are `exact` where
+    they meet. Both are indexed by row and -inf for players that weren't scored.
+    """
+
+    base: RosterResult
+    value: np.ndarray
+    bound: np.ndarray
+    exact: np.ndarray
+    num_solved: int = 0
+    solve_time: float = 0.0
+
+    def delta(self, rows: np.ndarray) -> np.ndarray:
+        # Change in min weekly points from drafting each player instead of following the optimal roster
+        return self.value[rows] - self.base.value
+
+    def delta_bound(self, rows: np.ndarray) -> np.ndarray:
+        # Best possible change
+        return self.bound[rows] - self.base.value
+
+
+class MarginalScorer:
+    """
+    Scores every available player by how much forcing them onto a team's roster changes the optimizer's min weekly
+    points, without a full solve per player.
+
+    One LP relaxation bounds every player at once (`forced_bounds`), and swapping each player into the team's optimal
+    roster gives a roster that's feasible with them (`swap_values`). Players whose bound can't reach the
+    `num_exact`-th best value found are screened out; the rest with the highest bounds, up to `num_exact`, are
+    re-solved exactly in parallel with the optimizer. Re-solves are cached as the draft state after picking the
+    player, so they're reused if the pick is made.
+    """
+
+    def __init__(self, optimizer: RosterOptimizer, solver: Optional[str] = None):
+        # Save data
+        self.optimizer = optimizer
+        self.context = optimizer.context
+        self.relaxation = RosterRelaxation(optimizer.context, solver)
+        self.pos_idx, self.min_pos, self.max_pos = optimizer.context.pos_limits()
+
+    def score(
+        self,
+        team: int,
+        picks_idx: Dict[int, Set[int]],
+        picked_idx: Set[int],
+        num_exact: int = NUM_EXACT,
+        max_workers: Optional[int] = None,
+        backend: Optional[str] = None,
+        time_budget: Optional[float] = None,
+    ) -> MarginalValues:
+        """
+        Score available players for a team; `backend` must optimize min weekly points (one of `BACKENDS`).
+        """
+        # Get settings
+        optimizer = self.optimizer
+        backend = optimizer.backend if backend is None else backend
+        if backend not in BACKENDS:
+            raise ValueError(f"Invalid backend: {backend}")
+
+        # Solve for the team's optimal roster
+        start = time.perf_counter()
+        base = poss_opt_picks(optimizer, team, picks_idx, picked_idx, backend=backend, time_budget=time_budget)
+        available, team_fixed = self.context.masks({team: picks_idx[team]}, picked_idx)
+        fixed = team_fixed[team]
+        free = available & ~fixed
+        rows = np.flatnonzero(free)
+
+        # Bound every player from the relaxation's prices; forcing a player on can't beat the optimal roster either
+        points = self.context.table.points
+        bound = np.full(len(free), -np.inf)
+        bound[rows] = base.bound
+        prices = self.relaxation.solve(available | fixed, fixed)
+        if prices is not None:
+            bounds = forced_bounds(
+                points, self.pos_idx, self.min_pos, self.max_pos, self.context.num_players, available, fixed, *prices
+            )
+            bound[rows] = np.minimum(bound[rows], bounds[rows])
+
+        # Find a roster with every player by swapping them into the optimal roster
+        value = np.full(len(free), -np.inf)
+        warm_starts: Dict[int, np.ndarray] = {}
+        if base.roster is not None:
+            value[rows], outs = swap_values(points, self.pos_idx, self.min_pos, self.max_pos, base.roster, fixed, rows)
+            for row, out in zip(rows.tolist(), outs.tolist()):
+                if out >= 0:
+                    warm_starts[row] = base.roster.copy()
+                    warm_starts[row][[out, row]] = False, True
+
+        # Shortlist unproven players that could rank in the top `num_exact` of them (ex: off the optimal roster)
+        exact = _proven(value, bound)
+        open_rows = rows[~exact[rows]]
+        if len(open_rows) > num_exact:
+            threshold = -np.partition(-value[open_rows], num_exact - 1)[num_exact - 1]
+            open_rows = open_rows[bound[open_rows] > threshold]
+        shortlist = open_rows[np.argsort(-bound[open_rows], kind="stable")[:num_exact]]
+
+        # Re-solve the shortlist (cached as the draft state after the pick)
+        results = self._solve(team, picks_idx, picked_idx, shortlist, warm_starts, max_workers, backend, time_budget)
+        for row, result in results.items():
+            if result.roster is not None:
+                value[row] = max(value[row], result.value)
+            bound[row] = min(bound[row], max(result.bound, value[row]))
+        exact = _proven(value, bound)
+        marginals = MarginalValues(
+            base=base,
+            value=value,
+            bound=bound,
+            exact=exact,
+            num_solved=len(results),
+            solve_time=time.perf_counter() - start,
+        )
+        record(
+            "marginal.score",
+            1000 * marginals.solve_time,
+            players=len(rows),
+            solved=len(results),
+            exact=int(exact.sum()),
+            backend=backend,
+        )
+
+        return marginals
+
+    def _solve(
+        self,
+        team: int,
+        picks_idx: Dict[int, Set[int]],
+        picked_idx: Set[int],
+        rows: np.ndarray,
+        warm_starts: Dict[int, np.ndarray],
+        max_workers: Optional[int],
+        backend: str,
+        time_budget: Optional[float],
+    ) -> Dict[int, RosterResult]:
+        # Maybe get cached results
+        optimizer = self.optimizer
+        cache = optimizer.cache
+        results: Dict[int, RosterResult] = {}
+        keys: Dict[int, str] = {}
+        for row in rows.tolist():
+            if cache is not None:
+                keys[row] = optimizer.cache_key(team, picks_idx[team] | {row}, picked_idx | {row}, backend)
+                cached = cache.get(keys[row])
+                if cached is not None:
+                    results[row] = cached
+        to_solve = [row for row in rows.tolist() if row not in results]
+        if len(to_solve) == 0:
+            return results
+
+        # Solve in parallel, warm-starting each player's key from its swap roster (sent along to worker processes)
+        available, fixed = self.context.masks({team: picks_idx[team]}, picked_idx)
+        forced = {}
+        for row in to_solve:
+            forced[(team, row)] = fixed[team] | self.context.table.mask([row])
+            if row in warm_starts:
+                optimizer.set_warm_start((team, row), warm_starts[row])
+        try:
+            solved = optimizer.solve_teams(
+                available, forced, max_workers=max_workers, backend=backend, time_budget=time_budget
+            )
+        finally:
+            optimizer.forget(forced.keys())  # one-off keys; results are kept in the cache instead
+
+        # Maybe cache
+        for (_, row), result in solved.items():
+            results[row] = result
+            if cache is not None and cacheable(result, backend):
+                cache.put(keys[row], result)
+
+        return results
+
+
+def _proven(value: np.ndarray, bound: np.ndarray) -> np.ndarray:
+    # Values within the optimality gap tolerance of their bounds (like `RosterResult.gap`)
+    with np.errstate(invalid="ignore"):
+        gap = np.maximum(bound - value, 0) / np.maximum(np.abs(bound), GAP_TOL)
+
+    return np.isfinite(value) & (gap <= GAP_TOL)
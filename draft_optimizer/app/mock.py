@@ -0,0 +1,377 @@
+"""
+Run mock drafts headlessly over league settings, with the optimizer drafting for selected teams.
+
+Each settings file (the JSON the settings page saves) is a league; its players are the production players CSV for its
+year and points mode. Drafts are split into chunks that run across a process pool, and every finished chunk is written
+to the output directory as a columnar shard, so an interrupted sweep resumes where it stopped. Once every chunk is in,
+the shards are combined into `results.npz` (one row per team per draft; see `load_results`). Run from the repo root:
+
+    python -m draft_optimizer.app.mock settings/my_league.json --teams 1 --num-drafts 2000 --output sweeps/my_league
+    python -m draft_optimizer.app.mock settings/*.json --each-team --backend auto --output sweeps/all
+"""
+
+import argparse
+import glob
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from draft_optimizer.app.heuristic import allowed_positions
+from draft_optimizer.app.optimize import BACKENDS, OptimizerContext, RosterOptimizer
+from draft_optimizer.app.settings import load_settings
+from draft_optimizer.app.survival import NOISE
+from draft_optimizer.app.table import PlayerTable, get_players_path
+
+# Specify sweep defaults; the optimizer's teams are solved with the greedy heuristic unless asked otherwise
+NUM_DRAFTS = 1000
+CHUNK_SIZE = 50  # drafts per shard
+BACKEND = "greedy"
+SWEEP_VERSION = 1  # bump when the results change, so old sweeps aren't resumed
+
+# Specify result columns (one row per team per draft)
+COLUMNS = ["job", "draft", "team", "optimizer", "min_points", "total_points", "rank", "solve_time"]
+
+# Worker process state; holds the league last run by the worker
+WORKER: Dict[str, Any] = {}
+
+
+class MockJob(BaseModel):
+    """
+    A league and the teams the optimizer drafts for in each of its mock drafts.
+    """
+
+    settings_file: str
+    players_path: str
+    num_players: int
+    pos_consts: Dict[str, Tuple[int, int]]
+    draft_order: List[int]
+    teams: List[int]  # 0-based, like `draft_order`
+    backend: str = BACKEND
+    noise: float = NOISE
+
+    @classmethod
+    def from_settings(
+        cls,
+        settings_file: str,
+        teams: Sequence[int],
+        backend: str = BACKEND,
+        noise: float = NOISE,
+        players_path: Optional[str] = None,
+    ) -> "MockJob":
+        settings = load_settings(os.path.abspath(settings_file))
+        if players_path is None:
+            players_path = get_players_path(settings["points_mode"], settings["year"])
+        job = cls(
+            settings_file=os.path.basename(settings_file),
+            players_path=os.path.abspath(players_path),
+            num_players=settings["roster_size"],
+            pos_consts={pos: tuple(consts) for pos, consts in settings["pos_consts"].items()},
+            draft_order=settings["draft_order"],
+            teams=list(teams),
+            backend=backend,
+            noise=noise,
+        )
+
+        return job
+
+    @property
+    def num_teams(self) -> int:
+        return max(self.draft_order) + 1
+
+    def league_key(self) -> str:
+        # Identifies the league's players and constraints (what a worker can reuse between jobs)
+        return json.dumps([self.players_path, self.num_players, sorted(self.pos_consts.items())])
+
+
+def mock_draft(
+    optimizer: RosterOptimizer,
+    draft_order: np.ndarray,
+    teams: Sequence[int],
+    seed: Any = None,
+    backend: str = BACKEND,
+    noise: float = NOISE,
+) -> Dict[str, np.ndarray]:
+    """
+    Play one mock draft; returns result columns (see `COLUMNS`, without the job and draft), with a row per team.
+
+    Opponents take the best player left on the draft's noisy board of ADP ranks (like `simulate_chunk`), subject to
+    position limits. At each of their picks, the optimizer's `teams` solve for their best roster and take the player on
+    it with the best ADP, the one least likely to last.
+    """
+    # Get data
+    context = optimizer.context
+    table = context.table
+    num_teams = int(np.max(draft_order)) + 1
+    pos_idx, min_pos, max_pos = context.pos_limits()
+    opp_max_pos = max_pos.copy()
+    opp_max_pos[-1] = 0  # opponents don't draft unconstrained positions
+
+    # Draw the board and sort each position by it
+    rng = np.random.default_rng(seed)
+    board = np.log(np.maximum(table.adp, 1)) + noise * rng.standard_normal(table.num_players)
+    board = np.where(context.pool, board, np.inf)
+    by_pos = [np.flatnonzero((pos_idx == g) & context.pool) for g in range(len(min_pos))]
+    by_pos = [rows[np.argsort(board[rows], kind="stable")] for rows in by_pos]
+    heads = np.zeros(len(by_pos), dtype=np.int64)
+
+    # Draft
+    taken = ~context.pool
+    counts = np.zeros((num_teams, len(min_pos)), dtype=np.int64)
+    rosters = np.zeros((num_teams, table.num_players), dtype=bool)
+    solve_times = np.zeros(num_teams)
+    is_optimizer = np.isin(np.arange(num_teams), teams)
+    for team in draft_order:
+        num_remaining = context.num_players - counts[team].sum()
+        if num_remaining <= 0:
+            continue
+
+        # Maybe take the best-ADP player on the optimal roster
+        row = -1
+        if is_optimizer[team]:
+            result = optimizer.solve(~taken, rosters[team].copy(), key=int(team), backend=backend)
+            solve_times[team] += result.solve_time
+            if result.roster is not None:
+                options = np.flatnonzero(result.roster & ~rosters[team])
+                if len(options) > 0:
+                    row = options[np.argmin(table.adp[options])]
+
+        # Otherwise take the best player left on the board
+        if row < 0:
+            allowed = allowed_positions(counts[team], min_pos, opp_max_pos, num_remaining)
+            best_pos, best_board = -1, np.inf
+            for g in np.flatnonzero(allowed):
+                while heads[g] < len(by_pos[g]) and taken[by_pos[g][heads[g]]]:
+                    heads[g] += 1
+                if heads[g] < len(by_pos[g]) and board[by_pos[g][heads[g]]] < best_board:
+                    best_pos, best_board = int(g), board[by_pos[g][heads[g]]]
+            if best_pos < 0:
+                continue  # nothing left that fits
+            row = by_pos[best_pos][heads[best_pos]]
+
+        # Pick
+        taken[row] = True
+        rosters[team, row] = True
+        counts[team, pos_idx[row]] += 1
+
+    # Score rosters
+    weekly = rosters.astype(np.float64) @ table.points.T.astype(np.float64)  # teams x weeks
+    min_points = weekly.min(axis=1)
+    rank = 1 + (min_points[None, :] > min_points[:, None]).sum(axis=1)  # ties share the best rank
+    results = {
+        "team": np.arange(num_teams),
+        "optimizer": is_optimizer,
+        "min_points": min_points,
+        "total_points": weekly.sum(axis=1),
+        "rank": rank,
+        "solve_time": solve_times,
+    }
+
+    return results
+
+
+def draft_seed(seed: int, job_idx: int, draft: int) -> np.random.SeedSequence:
+    # Each draft's seed depends only on its position in the sweep, so resumed sweeps draw the same drafts
+    return np.random.SeedSequence([seed, job_idx, draft])
+
+
+def run_chunk(job: MockJob, job_idx: int, start: int, num_drafts: int, seed: int) -> Dict[str, np.ndarray]:
+    """
+    Play a chunk of a job's drafts; returns result columns (see `COLUMNS`). Workers keep the last league's optimizer.
+    """
+    # Maybe load the league
+    league_key = job.league_key()
+    if WORKER.get("league_key") != league_key:
+        table = PlayerTable.from_csv(job.players_path)
+        context = OptimizerContext.from_table(table, job.num_players, job.pos_consts)
+        WORKER["league_key"] = league_key
+        WORKER["optimizer"] = RosterOptimizer(context)
+
+    # Play drafts
+    optimizer: RosterOptimizer = WORKER["optimizer"]
+    draft_order = np.array(job.draft_order, dtype=np.int64)
+    chunks = []
+    for draft in range(start, start + num_drafts):
+        results = mock_draft(
+            optimizer, draft_order, job.teams, draft_seed(seed, job_idx, draft), job.backend, job.noise
+        )
+        num_rows = len(results["team"])
+        results["job"] = np.full(num_rows, job_idx)
+        results["draft"] = np.full(num_rows, draft)
+        chunks.append(results)
+
+    return {col: np.concatenate([c[col] for c in chunks]) for col in COLUMNS}
+
+
+def _save_columns(path: str, columns: Dict[str, Any]):
+    # Write atomically, so an interrupted sweep never leaves a partial shard behind
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **columns)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _load_columns(paths: Sequence[str]) -> pd.DataFrame:
+    frames = []
+    for path in paths:
+        with np.load(path, allow_pickle=False) as data:
+            frames.append(pd.DataFrame({col: data[col] for col in COLUMNS}))
+    if len(frames) == 0:
+        return pd.DataFrame({col: [] for col in COLUMNS})
+
+    return pd.concat(frames, ignore_index=True).sort_values(["job", "draft", "team"], ignore_index=True)
+
+
+def shard_path(out_dir: str, job_idx: int, start: int) -> str:
+    return os.path.join(out_dir, "shards", f"job{job_idx:04d}_draft{start:07d}.npz")
+
+
+def run_sweep(
+    jobs: Sequence[MockJob],
+    out_dir: str,
+    num_drafts: int = NUM_DRAFTS,
+    chunk_size: int = CHUNK_SIZE,
+    seed: int = 0,
+    max_workers: Optional[int] = None,
+    verbose: bool = False,
+) -> pd.DataFrame:
+    """
+    Run `num_drafts` mock drafts per job, resuming from the shards already in `out_dir`; returns every result.
+
+    The sweep's settings are saved in `out_dir/sweep.json`, and resuming with different settings raises a
+    `ValueError` (use a new output directory).
+    """
+    # Save the sweep's settings, or check them against the saved ones
+    os.makedirs(os.path.join(out_dir, "shards"), exist_ok=True)
+    sweep = {
+        "version": SWEEP_VERSION,
+        "num_drafts": num_drafts,
+        "chunk_size": chunk_size,
+        "seed": seed,
+        "jobs": [job.dict() for job in jobs],
+    }
+    sweep_path = os.path.join(out_dir, "sweep.json")
+    if os.path.isfile(sweep_path):
+        with open(sweep_path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved != json.loads(json.dumps(sweep)):
+            raise ValueError(f"{out_dir} holds a different sweep; use a new output directory.")
+    else:
+        with open(sweep_path, "w", encoding="utf-8") as f:
+            json.dump(sweep, f, indent=4)
+
+    # Get chunks left to run
+    chunks = [
+        (job_idx, start, min(chunk_size, num_drafts - start))
+        for job_idx in range(len(jobs))
+        for start in range(0, num_drafts, chunk_size)
+    ]
+    paths = [shard_path(out_dir, job_idx, start) for job_idx, start, _ in chunks]
+    to_run = [(chunk, path) for chunk, path in zip(chunks, paths) if not os.path.isfile(path)]
+    if verbose:
+        print(f"{len(chunks) - len(to_run)} of {len(chunks)} chunks already done")
+
+    # Run chunks, writing each as it finishes; interrupting cancels what hasn't started
+    start_time = time.perf_counter()
+    if max_workers == 1:
+        for num_done, ((job_idx, start, size), path) in enumerate(to_run, start=1):
+            _save_columns(path, run_chunk(jobs[job_idx], job_idx, start, size, seed))
+            if verbose:
+                print(f"{num_done}/{len(to_run)} chunks ({time.perf_counter() - start_time:.0f}s)")
+    elif len(to_run) > 0:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            try:
+                futures: Dict[Future, str] = {
+                    pool.submit(run_chunk, jobs[job_idx], job_idx, start, size, seed): path
+                    for (job_idx, start, size), path in to_run
+                }
+                pending = set(futures)
+                while len(pending) > 0:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        _save_columns(futures[future], future.result())
+                    if verbose:
+                        num_done = len(futures) - len(pending)
+                        print(f"{num_done}/{len(futures)} chunks ({time.perf_counter() - start_time:.0f}s)")
+            except BaseException:
+                pool.shutdown(cancel_futures=True)
+                raise
+
+    # Combine shards
+    results = _load_columns(paths)
+    _save_columns(os.path.join(out_dir, "results.npz"), {col: results[col].to_numpy() for col in COLUMNS})
+
+    return results
+
+
+def load_results(out_dir: str) -> pd.DataFrame:
+    # Load a sweep's results, with each job's settings file and teams; reads the shards if it hasn't finished
+    path = os.path.join(out_dir, "results.npz")
+    paths = [path] if os.path.isfile(path) else sorted(glob.glob(os.path.join(out_dir, "shards", "*.npz")))
+    results = _load_columns(paths)
+    with open(os.path.join(out_dir, "sweep.json"), "r", encoding="utf-8") as f:
+        jobs = json.load(f)["jobs"]
+    results["settings_file"] = [jobs[j]["settings_file"] for j in results["job"]]
+
+    return results
+
+
+def summarize(results: pd.DataFrame) -> pd.DataFrame:
+    # Compare the optimizer's teams with their opponents in each job
+    summary = results.groupby(["job", "optimizer"]).agg(
+        drafts=("draft", "nunique"),
+        mean_min_points=("min_points", "mean"),
+        mean_rank=("rank", "mean"),
+        p_first=("rank", lambda x: (x == 1).mean()),
+        solve_ms=("solve_time", lambda x: 1000 * x.mean()),
+    )
+
+    return summary
+
+
+def main():
+    # Parse args
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("settings", nargs="+", help="league settings JSON files")
+    parser.add_argument("--output", required=True, help="output directory (resumed if it exists)")
+    parser.add_argument("--teams", type=int, nargs="+", default=[1], help="teams the optimizer drafts for (1-based)")
+    parser.add_argument("--each-team", action="store_true", help="one job per team, instead of `--teams`")
+    parser.add_argument("--num-drafts", type=int, default=NUM_DRAFTS, help="drafts per job")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--backend", default=BACKEND, choices=BACKENDS)
+    parser.add_argument("--noise", type=float, default=NOISE, help="std of log draft position around ADP rank")
+    parser.add_argument("--players", help="players CSV for every league (default: the production data)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-workers", type=int)
+    args = parser.parse_args()
+
+    # Make jobs
+    jobs = []
+    for settings_file in args.settings:
+        job = MockJob.from_settings(settings_file, [], args.backend, args.noise, args.players)
+        team_sets = [[team] for team in range(job.num_teams)] if args.each_team else [[t - 1 for t in args.teams]]
+        jobs += [job.copy(update={"teams": teams}) for teams in team_sets]
+
+    # Run
+    try:
+        results = run_sweep(jobs, args.output, args.num_drafts, args.chunk_size, args.seed, args.max_workers, True)
+    except KeyboardInterrupt:
+        print("Interrupted; run the same command again to resume.")
+        raise SystemExit(130)
+    for job_idx, job in enumerate(jobs):
+        print(f"Job {job_idx}: {job.settings_file}, teams {[team + 1 for team in job.teams]}")
+    print(summarize(results).to_string(float_format=lambda x: f"{x:.4g}"))
+
+
+if __name__ == "__main__":
+    main()
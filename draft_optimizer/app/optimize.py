@@ -1,90 +1,638 @@
-from typing import Any, Dict, Set
+import os
+import threading
+import time
+import warnings
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence, Set, Tuple
 
 import cvxpy as cp  # note: also need cvxopt installed
 import numpy as np
 
-# Prepare to specify lookup
-GLOBALS: Dict[str, Any] = {
-    "LOOKUP": {
-        "UID_COL": "id",
-        "POS_COL": "position",
-        # WEEK_COLS,
-        # ALL_IDX,
-        # PLAYERS,
-        # NUM_PLAYERS_CONST,
-        # MIN_POS_CONST,
-        # MAX_POS_CONST,
-    }
-}
-
-
-def poss_opt_picks(team: int, picks_idx: Dict[int, Set[str]], picked_idx: Set[int]):
-    # Get lookup
-    LOOKUP = GLOBALS["LOOKUP"]
-    UID_COL = LOOKUP["UID_COL"]
-    POS_COL = LOOKUP["POS_COL"]
-    WEEK_COLS = LOOKUP["WEEK_COLS"]
-    ALL_IDX = LOOKUP["ALL_IDX"]
-    PLAYERS = LOOKUP["PLAYERS"]
-    NUM_PLAYERS_CONST = LOOKUP["NUM_PLAYERS_CONST"]
-    MIN_POS_CONST = LOOKUP["MIN_POS_CONST"]
-    MAX_POS_CONST = LOOKUP["MAX_POS_CONST"]
+from draft_optimizer.app.cache import ResultCache, draft_key
+from draft_optimizer.app.heuristic import solve_greedy, weekly_bound
+from draft_optimizer.app.table import ArrayModel, PlayerTable
+from draft_optimizer.src.trace import record, span
+
+# Specify default solver (GLPK_MI ships with cvxopt)
+SOLVER = cp.GLPK_MI
+
+# Specify solver backends; "auto" runs the heuristic, then the MILP (within the time left) if it isn't proven optimal
+BACKENDS = ["auto", "greedy", "milp"]
+GAP_TOL = 1e-6
+
+# Worker process state; holds a worker's copy of the optimizer
+WORKER: Dict[str, Any] = {}
+
+
+class OptimizerContext(ArrayModel):
+    """
+    Immutable player table and roster constraints for a league and season.
+
+    Arrays are read-only, so a context can be shared across threads, cached, and pickled to worker processes.
+    """
+
+    table: PlayerTable
+    pool: np.ndarray  # players eligible to be picked (ex: positive projections)
+    num_players: int
+    min_pos_const: Dict[str, int]
+    max_pos_const: Dict[str, int]
+
+    @classmethod
+    def from_table(
+        cls, table: PlayerTable, num_players: int, pos_consts: Mapping[str, Sequence[int]]
+    ) -> "OptimizerContext":
+        context = cls(
+            table=table,
+            pool=table.sum_weeks > 0,  # remove players with poor projections
+            num_players=num_players,
+            min_pos_const={pos: int(consts[0]) for pos, consts in pos_consts.items()},
+            max_pos_const={pos: int(consts[1]) for pos, consts in pos_consts.items()},
+        )
+
+        return context
+
+    def masks(self, picks_idx: Dict[int, Set[int]], picked_idx: Set[int]) -> Tuple[np.ndarray, Dict[int, np.ndarray]]:
+        # Get available players and those already picked by each team
+        available = self.pool & ~self.table.mask(picked_idx)
+        fixed = {team: self.table.mask(prev_picks_idx) for team, prev_picks_idx in picks_idx.items()}
+
+        return available, fixed
+
+    def pos_limits(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Map players to constrained positions; unconstrained positions share a last, unlimited slot
+        pos_keys = list(self.min_pos_const.keys())
+        table_pos_idx = np.full(len(self.table.pos_keys), len(pos_keys))
+        for i, pos in enumerate(self.table.pos_keys):
+            if pos in pos_keys:
+                table_pos_idx[i] = pos_keys.index(pos)
+        pos_idx = table_pos_idx[self.table.positions]
+        min_pos = np.array([self.min_pos_const[pos] for pos in pos_keys] + [0])
+        max_pos = np.array([self.max_pos_const[pos] for pos in pos_keys] + [self.num_players])
+
+        return pos_idx, min_pos, max_pos
+
+    @staticmethod
+    def rows(roster: Optional[np.ndarray]) -> Set[int]:
+        if roster is None:
+            return set()
+        return set(np.flatnonzero(roster).tolist())
+
+
+class RosterResult(ArrayModel):
+    """
+    Solved roster with its min weekly points (`value`) and an upper bound on the best possible value (`bound`).
+    """
+
+    roster: Optional[np.ndarray]  # `None` if no roster could be found
+    value: float
+    bound: float
+    backend: str
+    solve_time: float = 0.0
+
+    @property
+    def gap(self) -> float:
+        # Relative optimality gap; 0 means the roster is proven optimal
+        if self.roster is None:
+            return np.inf
+        return max(self.bound - self.value, 0.0) / max(abs(self.bound), GAP_TOL)
+
+    @property
+    def rows(self) -> Set[int]:
+        return OptimizerContext.rows(self.roster)
+
+
+class RosterSolver(ABC):
+    """
+    Solver backend interface; `solve` takes boolean masks of the players allowed on and fixed onto the roster.
+
+    With a `time_limit` (seconds), `solve` stops early and returns the best roster it found (with a bound).
+    """
+
+    name = ""
+
+    def __init__(self, context: OptimizerContext):
+        self.context = context
+
+    @property
+    def cache_id(self) -> str:
+        # Identifies the solver's results in cache keys; include any settings that change them
+        return self.name
+
+    @abstractmethod
+    def solve(
+        self,
+        upper: np.ndarray,
+        lower: np.ndarray,
+        warm_start: Optional[np.ndarray] = None,
+        time_limit: Optional[float] = None,
+    ) -> RosterResult:
+        pass
+
+    def _trace(self, result: RosterResult, upper: np.ndarray, lower: np.ndarray, status: str):
+        # Record solver statistics: time, outcome, and problem size
+        record(
+            f"solve.{self.name}",
+            1000 * result.solve_time,
+            status=status,
+            gap=result.gap,
+            players=int(upper.sum()),
+            fixed=int(lower.sum()),
+            weeks=len(self.context.table.weeks),
+        )
+
+
+class GreedySolver(RosterSolver):
+    """
+    Greedy fill of the position slots followed by local-search swaps; fast, with a bound from solving weeks separately.
+    """
+
+    name = "greedy"
+
+    def __init__(self, context: OptimizerContext):
+        # Call super
+        super().__init__(context)
+
+        # Save data
+        self.pos_idx, self.min_pos, self.max_pos = context.pos_limits()
+
+    def solve(
+        self,
+        upper: np.ndarray,
+        lower: np.ndarray,
+        warm_start: Optional[np.ndarray] = None,
+        time_limit: Optional[float] = None,
+    ) -> RosterResult:
+        # Solve (quick enough to ignore the time limit)
+        start = time.perf_counter()
+        roster, value, bound = solve_greedy(
+            self.context.table.points,
+            self.pos_idx,
+            self.min_pos,
+            self.max_pos,
+            self.context.num_players,
+            upper & ~lower,
+            lower,
+        )
+
+        # Get result
+        result = RosterResult(
+            roster=roster, value=value, bound=bound, backend=self.name, solve_time=time.perf_counter() - start
+        )
+        status = "infeasible" if roster is None else "optimal" if result.gap <= GAP_TOL else "feasible"
+        self._trace(result, upper, lower, status)
+
+        return result
+
+
+class MILPSolver(RosterSolver):
+    """
+    Exact roster problem built once over a context's full player pool and re-solved in place after each pick.
+
+    Availability and already-made picks enter as upper/lower bound parameters, so cvxpy only canonicalizes the
+    problem on the first solve. With a `time_limit` (seconds; GLPK only), the solver stops early and the best roster
+    it found is returned with a bound.
+    """
+
+    name = "milp"
+
+    def __init__(self, context: OptimizerContext, solver: Optional[str] = None):
+        # Call super
+        super().__init__(context)
+
+        # Save data
+        self.solver = SOLVER if solver is None else solver
+        self.pos_idx, _, self.max_pos = context.pos_limits()
+        table = context.table
+        num_all = table.num_players
+
+        # The variable we are solving for. We define our output variable as a bool
+        # since we have to make a binary decision on each player (pick or don't pick)
+        self.roster = cp.Variable(num_all, boolean=True)
+
+        # Bounds on each player; an upper bound of 0 removes a player and a lower bound of 1 forces them onto the roster
+        self.upper = cp.Parameter(num_all, nonneg=True)
+        self.lower = cp.Parameter(num_all, nonneg=True)
+
+        # Save constraints
+        constraints = list()
+
+        # Our roster must be composed of exactly `num_players` players
+        constraints.append(cp.sum(self.roster) == context.num_players)
+
+        # Define position constraints
+        pos_keys = list(context.min_pos_const.keys())
+        is_pos = np.stack([table.pos_mask(pos) for pos in pos_keys]).astype(float)
+        min_nums = np.array([context.min_pos_const[pos] for pos in pos_keys])
+        max_nums = np.array([context.max_pos_const[pos] for pos in pos_keys])
+        constraints.append(is_pos @ self.roster >= min_nums)
+        constraints.append(is_pos @ self.roster <= max_nums)
+
+        # Define availability constraints
+        constraints.append(self.roster <= self.upper)
+        constraints.append(self.roster >= self.lower)
+
+        # Define the objective
+        weekly_points = table.points @ self.roster
+        min_weekly_points = cp.min(weekly_points)
+        objective = cp.Maximize(min_weekly_points)
+
+        # Save problem
+        self.problem = cp.Problem(objective, constraints)
+
+    def solve(
+        self,
+        upper: np.ndarray,
+        lower: np.ndarray,
+        warm_start: Optional[np.ndarray] = None,
+        time_limit: Optional[float] = None,
+    ) -> RosterResult:
+        # Update parameters and maybe warm-start
+        start = time.perf_counter()
+        self.upper.value = upper.astype(float)
+        self.lower.value = lower.astype(float)
+        if warm_start is not None:
+            self.roster.value = warm_start.astype(float)
+
+        # Maybe limit the solve time; stopped solves return their incumbent as "optimal_inaccurate"
+        options = {}
+        if time_limit is not None and self.solver == cp.GLPK_MI:
+            options["tm_lim"] = max(1, int(1000 * time_limit))
+
+        # Solve (a solve stopped before finding any roster raises)
+        try:
+            with warnings.catch_warnings():
+                warnings.filterwarnings("ignore", message="Solution may be inaccurate")  # stopped early
+                self.problem.solve(solver=self.solver, warm_start=True, **options)
+            roster_vals = self.roster.value
+            status = str(self.problem.status)
+        except cp.SolverError:
+            roster_vals = None
+            status = "solver_error"
+
+        # Get result; the bound is exact unless the solver stopped short of optimal
+        roster = None if roster_vals is None else roster_vals > 0.5
+        points = self.context.table.points
+        if roster is not None and self.problem.status == cp.OPTIMAL:
+            value = bound = float(points[:, roster].sum(axis=1, dtype=np.float64).min())
+        else:
+            num_players = self.context.num_players
+            bound = weekly_bound(points, self.pos_idx, self.max_pos, num_players, upper & ~lower, lower)
+            value = -np.inf if roster is None else float(points[:, roster].sum(axis=1, dtype=np.float64).min())
+        result = RosterResult(
+            roster=roster, value=value, bound=bound, backend=self.name, solve_time=time.perf_counter() - start
+        )
+        self._trace(result, upper, lower, status)
+
+        return result
+
+
+class RosterOptimizer:
+    """
+    Roster solves for a context, dispatched to a solver backend and re-run after each pick.
+
+    The "auto" backend runs the greedy heuristic and then, unless it's proven optimal, the exact MILP warm-started from
+    it. A `time_budget` (seconds) stops solves early, keeping the best roster found. The last result for each key
+    (ex: team) is kept to warm-start the next solve and is returned as-is when it's optimal and the draft has only
+    tightened the bounds without touching it. Results can also be cached by draft state in `cache` (see
+    `poss_opt_picks`).
+    """
+
+    def __init__(
+        self,
+        context: OptimizerContext,
+        solver: Optional[str] = None,
+        backend: str = "auto",
+        time_budget: Optional[float] = None,
+        cache: Optional[ResultCache] = None,
+        extra_backends: Optional[Mapping[str, RosterSolver]] = None,
+    ):
+        # Save data
+        self.context = context
+        self.solver = SOLVER if solver is None else solver
+        self.backend = backend
+        self.time_budget = time_budget
+        self.cache = cache
+
+        # Make backends; more can be added by name (ex: `StochasticSolver`), but must be picklable for worker processes
+        self.extra_backends = {} if extra_backends is None else dict(extra_backends)
+        self.milp = MILPSolver(context, self.solver)
+        self.backends: Dict[str, RosterSolver] = {
+            "greedy": GreedySolver(context),
+            "milp": self.milp,
+            **self.extra_backends,
+        }
+        if backend != "auto" and backend not in self.backends:
+            raise ValueError(f"Invalid backend: {backend}")
+
+        # Save last solves by objective, so backends only reuse results for what they maximize
+        # (key, objective) -> (upper, lower, result)
+        self._last: Dict[Tuple[Any, str], Tuple[np.ndarray, np.ndarray, RosterResult]] = {}
+
+        # Save rosters to warm-start keys without a last solve (ex: restored from a draft log); key -> roster
+        self._warm_starts: Dict[Any, np.ndarray] = {}
+
+        # The backends' parameters are shared state, so solves are serialized
+        self._lock = threading.Lock()
+
+        # Process pool for batched solves; created on first use and rebuilt if a different size is asked for
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_workers: Optional[int] = None
+
+    def cache_key(self, team: int, team_picks: Iterable[int], picked: Iterable[int], backend: str) -> str:
+        context = self.context
+        pos_consts = {pos: (context.min_pos_const[pos], context.max_pos_const[pos]) for pos in context.min_pos_const}
+        backend_id = self.backends[backend].cache_id if backend in self.backends else backend
+        key = draft_key(context.table.digest, context.num_players, pos_consts, team, team_picks, picked, backend_id)
+
+        return key
+
+    def set_warm_start(self, key: Any, roster: np.ndarray):
+        # Warm-start the next solve for a key, unless it's already been solved
+        with self._lock:
+            self._warm_starts[key] = np.asarray(roster, dtype=bool)
+
+    def forget(self, keys: Iterable[Any]):
+        # Drop last solves and warm-starts for keys that won't be solved again (ex: one-off candidate rosters)
+        keys = set(keys)
+        with self._lock:
+            for key, objective in [k for k in self._last.keys() if k[0] in keys]:
+                del self._last[(key, objective)]
+            for key in keys:
+                self._warm_starts.pop(key, None)
+
+    def _warm_start(self, key: Any, objective: str) -> Optional[np.ndarray]:
+        # Must hold the lock; start from the last roster for the objective, else the saved warm-start
+        last = self._last.get((key, objective))
+
+        return self._warm_starts.get(key) if last is None else last[2].roster
+
+    def _reuse(self, upper: np.ndarray, lower: np.ndarray, key: Any, objective: str) -> Optional[RosterResult]:
+        # Reuse the last result if it's optimal and the bounds only tightened around it (it's still optimal)
+        last = self._last.get((key, objective))
+        if last is not None:
+            last_upper, last_lower, last_result = last
+            if last_result.roster is None or last_result.gap > GAP_TOL:
+                return None
+            last_roster = last_result.roster
+            tightened = not np.any(upper & ~last_upper) and not np.any(last_lower & ~lower)
+            feasible = not np.any(last_roster & ~upper) and not np.any(lower & ~last_roster)
+            if tightened and feasible:
+                return last_result
+
+        return None
+
+    def _solve(
+        self, upper: np.ndarray, lower: np.ndarray, warm_start: Optional[np.ndarray], backend: str, time_budget: Any
+    ) -> RosterResult:
+        # Solve with a single backend
+        if backend != "auto":
+            return self.backends[backend].solve(upper, lower, warm_start, time_limit=time_budget)
+
+        # Run the heuristic first
+        result = self.backends["greedy"].solve(upper, lower, warm_start)
+        if result.roster is not None and result.gap <= GAP_TOL:
+            return result
+
+        # Run the MILP if there's time, keeping the better roster
+        time_left = None if time_budget is None else time_budget - result.solve_time
+        if time_left is None or time_left > 0:
+            milp_warm_start = warm_start if result.roster is None else result.roster
+            exact = self.milp.solve(upper, lower, milp_warm_start, time_limit=time_left)
+            bound = min(result.bound, exact.bound)
+            solve_time = result.solve_time + exact.solve_time
+            if exact.roster is not None and (result.roster is None or exact.value >= result.value):
+                result = exact
+            result = result.copy(update={"bound": bound, "solve_time": solve_time})
+
+        return result
+
+    def solve(
+        self,
+        available: np.ndarray,
+        fixed: np.ndarray,
+        key: Any = None,
+        backend: Optional[str] = None,
+        time_budget: Optional[float] = None,
+        warm_start: Optional[np.ndarray] = None,
+    ) -> RosterResult:
+        """
+        Solve for the best roster given boolean masks of available players and players fixed onto the roster.
+
+        `backend` and `time_budget` default to the optimizer's. `warm_start` replaces the key's last roster (ex: one
+        sent to a worker process). The result's roster is `None` if none could be found.
+        """
+        # Get settings
+        backend = self.backend if backend is None else backend
+        time_budget = self.time_budget if time_budget is None else time_budget
+        if backend != "auto" and backend not in self.backends:
+            raise ValueError(f"Invalid backend: {backend}")
+
+        # Get bounds
+        fixed = np.asarray(fixed, dtype=bool)
+        upper = np.asarray(available, dtype=bool) | fixed
+        lower = fixed
+
+        objective = _objective(backend)
+        with self._lock:
+            # Maybe reuse the last result
+            reused = self._reuse(upper, lower, key, objective)
+            if reused is not None:
+                return reused
+
+            # Solve, warm-starting from the last result
+            if warm_start is None:
+                warm_start = self._warm_start(key, objective)
+            result = self._solve(upper, lower, warm_start, backend, time_budget)
+            if result.roster is not None:
+                self._last[(key, objective)] = (upper, lower, result)
+
+        return result
+
+    def solve_teams(
+        self,
+        available: np.ndarray,
+        fixed: Mapping[Any, np.ndarray],
+        max_workers: Optional[int] = None,
+        backend: Optional[str] = None,
+        time_budget: Optional[float] = None,
+    ) -> Dict[Any, RosterResult]:
+        """
+        Solve for every team's best roster in one pass; `fixed` maps each team (or any key) to a mask of its picks.
+
+        Teams with full rosters or reusable results are resolved locally, as are all teams when only the heuristic
+        runs. The rest are solved in parallel across a process pool, where each worker holds its own optimizer.
+        """
+        # Resolve what we can locally
+        backend = self.backend if backend is None else backend
+        objective = _objective(backend)
+        available = np.asarray(available, dtype=bool)
+        pos_idx, min_pos, max_pos = self.context.pos_limits()
+        results: Dict[Any, RosterResult] = {}
+        to_solve: Dict[Any, Tuple[np.ndarray, np.ndarray]] = {}
+        for team, team_fixed in fixed.items():
+            team_fixed = np.asarray(team_fixed, dtype=bool)
+            upper = available | team_fixed
+            if team_fixed.sum() >= self.context.num_players:  # roster is full
+                counts = np.bincount(pos_idx[team_fixed], minlength=len(min_pos))
+                if np.any(counts < min_pos) or np.any(counts > max_pos):
+                    results[team] = RosterResult(roster=None, value=-np.inf, bound=-np.inf, backend="full")
+                    continue
+                value = float(self.context.table.points[:, team_fixed].sum(axis=1, dtype=np.float64).min())
+                results[team] = RosterResult(roster=team_fixed.copy(), value=value, bound=value, backend="full")
+                continue
+            with self._lock:
+                reused = self._reuse(upper, team_fixed, team, objective)
+            if reused is not None:
+                results[team] = reused
+            else:
+                to_solve[team] = (upper, team_fixed)
+
+        # Solve the rest
+        if len(to_solve) == 1 or max_workers == 1 or backend == "greedy":
+            for team, (upper, lower) in to_solve.items():
+                results[team] = self.solve(upper, lower, key=team, backend=backend, time_budget=time_budget)
+        elif len(to_solve) > 1:
+            # Workers keep no state between solves, so warm-starts are sent along
+            pool = self._get_pool(max_workers)
+            with self._lock:
+                warm_starts = {team: self._warm_start(team, objective) for team in to_solve.keys()}
+            futures = {
+                team: pool.submit(_solve_worker, upper, lower, team, backend, time_budget, warm_starts[team])
+                for team, (upper, lower) in to_solve.items()
+            }
+            for team, future in futures.items():
+                result = future.result()
+                results[team] = result
+                if result.roster is not None:
+                    upper, lower = to_solve[team]
+                    with self._lock:
+                        self._last[(team, objective)] = (upper, lower, result)
+
+        return results
+
+    def _get_pool(self, max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+        max_workers = os.cpu_count() if max_workers is None else max_workers
+        with self._lock:
+            # Maybe resize; solves already submitted to the old pool still finish
+            if self._pool is not None and self._pool_workers != max_workers:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=max_workers,
+                    initializer=_init_worker,
+                    initargs=(self.context, self.solver, self.extra_backends),
+                )
+                self._pool_workers = max_workers
+
+        return self._pool
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+
+def _init_worker(context: OptimizerContext, solver: str, extra_backends: Mapping[str, RosterSolver]):
+    WORKER["OPTIMIZER"] = RosterOptimizer(context, solver, extra_backends=extra_backends)
+
+
+def _solve_worker(
+    available: np.ndarray,
+    fixed: np.ndarray,
+    key: Any,
+    backend: str,
+    time_budget: Optional[float],
+    warm_start: Optional[np.ndarray],
+) -> RosterResult:
+    optimizer = WORKER["OPTIMIZER"]
+    result = optimizer.solve(available, fixed, key=key, backend=backend, time_budget=time_budget, warm_start=warm_start)
+    optimizer.forget([key])
+
+    return result
+
+
+def _objective(backend: str) -> str:
+    # The built-in backends all maximize min weekly points, so they can reuse each other's results; others can't
+    return "points" if backend in BACKENDS else backend
+
+
+def cacheable(result: RosterResult, backend: str) -> bool:
+    # MILP (and "auto") results depend on the time budget unless they're proven optimal
+    return result.roster is not None and (backend not in ["auto", "milp"] or result.gap <= GAP_TOL)
+
+
+def poss_opt_picks(
+    optimizer: RosterOptimizer,
+    team: int,
+    picks_idx: Dict[int, Set[int]],
+    picked_idx: Set[int],
+    backend: Optional[str] = None,
+    time_budget: Optional[float] = None,
+) -> RosterResult:
+    # Maybe get a cached result
+    backend = optimizer.backend if backend is None else backend
+    cache = optimizer.cache
+    if cache is not None:
+        key = optimizer.cache_key(team, picks_idx[team], picked_idx, backend)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
 
     # Get available players and those already picked by the team
-    available_idx = ALL_IDX - picked_idx
-    prev_picks_idx = picks_idx[team]
-    available_idx |= prev_picks_idx
-    available_idx = sorted(available_idx)
-
-    # Get data
-    uid_vals = PLAYERS.loc[available_idx, UID_COL].values
-    pos_vals = PLAYERS.loc[available_idx, POS_COL].values
-    points_vals = PLAYERS.loc[available_idx, WEEK_COLS].values
-
-    # The variable we are solving for. We define our output variable as a bool
-    # since we have to make a binary decision on each player (pick or don't pick)
-    roster = cp.Variable(len(available_idx), boolean=True)
-
-    # Save constraints
-    constraints = list()
-
-    # Our roster must be composed of exactly `num_players` players
-    constraints.append(cp.sum(roster) == NUM_PLAYERS_CONST)
-
-    # Define position constraints
-    for pos in MIN_POS_CONST.keys():
-        is_pos = pos_vals == pos
-        pos_sum = cp.sum(is_pos @ roster)
-        min_num = MIN_POS_CONST[pos]
-        max_num = MAX_POS_CONST[pos]
-        constraints.append(pos_sum >= min_num)
-        constraints.append(pos_sum <= max_num)
-
-    # Define constraints corresponding already picked players
-    for idx in prev_picks_idx:
-        did_pick = uid_vals == PLAYERS.loc[idx, UID_COL]
-        constraints.append(cp.sum(did_pick @ roster) == 1)
-
-    # Define the objective
-    weekly_points = roster @ points_vals
-    min_weekly_points = cp.min(weekly_points)
-    objective = cp.Maximize(min_weekly_points)
+    context = optimizer.context
+    available, fixed = context.masks({team: picks_idx[team]}, picked_idx)
 
     # Solve
-    problem = cp.Problem(objective, constraints)
-    problem.solve(max_iters=25)
+    result = optimizer.solve(available, fixed[team], key=team, backend=backend, time_budget=time_budget)
 
-    # Get result
-    roster_idx = roster.value
-    if roster_idx is not None:
-        opt_roster = np.array(available_idx)[roster_idx.astype(bool)]  # re-align indices
-        result = set(opt_roster)
-    else:
-        result = set()
+    # Maybe cache
+    if cache is not None and cacheable(result, backend):
+        cache.put(key, result)
 
     return result
 
 
-def set_lookup(**kwargs):
-    LOOKUP = GLOBALS["LOOKUP"]
-    GLOBALS["LOOKUP"] = {**LOOKUP, **kwargs}
+def poss_opt_picks_all(
+    optimizer: RosterOptimizer,
+    picks_idx: Dict[int, Set[int]],
+    picked_idx: Set[int],
+    max_workers: Optional[int] = None,
+    backend: Optional[str] = None,
+    time_budget: Optional[float] = None,
+) -> Dict[int, RosterResult]:
+    # Maybe get cached results
+    backend = optimizer.backend if backend is None else backend
+    cache = optimizer.cache
+    results: Dict[int, RosterResult] = {}
+    keys: Dict[int, str] = {}
+    if cache is not None:
+        for team, team_picks in picks_idx.items():
+            keys[team] = optimizer.cache_key(team, team_picks, picked_idx, backend)
+            cached = cache.get(keys[team])
+            if cached is not None:
+                results[team] = cached
+    to_solve = {team: team_picks for team, team_picks in picks_idx.items() if team not in results}
+    if len(to_solve) == 0:
+        return results
+
+    # Get available players (shared by all teams) and those already picked by each team
+    context = optimizer.context
+    available, fixed = context.masks(to_solve, picked_idx)
+
+    # Solve (solves in worker processes are only timed as a whole)
+    with span("solve_teams", teams=len(to_solve), backend=backend):
+        solved = optimizer.solve_teams(
+            available, fixed, max_workers=max_workers, backend=backend, time_budget=time_budget
+        )
+
+    # Maybe cache
+    for team, result in solved.items():
+        if cache is not None and cacheable(result, backend):
+            cache.put(keys[team], result)
+    results.update(solved)
+    results = {team: results[team] for team in picks_idx.keys()}
+
+    return results
@@ -1,30 +1,135 @@
 import os
-from typing import List
+from typing import Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
+from draft_optimizer.app.lineup import availability
+from draft_optimizer.app.stochastic import PointSamples
+from draft_optimizer.app.table import PlayerTable, get_players_path, read_players
+from draft_optimizer.src.models import ProSchedule
+from draft_optimizer.src.platform.cache import PLAYERS_TTL
 from draft_optimizer.src.platform.espn import League as ESPNLeague
+from draft_optimizer.src.platform.sleeper import League as SleeperLeague
+from draft_optimizer.src.platform.sleeper import espn_pick_ids
+from draft_optimizer.src.trace import count, span
 from draft_optimizer.src.utils import DATA_DIR
 
 
 @st.experimental_memo(show_spinner=False)
 def load_players(points_mode: str, year: int) -> pd.DataFrame:
-    # Load data
-    points_mode = points_mode.lower().replace(" ", "_")
-    players_path = os.path.join(DATA_DIR, "production", str(year), f"players_{points_mode}.csv")
-    players = pd.read_csv(players_path)
-    players["id"] = players["id"].astype(str)
-    players = players.set_index(["id", "name", "position", "pro_team"])
+    # Load data (only runs on a memo miss)
+    count("memo.load_players.misses")
+    players_path = get_players_path(points_mode, year)
+    players = read_players(players_path)
 
     return players
 
 
-def sync_picks(league_id: str, platform: str, year: int) -> List[str]:
+@st.experimental_memo(show_spinner=False)
+def load_table(points_mode: str, year: int) -> PlayerTable:
+    # Load the compiled bundle (compiling the CSV on first use); callers index into the table by row
+    count("memo.load_table.misses")
+    players_path = get_players_path(points_mode, year)
+    table = PlayerTable.from_csv(players_path)
+
+    return table
+
+
+def get_samples_path(points_mode: str, year: int) -> str:
+    points_mode = points_mode.lower().replace(" ", "_")
+    return os.path.join(DATA_DIR, "production", str(year), f"samples_{points_mode}")
+
+
+@st.experimental_singleton(show_spinner=False)
+def load_samples(points_mode: str, year: int) -> Optional[PointSamples]:
+    # Memory-mapped and read-only, so shared rather than copied per session; `None` if no projection samples were saved
+    count("memo.load_samples.misses")
+    path = get_samples_path(points_mode, year)
+    samples = PointSamples.load(path)
+
+    # Maybe compile draws written by the projection pipeline (see `src/projections.py`)
+    draws_path = os.path.join(os.path.dirname(path), f"draws_{os.path.basename(path)[len('samples_'):]}.npz")
+    if not os.path.isfile(draws_path):
+        return samples
+    if samples is not None and os.path.getmtime(os.path.join(path, "meta.json")) >= os.path.getmtime(draws_path):
+        return samples
+    with np.load(draws_path, allow_pickle=False) as data:
+        if data["draws"].size == 0:
+            return samples
+        samples = PointSamples.from_draws(
+            load_table(points_mode, year), data["player_ids"], data["weeks"], data["draws"]
+        )
+    try:
+        samples.save(path)
+    except OSError:
+        pass  # ex: read-only data directory
+
+    return samples
+
+
+@st.experimental_memo(show_spinner=False)
+def load_availability(
+    points_mode: str, year: int, league_id: Optional[str] = None, platform: Optional[str] = None
+) -> Optional[np.ndarray]:
+    # Weeks x players mask of pro games (`False` on byes), from ESPN or the schedule saved with the production data
+    count("memo.load_availability.misses")
+    schedule: Optional[ProSchedule] = None
+    team_ids: Dict[str, int] = {}
+    if platform == "ESPN" and league_id is not None:
+        try:
+            pro_teams, schedule = get_espn_league(league_id, year).get_pro_schedule_table()
+            team_ids = {team.abbrev: team.id for team in pro_teams.values()}
+        except Exception:  # ex: offline; fall back to the saved schedule
+            schedule = None
+    if schedule is None:
+        prod_dir = os.path.dirname(get_players_path(points_mode, year))
+        schedule_path = os.path.join(prod_dir, "pro_schedule.csv")
+        teams_path = os.path.join(prod_dir, "pro_teams.csv")
+        if not os.path.isfile(schedule_path) or not os.path.isfile(teams_path):
+            return None
+        schedule = ProSchedule.from_frame(pd.read_csv(schedule_path))
+        teams = pd.read_csv(teams_path)
+        team_ids = dict(zip(teams["abbrev"].astype(str).str.upper(), teams["id"].astype(int)))
+
+    return availability(load_table(points_mode, year), schedule, team_ids)
+
+
+@st.experimental_singleton(show_spinner=False)
+def get_espn_league(league_id: str, year: int) -> ESPNLeague:
+    # Reused across syncs; its request cache only refetches picks once they're stale
+    return ESPNLeague(id=league_id, year=year)
+
+
+@st.experimental_singleton(show_spinner=False)
+def get_sleeper_league(league_id: str, year: int) -> SleeperLeague:
+    # Reused across syncs, like the ESPN league
+    return SleeperLeague(id=league_id, year=year)
+
+
+@st.experimental_memo(show_spinner=False, ttl=PLAYERS_TTL)
+def load_sleeper_ids(league_id: str, year: int, points_mode: str) -> Dict[int, int]:
+    # Map Sleeper players to the table's (ESPN) IDs; refreshed with the player dump
+    count("memo.load_sleeper_ids.misses")
+    table = load_table(points_mode, year)
+    positions = np.array(table.pos_keys, dtype=object)[table.positions]
+    mapping = get_sleeper_league(league_id, year).get_espn_ids(table.names, positions, table.ids)
+
+    return mapping
+
+
+def sync_picks(league_id: str, platform: str, year: int, points_mode: str) -> List[str]:
     picks: List[str] = []
-    if platform == "ESPN":  # note: ESPN picks don't update mid-draft
-        league = ESPNLeague(id=league_id, year=year)
-        pick_objs = league.get_picks()
-        picks = [str(p.player_id) for p in pick_objs]
+    with span("sync_picks", platform=platform) as attrs:
+        if platform == "ESPN":  # note: ESPN picks don't update mid-draft
+            league = get_espn_league(league_id, year)
+            pick_objs = league.get_picks()
+            picks = [str(p.player_id) for p in pick_objs]
+        elif platform == "Sleeper":
+            # Tables are keyed by ESPN ID; unmatched players are skipped by the page
+            league = get_sleeper_league(league_id, year)
+            picks = espn_pick_ids(league.get_picks(), load_sleeper_ids(league_id, year, points_mode))
+        attrs["picks"] = len(picks)
 
     return picks
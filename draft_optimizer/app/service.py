@@ -0,0 +1,331 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Hashable, Optional, Set
+
+import numpy as np
+
+from draft_optimizer.app.marginal import MarginalScorer, MarginalValues
+from draft_optimizer.app.optimize import GAP_TOL, RosterOptimizer, RosterResult, poss_opt_picks, poss_opt_picks_all
+from draft_optimizer.src.trace import record
+
+# Specify the default wall-clock budget for a job (seconds)
+TIME_BUDGET = 10.0
+
+# Specify how many finished jobs to keep for polling
+MAX_FINISHED = 32
+
+# Specify job statuses; "timeout" jobs ran out of time before proving every roster optimal
+STATUSES = ["queued", "running", "done", "timeout", "cancelled", "failed"]
+FINAL_STATUSES = ["done", "timeout", "cancelled", "failed"]
+
+
+def job_key(
+    picks_idx: Dict[int, Set[int]],
+    picked_idx: Set[int],
+    backend: str,
+    time_budget: Optional[float],
+    team: Optional[int] = None,
+) -> Hashable:
+    # Identify a job by what it solves, so resubmitting the same draft state (ex: on a rerun) finds it
+    teams = tuple((int(t), tuple(sorted(team_picks))) for t, team_picks in sorted(picks_idx.items()))
+
+    return teams, tuple(sorted(picked_idx)), backend, time_budget, None if team is None else int(team)
+
+
+class OptimizeJob:
+    """
+    A request to optimize every team's roster at a draft state, filled in by `OptimizeService` as rosters are found.
+
+    `results` maps each team to the best roster found so far; `version` counts updates, for polling. Jobs with a
+    `team` score that team's available players instead (see `MarginalScorer`), filling in `marginals` when done.
+    """
+
+    def __init__(
+        self,
+        job_id: int,
+        generation: int,
+        picks_idx: Dict[int, Set[int]],
+        picked_idx: Set[int],
+        backend: str,
+        time_budget: Optional[float],
+        warm_starts: Optional[Dict[int, np.ndarray]] = None,
+        team: Optional[int] = None,
+    ):
+        # Save data
+        self.id = job_id
+        self.generation = generation
+        self.picks_idx = {t: set(team_picks) for t, team_picks in picks_idx.items()}
+        self.picked_idx = set(picked_idx)
+        self.backend = backend
+        self.time_budget = time_budget
+        self.warm_starts = {} if warm_starts is None else dict(warm_starts)
+        self.team = team
+        self.key = job_key(picks_idx, picked_idx, backend, time_budget, team)
+
+        # Save state; results are replaced rather than updated, so readers always see a consistent dict
+        self.status = "queued"
+        self.version = 0
+        self.results: Dict[int, RosterResult] = {}
+        self.marginals: Optional[MarginalValues] = None
+        self.error: Optional[Exception] = None
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINAL_STATUSES
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (time.time() if self.finished is None else self.finished) - self.started
+
+
+class OptimizeService:
+    """
+    Background worker that runs roster optimizations (and player scoring) off the page's script thread, one job at a
+    time; every solve on the service's optimizer goes through it, so the page never waits on the optimizer's lock.
+
+    Jobs are tagged with a generation (ex: the draft log's last event), and submitting one cancels the queued and
+    running jobs of earlier generations, since a newer pick makes their results obsolete. Each job first publishes the
+    heuristic's rosters for every team, then re-solves the teams with its backend across the optimizer's process pool,
+    splitting what's left of its `time_budget` between the pool's rounds of solves. Every backend's solves stop at their
+    share, keeping the best roster found, and a running job is cancelled between passes, so it stops within one pass's
+    time.
+    """
+
+    def __init__(self, optimizer: RosterOptimizer, max_workers: Optional[int] = None):
+        # Save data
+        self.optimizer = optimizer
+        self.max_workers = max_workers
+        self.generation = 0
+        self.version = 0
+        self.last_error: Optional[Exception] = None
+        self._scorer: Optional[MarginalScorer] = None  # built on first use
+        self._jobs: Dict[int, OptimizeJob] = {}
+        self._queue: Deque[OptimizeJob] = deque()
+        self._next_id = 0
+        self._changed = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(
+        self,
+        picks_idx: Dict[int, Set[int]],
+        picked_idx: Set[int],
+        generation: int,
+        backend: Optional[str] = None,
+        time_budget: Optional[float] = TIME_BUDGET,
+        warm_starts: Optional[Dict[int, np.ndarray]] = None,
+        team: Optional[int] = None,
+    ) -> OptimizeJob:
+        """
+        Queue a job (without waiting for it) and return it; an unfailed job for the same state is returned instead.
+
+        Jobs of earlier generations are cancelled, and a job of an earlier generation than one already submitted is
+        cancelled as soon as it's made. `warm_starts` (team -> roster mask) are set on the optimizer when the job runs.
+        With a `team`, the job scores the team's available players (`backend` must be one of `BACKENDS`).
+        """
+        backend = self.optimizer.backend if backend is None else backend
+        key = job_key(picks_idx, picked_idx, backend, time_budget, team)
+        with self._changed:
+            # Maybe reuse a job
+            for job in self._jobs.values():
+                if job.key == key and job.generation == generation and job.status not in ["cancelled", "failed"]:
+                    return job
+
+            # Cancel obsolete jobs
+            self.generation = max(self.generation, generation)
+            for job in self._jobs.values():
+                if job.generation < self.generation and not job.done:
+                    self._finish(job, "cancelled")
+            self._queue = deque(job for job in self._queue if not job.done)
+
+            # Queue
+            job = OptimizeJob(self._next_id, generation, picks_idx, picked_idx, backend, time_budget, warm_starts, team)
+            self._next_id += 1
+            self._jobs[job.id] = job
+            if generation < self.generation:
+                self._finish(job, "cancelled")
+            else:
+                self._queue.append(job)
+            self._prune()
+            self.version += 1
+            self._changed.notify_all()
+
+        return job
+
+    def get(self, job_id: Optional[int]) -> Optional[OptimizeJob]:
+        with self._changed:
+            return self._jobs.get(job_id) if job_id is not None else None
+
+    def cancel(self, job: OptimizeJob):
+        with self._changed:
+            if not job.done:
+                self._finish(job, "cancelled")
+                self._queue = deque(j for j in self._queue if j is not job)
+
+    def wait(self, versions: Dict[int, int], timeout: Optional[float] = None) -> bool:
+        # Wait for any job (by ID) to move past its version; returns whether one did
+        with self._changed:
+            return self._changed.wait_for(
+                lambda: any(
+                    job_id in self._jobs and self._jobs[job_id].version != version
+                    for job_id, version in versions.items()
+                ),
+                timeout=timeout,
+            )
+
+    def _finish(self, job: OptimizeJob, status: str):
+        # Must hold the lock
+        job.status = status
+        job.finished = time.time()
+        job.version += 1
+        self.version += 1
+        self._changed.notify_all()
+
+    def _publish(self, job: OptimizeJob, results: Dict[int, RosterResult], keep_better: bool = False) -> bool:
+        # Save teams' rosters (or, if comparable, keep the last if it's better); returns whether the job is still live
+        with self._changed:
+            if job.done:
+                return False
+            job_results = dict(job.results)
+            for team, result in results.items():
+                last = job_results.get(team)
+                if keep_better and last is not None and last.roster is not None:
+                    if result.roster is None or result.value < last.value:
+                        result = last.copy(update={"bound": min(result.bound, last.bound)})
+                job_results[team] = result
+            job.results = job_results
+            job.version += 1
+            self.version += 1
+            self._changed.notify_all()
+
+        return True
+
+    def _prune(self):
+        # Must hold the lock; forget the oldest finished jobs
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[0 : max(0, len(finished) - MAX_FINISHED)]:
+            del self._jobs[job_id]
+
+    def _run_scores(self, job: OptimizeJob):
+        # Score players in one pass (the relaxation is built on first use)
+        assert job.team is not None
+        if self._scorer is None:
+            self._scorer = MarginalScorer(self.optimizer)
+        marginals = self._scorer.score(
+            job.team,
+            job.picks_idx,
+            job.picked_idx,
+            max_workers=self.max_workers,
+            backend=job.backend,
+            time_budget=job.time_budget,
+        )
+        with self._changed:
+            if not job.done:
+                job.marginals = marginals
+                self._finish(job, "done")
+
+    def _run_job(self, job: OptimizeJob):
+        optimizer = self.optimizer
+        deadline = None if job.time_budget is None else time.perf_counter() + job.time_budget
+        for team, roster in job.warm_starts.items():
+            optimizer.set_warm_start(team, roster)
+
+        # Publish quick rosters for every team
+        results = {
+            team: poss_opt_picks(optimizer, team, job.picks_idx, job.picked_idx, backend="greedy")
+            for team in job.picks_idx.keys()
+        }
+        if not self._publish(job, results):
+            return
+
+        # Improve them with the job's backend; if it has the heuristic's objective, leave out rosters proven optimal
+        comparable = job.backend in ["auto", "milp"]
+        if job.backend != "greedy":
+            teams = [team for team, result in results.items() if not comparable or result.gap > GAP_TOL]
+            time_budget = None
+            if deadline is not None:
+                # Each worker solves its share of the teams in turn
+                max_workers = (os.cpu_count() or 1) if self.max_workers is None else self.max_workers
+                time_budget = (deadline - time.perf_counter()) / math.ceil(len(teams) / max_workers)
+            if len(teams) > 0 and (time_budget is None or time_budget > 0):
+                picks_idx = {team: job.picks_idx[team] for team in teams}
+                results = poss_opt_picks_all(
+                    optimizer,
+                    picks_idx,
+                    job.picked_idx,
+                    max_workers=self.max_workers,
+                    backend=job.backend,
+                    time_budget=time_budget,
+                )
+                if not self._publish(job, results, keep_better=comparable):
+                    return
+
+        # Finish; MILP results stopped short of optimal (or never improved) ran out of time, while other backends'
+        # bounds are only relaxations, so their gaps don't tell
+        with self._changed:
+            if not job.done:
+                proven = all(result.gap <= GAP_TOL for result in job.results.values())
+                timed = deadline is not None and comparable
+                self._finish(job, "timeout" if timed and not proven else "done")
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Get the next job
+            with self._changed:
+                self._changed.wait_for(lambda: len(self._queue) > 0 or self._stop.is_set())
+                if self._stop.is_set():
+                    break
+                job = self._queue.popleft()
+                job.status = "running"
+                job.started = time.time()
+                job.version += 1
+                self.version += 1
+                self._changed.notify_all()
+
+            # Run
+            try:
+                if job.team is None:
+                    self._run_job(job)
+                else:
+                    self._run_scores(job)
+                self.last_error = None
+            except Exception as e:  # keep serving after a failed job
+                self.last_error = e
+                with self._changed:
+                    job.error = e
+                    self._finish(job, "failed")
+            record(
+                "service.job",
+                1000 * job.elapsed,
+                status=job.status,
+                backend=job.backend,
+                teams=len(job.results),
+                scores=job.team is not None,
+                queued_ms=1000 * ((job.started or job.submitted) - job.submitted),
+            )
+
+    def start(self):
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="optimize-service", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        with self._changed:
+            self._stop.set()
+            self._changed.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
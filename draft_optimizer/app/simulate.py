@@ -0,0 +1,262 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from draft_optimizer.app.optimize import OptimizerContext
+
+
+def get_universe(context: OptimizerContext, rank_key: np.ndarray, picked: np.ndarray, num_remaining: int) -> np.ndarray:
+    # Limit to players that could realistically be drafted (by rank or by projections); keeps the arrays small
+    table = context.table
+    available = np.flatnonzero(context.pool & ~picked)
+    num_keep = min(len(available), 2 * num_remaining + 50)
+    by_rank = available[np.argsort(rank_key[available], kind="stable")[:num_keep]]
+    by_points = available[np.argsort(-table.sum_weeks[available], kind="stable")[:num_keep]]
+    universe = np.union1d(by_rank, by_points)
+
+    return universe
+
+
+def simulate_chunk(
+    context: OptimizerContext,
+    draft_order: np.ndarray,
+    draft_rows: np.ndarray,
+    team: int,
+    candidates: np.ndarray,
+    num_sims: int,
+    opponent: str = "adp",
+    noise: float = 0.25,
+    seed: Optional[int] = None,
+    top_k: int = 4,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Play out `num_sims` drafts per candidate, vectorized across simulations.
+
+    Each simulation draws one noisy board of ADP (or projection) ranks, and opponents take the best player left on it,
+    subject to position limits. The team takes the candidate at its next pick (if it's still there) and otherwise
+    greedily maximizes its minimum weekly points over the `top_k` most projected players left at each position. Every
+    candidate sees the same boards, so their scores are directly comparable.
+
+    Returns `(scores, available)`, each shaped candidates x sims; `scores` is the team's final min weekly points and
+    `available` is whether the candidate was still there at the team's next pick.
+    """
+    # Get data
+    table = context.table
+    num_teams = int(draft_order.max()) + 1
+    num_pos = len(context.min_pos_const)
+
+    # Map players to constrained positions; unconstrained positions (the last slot) can't be drafted
+    player_pos_idx, min_pos, max_pos = context.pos_limits()
+    min_pos, max_pos = min_pos[:num_pos], max_pos[:num_pos]
+
+    # Get state of the draft so far
+    num_picked = len(draft_rows)
+    picked = table.mask(draft_rows)
+    pick_teams = draft_order[0:num_picked]
+    base_counts = np.zeros((num_teams, num_pos + 1), dtype=np.int64)
+    np.add.at(base_counts, (pick_teams, player_pos_idx[draft_rows]), 1)
+    base_counts = base_counts[:, :num_pos]
+    base_totals = table.points[:, draft_rows[pick_teams == team]].sum(axis=1)
+
+    # Get opponent ranks
+    if opponent == "adp":
+        rank_key = table.adp
+    elif opponent == "projections":
+        rank_key = np.argsort(np.argsort(-table.sum_weeks, kind="stable")).astype(np.float32) + 1
+    else:
+        raise ValueError(f"Invalid opponent model: {opponent}")
+
+    # Limit players and sort them into position blocks
+    universe = get_universe(context, rank_key, picked, len(draft_order) - num_picked)
+    universe = universe[player_pos_idx[universe] < num_pos]
+    universe = universe[np.argsort(player_pos_idx[universe], kind="stable")]
+    pos_idx = player_pos_idx[universe]
+    starts = np.searchsorted(pos_idx, np.arange(num_pos), side="left")
+    ends = np.searchsorted(pos_idx, np.arange(num_pos), side="right")
+    points = table.points[:, universe].T  # players x weeks
+    sum_weeks = table.sum_weeks[universe]
+    num_univ = len(universe)
+
+    # Get candidates' columns
+    col_of = {row: col for col, row in enumerate(universe.tolist())}
+    if any(cand not in col_of for cand in candidates.tolist()):
+        raise ValueError("Candidates must be available players in the pool.")
+    cand_cols = np.array([col_of[cand] for cand in candidates.tolist()], dtype=np.int64)
+
+    # Draw noisy boards and sort each position block by them (opponents) and by projections (the team)
+    rng = np.random.default_rng(seed)
+    log_rank = np.log(np.maximum(rank_key[universe], 1))
+    board = log_rank + noise * rng.standard_normal((num_sims, num_univ), dtype=np.float32)
+    opp_order = np.empty((num_sims, num_univ), dtype=np.int64)
+    my_order = np.empty(num_univ, dtype=np.int64)
+    for g in range(num_pos):
+        block = slice(starts[g], ends[g])
+        opp_order[:, block] = starts[g] + np.argsort(board[:, block], axis=1, kind="stable")
+        my_order[block] = starts[g] + np.argsort(-sum_weeks[block], kind="stable")
+    opp_board = np.take_along_axis(board, opp_order, axis=1).ravel()  # board values in each simulation's order
+    opp_cols = opp_order.ravel()
+    window = np.arange(top_k)
+
+    # Get the team's remaining picks; nothing after the last one affects its roster
+    team_picks = np.flatnonzero(draft_order[num_picked:] == team) + num_picked
+    if len(team_picks) == 0:
+        raise ValueError("Team has no remaining picks.")
+    next_pick, last_pick = team_picks[0], team_picks[-1]
+
+    # Prepare to index flattened (simulation, player) arrays
+    sims = np.arange(num_sims)
+    offsets = sims * num_univ
+    last_col = num_univ - 1
+
+    def advance(head: np.ndarray, order: np.ndarray, taken: np.ndarray, g: np.ndarray, per_sim: bool):
+        # Move each simulation's pointer for position `g` past taken players
+        active = sims
+        while len(active) > 0:
+            h = head[active, g]
+            pos = np.minimum(h, last_col)
+            cols = order[offsets[active] + pos] if per_sim else order[pos]
+            move = (h < ends[g]) & taken[offsets[active] + cols]
+            active, g = active[move], g[move]
+            head[active, g] += 1
+
+    def play(
+        state: Tuple[np.ndarray, ...], k_start: int, k_end: int, cand: Optional[int] = None
+    ) -> Optional[np.ndarray]:
+        # Play picks `k_start` to `k_end` (exclusive) in place; returns whether the candidate was available
+        taken, opp_head, my_head, counts, totals = state
+        cand_allowed = None
+        for k in range(k_start, k_end):
+            # Get allowed positions (leaving room to fill position minimums)
+            t = draft_order[k]
+            team_counts = counts[:, t]
+            remaining = context.num_players - team_counts.sum(axis=1)
+            unmet = np.maximum(min_pos - team_counts, 0).sum(axis=1)
+            allowed_pos = (team_counts < max_pos) & (remaining > 0)[:, None]
+            allowed_pos &= ~(unmet >= remaining)[:, None] | (team_counts < min_pos)
+
+            # Pick
+            if t != team:
+                # Opponents take the best player left on their board
+                heads = offsets[:, None] + np.minimum(opp_head, last_col)
+                key = np.where(allowed_pos & (opp_head < ends), opp_board[heads], np.inf)
+                best_pos = np.argmin(key, axis=1)
+                choice = opp_cols[heads[sims, best_pos]]
+                valid = np.isfinite(key[sims, best_pos])
+            else:
+                # Greedily maximize min weekly points (ties go to total points)
+                idx = my_head[:, :, None] + window
+                cols = my_order[np.minimum(idx, last_col)]
+                ok = (idx < ends[None, :, None]) & allowed_pos[:, :, None]
+                ok &= ~taken[offsets[:, None, None] + cols]
+                cols, ok = cols.reshape(num_sims, -1), ok.reshape(num_sims, -1)
+                new_min = (totals[:, None, :] + points[cols]).min(axis=2)
+                gain = np.where(ok, new_min + 1e-3 * sum_weeks[cols], -np.inf)
+                best = np.argmax(gain, axis=1)
+                choice = cols[sims, best]
+                valid = ok[sims, best]
+
+                # Take the candidate if possible
+                if k == next_pick and cand is not None:
+                    cand_allowed = ~taken[offsets + cand] & allowed_pos[:, pos_idx[cand]]
+                    choice = np.where(cand_allowed, cand, choice)
+                    valid |= cand_allowed
+
+            # Update state
+            g = pos_idx[choice]
+            picked_sims = sims[valid]
+            taken[offsets[valid] + choice[valid]] = True
+            counts[picked_sims, t, g[valid]] += 1
+            if t == team:
+                totals[picked_sims] += points[choice[valid]]
+            advance(opp_head, opp_cols, taken, g, per_sim=True)
+            advance(my_head, my_order, taken, g, per_sim=False)
+
+        return cand_allowed
+
+    # Play out the picks before the team's next pick once (they don't depend on the candidate)
+    opp_head = np.broadcast_to(starts, (num_sims, num_pos)).copy()
+    base_state = (
+        np.zeros(num_sims * num_univ, dtype=bool),
+        opp_head,
+        opp_head.copy(),
+        np.broadcast_to(base_counts, (num_sims,) + base_counts.shape).copy(),
+        np.broadcast_to(base_totals, (num_sims, len(base_totals))).astype(np.float32),
+    )
+    play(base_state, num_picked, next_pick)
+
+    # Loop over candidates
+    scores = np.zeros((len(candidates), num_sims), dtype=np.float32)
+    was_available = np.zeros((len(candidates), num_sims), dtype=bool)
+    for c, cand in enumerate(cand_cols):
+        state = tuple(a.copy() for a in base_state)
+        was_available[c] = play(state, next_pick, last_pick + 1, cand)
+        scores[c] = state[4].min(axis=1)
+
+    return scores, was_available
+
+
+def simulate_picks(
+    context: OptimizerContext,
+    draft_order: np.ndarray,
+    draft_rows: np.ndarray,
+    team: int,
+    candidates: Optional[np.ndarray] = None,
+    num_candidates: int = 10,
+    num_sims: int = 1000,
+    opponent: str = "adp",
+    noise: float = 0.25,
+    seed: int = 0,
+    chunk_size: int = 250,
+    max_workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Rank candidate picks for a team by expected min weekly points over simulated drafts.
+
+    Simulations are split into chunks that run in parallel across a process pool. By default, candidates are the most
+    projected available players.
+    """
+    # Get candidates
+    table = context.table
+    draft_order = np.asarray(draft_order, dtype=np.int64)
+    draft_rows = np.asarray(draft_rows, dtype=np.int64)
+    if candidates is None:
+        # Limit to positions the team can still fill
+        team_rows = draft_rows[draft_order[0 : len(draft_rows)] == team]
+        open_pos = np.zeros(table.num_players, dtype=bool)
+        for pos, max_num in context.max_pos_const.items():
+            is_pos = table.pos_mask(pos)
+            if is_pos[team_rows].sum() < max_num:
+                open_pos |= is_pos
+        available = context.pool & open_pos & ~table.mask(draft_rows)
+        candidates = table.top(available, num_candidates)
+    candidates = np.sort(np.asarray(candidates, dtype=np.int64))
+
+    # Split simulations into chunks with independent seeds
+    chunk_sizes: List[int] = [chunk_size] * (num_sims // chunk_size)
+    if num_sims % chunk_size > 0:
+        chunk_sizes.append(num_sims % chunk_size)
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(len(chunk_sizes))]
+    args = [
+        (context, draft_order, draft_rows, team, candidates, size, opponent, noise, chunk_seed)
+        for size, chunk_seed in zip(chunk_sizes, seeds)
+    ]
+
+    # Simulate
+    if max_workers == 1 or len(args) == 1:
+        results = [simulate_chunk(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(simulate_chunk, *zip(*args)))
+    scores = np.concatenate([r[0] for r in results], axis=1)
+    was_available = np.concatenate([r[1] for r in results], axis=1)
+
+    # Summarize
+    out = table.frame(candidates)
+    out["exp_min_points"] = scores.mean(axis=1)
+    out["std_min_points"] = scores.std(axis=1)
+    out["p_available"] = was_available.mean(axis=1)
+    out = out.sort_values("exp_min_points", ascending=False).reset_index(drop=True)
+
+    return out
@@ -0,0 +1,330 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+from draft_optimizer.app.heuristic import TOL, allowed_positions, week_bounds
+from draft_optimizer.app.optimize import GAP_TOL, OptimizerContext, RosterResult, RosterSolver
+from draft_optimizer.app.table import ArrayModel, PlayerTable
+
+# Specify risk objectives over each sample's min weekly points
+OBJECTIVES = ["cvar", "expected"]
+ALPHA = 0.2  # CVaR tail: the mean of the worst 20% of samples
+
+# Specify search defaults
+MAX_SAMPLES = 256
+TOP_K = 30  # candidates per position
+MAX_ELEMENTS = 4_000_000  # samples x weeks x candidates scored at once
+
+
+def risk(mins: np.ndarray, objective: str = "cvar", alpha: float = ALPHA) -> np.ndarray:
+    """
+    Reduce min weekly points over samples (the first axis) to a risk-adjusted value.
+
+    "expected" is the mean; "cvar" is the mean of the worst `alpha` fraction of samples (conditional value at risk),
+    which rewards rosters with high floors.
+    """
+    if objective == "expected":
+        return mins.mean(axis=0)
+    if objective == "cvar":
+        num_tail = max(int(np.ceil(alpha * len(mins))), 1)
+        return np.partition(mins, num_tail - 1, axis=0)[0:num_tail].mean(axis=0)
+
+    raise ValueError(f"Invalid objective: {objective}")
+
+
+class PointSamples(ArrayModel):
+    """
+    Samples of weekly points (ex: posterior predictive draws), aligned to a player table's rows and weeks.
+
+    Players and weeks without draws take the table's projections in every sample.
+    """
+
+    samples: np.ndarray  # samples x weeks x players
+    digest: str  # hash of the samples; keys cached results
+
+    @classmethod
+    def from_draws(
+        cls,
+        table: PlayerTable,
+        player_ids: Sequence[Any],
+        weeks: Sequence[int],
+        draws: np.ndarray,
+        max_samples: Optional[int] = MAX_SAMPLES,
+        seed: int = 0,
+    ) -> "PointSamples":
+        """
+        Make samples from draws in long format: `draws` is samples x observations, where each observation is a player
+        and week (ex: a row of the projection model's future frame).
+        """
+        # Maybe thin draws
+        draws = np.asarray(draws, dtype=np.float32)
+        if max_samples is not None and len(draws) > max_samples:
+            rng = np.random.default_rng(seed)
+            draws = draws[np.sort(rng.choice(len(draws), max_samples, replace=False))]
+
+        # Scatter draws over the projections
+        rows = np.array([table.rows.get(str(player_id), -1) for player_id in player_ids])
+        week_idx = np.array([table.weeks.index(f"week{w}") if f"week{w}" in table.weeks else -1 for w in weeks])
+        ok = (rows >= 0) & (week_idx >= 0)
+        samples = np.repeat(np.asarray(table.points, dtype=np.float32)[None], len(draws), axis=0)
+        samples[:, week_idx[ok], rows[ok]] = draws[:, ok]
+
+        # Hash
+        hasher = hashlib.sha1(table.digest.encode())
+        hasher.update(samples.tobytes())
+
+        return cls(samples=samples, digest=hasher.hexdigest())
+
+    @classmethod
+    def from_trace(
+        cls,
+        table: PlayerTable,
+        trace: Any,
+        player_ids: Sequence[Any],
+        weeks: Sequence[int],
+        var_name: str = "future_weekly_points",
+        max_samples: Optional[int] = MAX_SAMPLES,
+        seed: int = 0,
+    ) -> "PointSamples":
+        """
+        Make samples from a projection model's trace (ex: `weekly_proj_v6.ipynb`); `player_ids` and `weeks` label the
+        variable's observations.
+        """
+        posterior = trace.posterior[var_name]
+        draws = posterior.values.reshape(-1, posterior.shape[-1])  # chains and draws -> samples
+
+        return cls.from_draws(table, player_ids, weeks, draws, max_samples=max_samples, seed=seed)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["PointSamples"]:
+        # Load samples written by `save` (memory-mapped read-only); returns `None` if there are none
+        try:
+            with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        samples = cls.construct(
+            samples=np.load(os.path.join(path, "samples.npy"), mmap_mode="r"), digest=meta["digest"]
+        )
+        samples._lock_arrays()
+
+        return samples
+
+    def save(self, path: str):
+        # Write to a temporary directory and swap it in, like `PlayerTable.save`, so readers never see partial samples
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=parent, prefix=".samples_")
+        try:
+            np.save(os.path.join(tmp_dir, "samples.npy"), self.samples, allow_pickle=False)
+            with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"digest": self.digest}, f)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            os.replace(tmp_dir, path)
+        finally:
+            if os.path.isdir(tmp_dir):
+                shutil.rmtree(tmp_dir)
+
+    @property
+    def num_samples(self) -> int:
+        return self.samples.shape[0]
+
+
+def _candidates(sums: np.ndarray, pos_idx: np.ndarray, available: np.ndarray, top_k: int) -> np.ndarray:
+    # Get the `top_k` most projected players left at each position
+    candidates = np.flatnonzero(available)
+    keep = np.zeros(len(candidates), dtype=bool)
+    for pos in np.unique(pos_idx[candidates]):
+        is_pos = np.flatnonzero(pos_idx[candidates] == pos)
+        keep[is_pos[np.argsort(-sums[candidates[is_pos]], kind="stable")[:top_k]]] = True
+
+    return candidates[keep]
+
+
+def _score(totals: np.ndarray, cand_samples: np.ndarray, objective: str, alpha: float) -> np.ndarray:
+    # Risk of adding each candidate to rosters with `totals` (samples x weeks), in batches of candidates
+    num_samples, num_weeks, num_cands = cand_samples.shape
+    batch_size = max(MAX_ELEMENTS // max(num_samples * num_weeks, 1), 1)
+    scores = np.empty(num_cands)
+    for start in range(0, num_cands, batch_size):
+        stop = min(start + batch_size, num_cands)
+        mins = (totals[:, :, None] + cand_samples[:, :, start:stop]).min(axis=1)
+        scores[start:stop] = risk(mins, objective, alpha)
+
+    return scores
+
+
+def solve_stochastic(
+    samples: np.ndarray,
+    pos_idx: np.ndarray,
+    min_pos: np.ndarray,
+    max_pos: np.ndarray,
+    num_players: int,
+    available: np.ndarray,
+    fixed: np.ndarray,
+    objective: str = "cvar",
+    alpha: float = ALPHA,
+    warm_start: Optional[np.ndarray] = None,
+    top_k: int = TOP_K,
+    max_iters: int = 100,
+    deadline: Optional[float] = None,
+) -> Tuple[Optional[np.ndarray], float, float]:
+    """
+    Maximize a risk measure of each sample's min weekly points (a sample-average approximation); returns
+    `(roster, value, bound)`.
+
+    Like `solve_greedy`, slots are filled greedily and then improved with one-for-one swaps, but every roster is
+    scored over all samples. Candidates are the `top_k` players left at each position by mean points. The bound is
+    the risk measure of each sample's `week_bounds`, which no roster can beat in any sample. Swaps stop at `deadline`
+    (a `time.perf_counter` time), keeping the best roster so far.
+    """
+    # Get bound
+    sample_bounds = week_bounds(samples, pos_idx, max_pos, num_players, available, fixed).min(axis=1)
+    bound = float(risk(sample_bounds, objective, alpha))
+
+    # Get candidates
+    sums = samples.sum(axis=(0, 1), dtype=np.float64)
+    candidates = np.union1d(_candidates(sums, pos_idx, available & ~fixed, top_k), np.flatnonzero(fixed))
+    if warm_start is not None:
+        candidates = np.union1d(candidates, np.flatnonzero(warm_start & (available | fixed)))
+    cand_samples = np.asarray(samples[:, :, candidates], dtype=np.float64)
+    cand_pos = pos_idx[candidates]
+    in_roster = fixed[candidates].copy()
+
+    # Fill one slot at a time
+    counts = np.bincount(cand_pos[in_roster], minlength=len(min_pos))
+    totals = cand_samples[:, :, in_roster].sum(axis=2)
+    for num_remaining in range(num_players - int(in_roster.sum()), 0, -1):
+        ok = ~in_roster & allowed_positions(counts, min_pos, max_pos, num_remaining)[cand_pos]
+        if not ok.any():
+            return None, -np.inf, bound
+        scores = np.where(ok, _score(totals, cand_samples, objective, alpha) + TOL * sums[candidates], -np.inf)
+        best = int(np.argmax(scores))
+        in_roster[best] = True
+        counts[cand_pos[best]] += 1
+        totals += cand_samples[:, :, best]
+    if np.any(counts < min_pos) or np.any(counts > max_pos):
+        return None, -np.inf, bound
+
+    # Maybe start from the warm-start instead
+    value = float(risk(totals.min(axis=1), objective, alpha))
+    if warm_start is not None and warm_start.sum() == num_players and not np.any(fixed & ~warm_start):
+        warm = warm_start[candidates]
+        warm_counts = np.bincount(cand_pos[warm], minlength=len(min_pos))
+        if warm.sum() == num_players and np.all(warm_counts >= min_pos) and np.all(warm_counts <= max_pos):
+            warm_totals = cand_samples[:, :, warm].sum(axis=2)
+            warm_value = float(risk(warm_totals.min(axis=1), objective, alpha))
+            if warm_value > value:
+                in_roster, counts, totals, value = warm.copy(), warm_counts, warm_totals, warm_value
+
+    # Swap while it helps
+    is_fixed = fixed[candidates]
+    timed_out = False
+    for _ in range(max_iters):
+        best_value, best_swap = value + TOL, None
+        ins = np.flatnonzero(~in_roster)
+        for i in np.flatnonzero(in_roster & ~is_fixed):
+            # Stop at the deadline (the best swap so far still helps)
+            if deadline is not None and time.perf_counter() >= deadline:
+                timed_out = True
+                break
+
+            # Get swaps that keep position limits
+            out_pos, in_pos = cand_pos[i], cand_pos[ins]
+            ok = (in_pos == out_pos) | (
+                (counts[out_pos] - 1 >= min_pos[out_pos]) & (counts[in_pos] + 1 <= max_pos[in_pos])
+            )
+            if not ok.any():
+                continue
+
+            # Score them
+            scores = _score(totals - cand_samples[:, :, i], cand_samples[:, :, ins[ok]], objective, alpha)
+            j = int(np.argmax(scores))
+            if scores[j] > best_value:
+                best_value, best_swap = scores[j], (i, ins[ok][j])
+        if best_swap is None:
+            break
+
+        # Apply
+        i, j = best_swap
+        in_roster[i], in_roster[j] = False, True
+        counts[cand_pos[i]] -= 1
+        counts[cand_pos[j]] += 1
+        totals += cand_samples[:, :, j] - cand_samples[:, :, i]
+        value = float(best_value)
+        if timed_out:
+            break
+
+    # Get roster
+    roster = np.zeros(len(available), dtype=bool)
+    roster[candidates[in_roster]] = True
+
+    return roster, value, bound
+
+
+class StochasticSolver(RosterSolver):
+    """
+    Risk-aware rosters over samples of weekly points; see `solve_stochastic`. Values are the risk measure (ex: the
+    CVaR of min weekly points), not min weekly points.
+    """
+
+    name = "stochastic"
+
+    def __init__(self, context: OptimizerContext, samples: PointSamples, objective: str = "cvar", alpha: float = ALPHA):
+        # Check inputs
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Invalid objective: {objective}")
+        if samples.samples.shape[1:] != context.table.points.shape:
+            raise ValueError("Samples don't match the player table")
+
+        # Call super
+        super().__init__(context)
+
+        # Save data
+        self.samples = samples
+        self.objective = objective
+        self.alpha = alpha
+        self.pos_idx, self.min_pos, self.max_pos = context.pos_limits()
+
+    @property
+    def cache_id(self) -> str:
+        return f"{self.name}:{self.objective}:{self.alpha}:{self.samples.digest}"
+
+    def solve(
+        self,
+        upper: np.ndarray,
+        lower: np.ndarray,
+        warm_start: Optional[np.ndarray] = None,
+        time_limit: Optional[float] = None,
+    ) -> RosterResult:
+        # Solve
+        start = time.perf_counter()
+        roster, value, bound = solve_stochastic(
+            self.samples.samples,
+            self.pos_idx,
+            self.min_pos,
+            self.max_pos,
+            self.context.num_players,
+            upper & ~lower,
+            lower,
+            objective=self.objective,
+            alpha=self.alpha,
+            warm_start=warm_start,
+            deadline=None if time_limit is None else start + time_limit,
+        )
+
+        # Get result
+        result = RosterResult(
+            roster=roster, value=value, bound=bound, backend=self.name, solve_time=time.perf_counter() - start
+        )
+        status = "infeasible" if roster is None else "optimal" if result.gap <= GAP_TOL else "feasible"
+        self._trace(result, upper, lower, status)
+
+        return result
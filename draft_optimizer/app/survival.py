@@ -0,0 +1,115 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from draft_optimizer.app.table import PlayerTable
+
+# Specify ADP noise: the standard deviation of log draft position around a player's rank (like `simulate_picks`)
+NOISE = 0.25
+
+
+def norm_cdf(x: np.ndarray) -> np.ndarray:
+    # Standard normal CDF (Abramowitz and Stegun 26.2.17; error < 1e-7), without SciPy
+    z = np.abs(x)
+    t = 1 / (1 + 0.2316419 * z)
+    poly = t * (0.319381530 + t * (-0.356563782 + t * (1.781477937 + t * (-1.821255978 + t * 1.330274429))))
+    upper = np.exp(-0.5 * z * z) / np.sqrt(2 * np.pi) * poly
+
+    return np.where(x >= 0, 1 - upper, upper)
+
+
+def team_picks(draft_order: np.ndarray, team: int, num_picked: int) -> np.ndarray:
+    # A team's upcoming picks (overall pick numbers, starting from the pick on the clock)
+    return np.flatnonzero(np.asarray(draft_order)[num_picked:] == team) + num_picked
+
+
+class PickSurvival:
+    """
+    Probabilities that available players are still there at upcoming picks ("will they be there at my next pick?").
+
+    Each available player is ranked by ADP among the players left; the number of picks until they're taken is
+    lognormal around that rank (with `NOISE` as the standard deviation of its log), so a player survives the next `n`
+    picks with probability `P(rank * exp(NOISE * Z) > n + 1/2)`. Ranks are updated pick by pick, like `DraftBoard`,
+    and each table is one array operation over players and picks.
+    """
+
+    def __init__(self, table: PlayerTable, noise: float = NOISE):
+        # Order rows by ADP (ties by row)
+        self.table = table
+        self.noise = noise
+        num_players = table.num_players
+        rows = np.arange(num_players)
+        self._order = np.lexsort((rows, table.adp))
+        self._order_pos = np.empty(num_players, dtype=np.int64)
+        self._order_pos[self._order] = rows
+
+        # Track ADP ranks among available players (1-based, in ADP order; picked players keep stale ranks)
+        self._ranks = np.arange(1, num_players + 1, dtype=np.float64)
+        self.picks: List[int] = []
+        self.available = np.ones(num_players, dtype=bool)
+
+    def _pick(self, row: int):
+        # Players behind the pick move up one
+        self.available[row] = False
+        self._ranks[self._order_pos[row] + 1 :] -= 1
+
+    def _unpick(self, row: int):
+        self.available[row] = True
+        self._ranks[self._order_pos[row] + 1 :] += 1
+
+    def sync(self, draft_rows: Sequence[int]) -> Tuple[int, int]:
+        """
+        Match to a draft's picks (in order); returns `(num_undone, num_picked)`. See `DraftBoard.sync`.
+        """
+        # Get the common prefix
+        draft_rows = [int(row) for row in draft_rows]
+        num_kept = 0
+        for row, draft_row in zip(self.picks, draft_rows):
+            if row != draft_row:
+                break
+            num_kept += 1
+
+        # Undo, then pick
+        num_undone = len(self.picks) - num_kept
+        for row in reversed(self.picks[num_kept:]):
+            self._unpick(row)
+        for row in draft_rows[num_kept:]:
+            self._pick(row)
+        self.picks = draft_rows
+
+        return num_undone, len(draft_rows) - num_kept
+
+    def ranks(self) -> np.ndarray:
+        # ADP ranks among available players, by row (0 for picked players)
+        ranks = np.zeros(self.table.num_players)
+        ranks[self._order] = self._ranks
+        ranks[~self.available] = 0
+
+        return ranks
+
+    def probs(self, rows: np.ndarray, picks: np.ndarray) -> np.ndarray:
+        """
+        Probabilities that players (rows) are available at upcoming picks (overall pick numbers); players x picks.
+
+        Picked players get 0, and picks already made get 1 for available players.
+        """
+        # Get ranks and the number of picks made before each upcoming pick
+        rows = np.asarray(rows, dtype=np.int64)
+        ranks = np.maximum(self._ranks[self._order_pos[rows]], 1)  # picked players' ranks are stale
+        num_before = np.maximum(np.asarray(picks, dtype=np.float64) - len(self.picks), 0)
+
+        # Evaluate survival
+        z = (np.log(ranks)[:, None] - np.log(num_before + 0.5)[None, :]) / self.noise
+        probs = norm_cdf(z)
+        probs[:, num_before == 0] = 1
+        probs[~self.available[rows]] = 0
+
+        return probs
+
+    def next_pick_probs(self, rows: np.ndarray, draft_order: np.ndarray, team: int) -> np.ndarray:
+        # Probabilities that players are available at a team's next pick after the one on the clock
+        picks = team_picks(draft_order, team, len(self.picks) + 1)
+        if len(picks) == 0:
+            return np.zeros(len(rows))
+
+        return self.probs(rows, picks[0:1])[:, 0]
@@ -0,0 +1,185 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from draft_optimizer.app.service import TIME_BUDGET, OptimizeJob, OptimizeService
+from draft_optimizer.app.table import PlayerTable
+from draft_optimizer.src.platform.cache import VOLATILE_TTL
+
+# Specify default polling interval (seconds); platform picks are cached for as long anyway
+SYNC_INTERVAL = VOLATILE_TTL
+
+
+def diff_picks(local: Sequence[str], remote: Sequence[str]) -> Tuple[int, List[str]]:
+    """
+    Diff remote picks against local ones; returns `(num_kept, new_picks)`, the local picks to keep and those to append.
+
+    Remote picks that match the start of the local ones (ex: the platform lags behind picks entered locally) change
+    nothing; otherwise local picks are kept up to the first difference and replaced by the remote picks after it.
+    """
+    # Get the common prefix
+    num_kept = 0
+    for local_pick, remote_pick in zip(local, remote):
+        if local_pick != remote_pick:
+            break
+        num_kept += 1
+
+    # Local is up to date (or ahead)
+    if num_kept == len(remote):
+        return len(local), []
+
+    return num_kept, list(remote[num_kept:])
+
+
+def resolve_picks(
+    table: PlayerTable, draft_order: np.ndarray, picks: Sequence[str]
+) -> Tuple[np.ndarray, Dict[int, Set[int]], List[str]]:
+    """
+    Resolve picks (player IDs, in order) to table rows; returns `(draft_rows, picks_idx, missing)`.
+
+    `draft_rows` are the rows picked, in order, and `picks_idx` maps each team in `draft_order` to its rows. Picks of
+    players missing from the table (ex: no projections) are skipped and returned in `missing`, so a draft with them
+    can still be shown and optimized.
+    """
+    draft_order = np.asarray(draft_order)
+    draft_rows: List[int] = []
+    picks_idx: Dict[int, Set[int]] = {int(team): set() for team in np.unique(draft_order)}
+    missing: List[str] = []
+    for pick, player_id in enumerate(picks):
+        row = table.rows.get(str(player_id))
+        if row is None:
+            missing.append(str(player_id))
+            continue
+        draft_rows.append(row)
+        if pick < len(draft_order):
+            picks_idx[int(draft_order[pick])].add(row)
+
+    return np.array(draft_rows, dtype=np.int64), picks_idx, missing
+
+
+class DraftSync:
+    """
+    Background worker that polls a platform for picks every `interval` seconds and applies only what changed.
+
+    `picks` is the synced state and `version` increments whenever it changes; `on_update(picks, num_kept, new_picks)`
+    runs on the worker thread before each change is published (ex: to refresh the optimizer), so waiters only wake up
+    once it's done.
+    """
+
+    def __init__(
+        self,
+        fetch_picks: Callable[[], Sequence[str]],
+        picks: Sequence[str] = (),
+        interval: float = SYNC_INTERVAL,
+        max_picks: Optional[int] = None,
+        on_update: Optional[Callable[[List[str], int, List[str]], None]] = None,
+    ):
+        # Save data
+        self.fetch_picks = fetch_picks
+        self.interval = interval
+        self.max_picks = max_picks
+        self.on_update = on_update
+
+        # Save state
+        self._picks = list(picks)
+        self.version = 0
+        self.last_poll: Optional[float] = None
+        self.last_error: Optional[Exception] = None
+        self._changed = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def picks(self) -> List[str]:
+        with self._changed:
+            return list(self._picks)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def set_picks(self, picks: Sequence[str]):
+        # Replace the local state (ex: picks entered or rewound by hand)
+        with self._changed:
+            if list(picks) != self._picks:
+                self._picks = list(picks)
+                self.version += 1
+                self._changed.notify_all()
+
+    def poll(self) -> Tuple[int, List[str]]:
+        """
+        Fetch picks once and apply any new ones; returns `(num_kept, new_picks)` (see `diff_picks`).
+        """
+        # Get remote picks
+        remote = [str(p) for p in self.fetch_picks()]
+        if self.max_picks is not None:
+            remote = remote[0 : self.max_picks]
+
+        # Diff
+        with self._changed:
+            self.last_poll = time.time()
+            num_kept, new_picks = diff_picks(self._picks, remote)
+            if num_kept == len(self._picks) and len(new_picks) == 0:
+                return num_kept, new_picks
+            picks = self._picks[0:num_kept] + new_picks
+
+        # Maybe run callback
+        if self.on_update is not None:
+            self.on_update(list(picks), num_kept, new_picks)
+
+        # Publish changes
+        with self._changed:
+            self._picks = picks
+            self.version += 1
+            self._changed.notify_all()
+
+        return num_kept, new_picks
+
+    def wait(self, version: int, timeout: Optional[float] = None) -> bool:
+        # Wait for the state to move past `version`; returns whether it did
+        with self._changed:
+            return self._changed.wait_for(lambda: self.version != version, timeout=timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+                self.last_error = None
+            except Exception as e:  # keep polling through network errors
+                self.last_error = e
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="draft-sync", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+
+def refresh_optimizer(
+    service: OptimizeService,
+    draft_order: np.ndarray,
+    picks: Sequence[str],
+    generation: int,
+    backend: Optional[str] = None,
+    time_budget: Optional[float] = TIME_BUDGET,
+) -> OptimizeJob:
+    """
+    Queue every team's solve for synced picks on the optimizer service, so the page finds the job already running.
+    """
+    # Get picks by team, like the page
+    draft_rows, picks_idx, _ = resolve_picks(service.optimizer.context.table, draft_order, picks)
+    picked_idx = set(draft_rows.tolist())
+
+    # Submit (without waiting)
+    job = service.submit(picks_idx, picked_idx, generation, backend=backend, time_budget=time_budget)
+
+    return job
@@ -0,0 +1,300 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Iterable, List, Literal, Optional
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from draft_optimizer.src.utils import DATA_DIR
+
+# Specify columns
+INDEX_COLS = ["id", "name", "position", "pro_team"]
+DISPLAY_COLS = INDEX_COLS + ["sum_weeks"]
+
+# Specify compiled bundle format; bump the version when the layout changes so old bundles are rebuilt
+BUNDLE_VERSION = 1
+BUNDLE_ARRAYS = [
+    "ids",
+    "names",
+    "positions",
+    "pro_teams",
+    "points",
+    "sum_weeks",
+    "adp",
+    "display_names",
+    "display_order",
+]
+
+
+def get_players_path(points_mode: str, year: int) -> str:
+    points_mode = points_mode.lower().replace(" ", "_")
+    return os.path.join(DATA_DIR, "production", str(year), f"players_{points_mode}.csv")
+
+
+def read_players(players_path: str) -> pd.DataFrame:
+    # Read a production players CSV, indexed by `INDEX_COLS`
+    players = pd.read_csv(players_path)
+    players["id"] = players["id"].astype(str)
+    players = players.set_index(INDEX_COLS)
+
+    return players
+
+
+def bundle_path(players_path: str) -> str:
+    # Compiled bundle directory next to a players CSV (ex: `players_ppr.csv` -> `players_ppr/`)
+    return os.path.splitext(players_path)[0]
+
+
+class ArrayModel(BaseModel):
+    """
+    Immutable model whose NumPy arrays are read-only, so it can be shared across threads, cached, and pickled.
+    """
+
+    class Config:
+        arbitrary_types_allowed = True
+        allow_mutation = False
+        copy_on_model_validation = "none"
+
+    def __init__(self, **data):
+        # Call super
+        super().__init__(**data)
+
+        # Lock arrays
+        self._lock_arrays()
+
+    def __setstate__(self, state: Any):
+        # Call super
+        super().__setstate__(state)
+
+        # Lock arrays (unpickled arrays are writeable)
+        self._lock_arrays()
+
+    def _lock_arrays(self):
+        for value in self.__dict__.values():
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+
+
+class PlayerTable(ArrayModel):
+    """
+    Compiled player data, built once from `load_players` and indexed by row with boolean masks.
+
+    Tables can be saved as a bundle of `.npy` files (integer ids and categorical positions and teams) that loads
+    memory-mapped, without parsing; see `from_csv`.
+    """
+
+    ids: np.ndarray
+    names: np.ndarray
+    positions: np.ndarray  # position codes; see `pos_keys`
+    pos_keys: List[str]
+    pro_teams: np.ndarray
+    weeks: List[str]
+    points: np.ndarray  # weeks x players
+    sum_weeks: np.ndarray
+    adp: np.ndarray
+    display_names: np.ndarray
+    display_order: np.ndarray  # rows sorted by display name
+    rows: Dict[str, int]  # id -> row
+    digest: str  # hash of the player data; keys cached results
+
+    @classmethod
+    def from_players(cls, players: pd.DataFrame) -> "PlayerTable":
+        # Get data
+        players = players.reset_index()
+        week_cols = [c for c in players.columns if c.startswith("week")]
+        ids = players["id"].astype(str).to_numpy(dtype=object)
+        pos_codes, pos_uniques = pd.factorize(players["position"].astype(str))
+        pos_keys = [str(pos) for pos in pos_uniques]
+        points = np.ascontiguousarray(players[week_cols].fillna(0).values.T, dtype=np.float32)
+        names = players["name"].astype(str).to_numpy(dtype=object)
+        pro_teams = players["pro_team"].astype(str).to_numpy(dtype=object)
+        display_names = np.array(
+            [f"{name} ({pos_keys[code]}, {pro_team})" for name, code, pro_team in zip(names, pos_codes, pro_teams)],
+            dtype=object,
+        )
+
+        if "adp" in players.columns:
+            adp = players["adp"].fillna(len(players)).to_numpy(dtype=np.float32)
+        else:
+            adp = players["sum_weeks"].rank(ascending=False).to_numpy(dtype=np.float32)
+
+        # Hash the data that solves depend on
+        sum_weeks = players["sum_weeks"].to_numpy(dtype=np.float32)
+        hasher = hashlib.sha1()
+        hasher.update("\n".join(ids.tolist() + pos_keys).encode())
+        for arr in (pos_codes.astype(np.int8), points, sum_weeks):
+            hasher.update(arr.tobytes())
+
+        # Make table
+        table = cls(
+            ids=ids,
+            names=names,
+            positions=pos_codes.astype(np.int8),
+            pos_keys=pos_keys,
+            pro_teams=pro_teams,
+            weeks=week_cols,
+            points=points,
+            sum_weeks=sum_weeks,
+            adp=adp,
+            display_names=display_names,
+            display_order=np.argsort(display_names.astype(str), kind="stable"),
+            rows={player_id: row for row, player_id in enumerate(ids)},
+            digest=hasher.hexdigest(),
+        )
+
+        return table
+
+    @classmethod
+    def from_csv(cls, players_path: str, write_bundle: bool = True) -> "PlayerTable":
+        # Load the compiled bundle if it's up to date
+        path = bundle_path(players_path)
+        table = cls.load(path)
+        if table is not None and os.path.getmtime(os.path.join(path, "meta.json")) >= os.path.getmtime(players_path):
+            return table
+
+        # Parse the CSV and maybe compile it for next time
+        table = cls.from_players(read_players(players_path))
+        if write_bundle:
+            try:
+                table.save(path)
+            except OSError:
+                pass  # ex: read-only data directory
+
+        return table
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[Literal["r", "c"]] = "r") -> Optional["PlayerTable"]:
+        """
+        Load a bundle written by `save`; arrays are memory-mapped read-only. Returns `None` if there's no valid bundle.
+        """
+        # Load metadata
+        try:
+            with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != BUNDLE_VERSION:
+            return None
+
+        # Load arrays
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in BUNDLE_ARRAYS}
+        ids = np.asarray(arrays["ids"]).astype(str).astype(object)
+        team_keys = np.array(meta["team_keys"], dtype=object)
+
+        # Make table; skip validation, since the bundle was validated when it was saved
+        table = cls.construct(
+            ids=ids,
+            names=arrays["names"],
+            positions=arrays["positions"],
+            pos_keys=meta["pos_keys"],
+            pro_teams=team_keys[arrays["pro_teams"]],
+            weeks=meta["weeks"],
+            points=arrays["points"],
+            sum_weeks=arrays["sum_weeks"],
+            adp=arrays["adp"],
+            display_names=arrays["display_names"],
+            display_order=arrays["display_order"],
+            rows={player_id: row for row, player_id in enumerate(ids.tolist())},
+            digest=meta["digest"],
+        )
+        table._lock_arrays()
+
+        return table
+
+    def save(self, path: str):
+        """
+        Save as a bundle of `.npy` files plus `meta.json`, replacing any existing bundle at `path`.
+        """
+        # Store ids as integers if they round-trip
+        ids = self.ids.astype(str)
+        try:
+            int_ids = ids.astype(np.int64)
+            if np.array_equal(int_ids.astype(str), ids):
+                ids = int_ids
+        except ValueError:
+            pass
+
+        # Get arrays
+        team_codes, team_keys = pd.factorize(pd.Series(self.pro_teams, dtype=object).astype(str))
+        arrays = {
+            "ids": ids,
+            "names": self.names.astype(str),
+            "positions": self.positions,
+            "pro_teams": team_codes.astype(np.int16),
+            "points": np.ascontiguousarray(self.points),
+            "sum_weeks": self.sum_weeks,
+            "adp": self.adp,
+            "display_names": self.display_names.astype(str),
+            "display_order": self.display_order,
+        }
+        meta = {
+            "version": BUNDLE_VERSION,
+            "pos_keys": self.pos_keys,
+            "team_keys": [str(team) for team in team_keys],
+            "weeks": self.weeks,
+            "digest": self.digest,
+        }
+
+        # Write to a temporary directory and swap it in, so readers never see a partial bundle
+        parent = os.path.dirname(os.path.abspath(path))
+        tmp_dir = tempfile.mkdtemp(dir=parent, prefix=".bundle_")
+        try:
+            for name, arr in arrays.items():
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), arr, allow_pickle=False)
+            with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            os.replace(tmp_dir, path)
+        finally:
+            if os.path.isdir(tmp_dir):
+                shutil.rmtree(tmp_dir)
+
+    @property
+    def num_players(self) -> int:
+        return len(self.ids)
+
+    def rows_of(self, ids: Iterable[str], skip_missing: bool = False) -> np.ndarray:
+        # IDs missing from the table (ex: players without projections) raise `KeyError`, unless skipped
+        ids = (str(i) for i in ids)
+        if skip_missing:
+            return np.fromiter((self.rows[i] for i in ids if i in self.rows), dtype=np.int64)
+        return np.fromiter((self.rows[i] for i in ids), dtype=np.int64)
+
+    def mask(self, rows: Iterable[int]) -> np.ndarray:
+        mask = np.zeros(self.num_players, dtype=bool)
+        mask[np.fromiter(rows, dtype=np.int64)] = True
+
+        return mask
+
+    def pos_mask(self, pos: str) -> np.ndarray:
+        if pos not in self.pos_keys:
+            return np.zeros(self.num_players, dtype=bool)
+        return self.positions == self.pos_keys.index(pos)
+
+    def top(self, mask: np.ndarray, n: int) -> np.ndarray:
+        # Get rows with the most points, sorted
+        rows = np.flatnonzero(mask)
+        if len(rows) > n:
+            rows = rows[np.argpartition(-self.sum_weeks[rows], n - 1)[:n]]
+        rows = rows[np.argsort(-self.sum_weeks[rows], kind="stable")]
+
+        return rows
+
+    def frame(self, rows: np.ndarray) -> pd.DataFrame:
+        df = pd.DataFrame(
+            {
+                "id": self.ids[rows],
+                "name": self.names[rows],
+                "position": np.array(self.pos_keys, dtype=object)[self.positions[rows]],
+                "pro_team": self.pro_teams[rows],
+                "sum_weeks": self.sum_weeks[rows],
+            },
+            columns=DISPLAY_COLS,
+        )
+
+        return df
@@ -1,6 +1,8 @@
 import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
+import numpy as np
+import pandas as pd
 from pydantic import BaseModel
 
 
@@ -22,6 +24,94 @@ class Player(BaseModel):
     proj_weekly_points: Dict[int, float]
 
 
+class PlayerArrays(BaseModel):
+    """
+    Players held column-wise: parallel id, name, position, and team arrays plus weeks x players points arrays (NaN
+    where a player has no points for a week). Bulk loads from trusted data skip per-player validation.
+    """
+
+    ids: np.ndarray
+    names: np.ndarray
+    positions: np.ndarray
+    pro_teams: np.ndarray
+    weeks: np.ndarray
+    points: np.ndarray
+    weekly_points: np.ndarray  # weeks x players
+    proj_points: np.ndarray
+    proj_weekly_points: np.ndarray  # weeks x players
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]]) -> "PlayerArrays":
+        # Get weeks
+        weeks = sorted({w for r in records for k in ["weekly_points", "proj_weekly_points"] for w in r[k].keys()})
+        week_rows = {w: i for i, w in enumerate(weeks)}
+
+        # Fill points
+        weekly_points = np.full((len(weeks), len(records)), np.nan)
+        proj_weekly_points = np.full((len(weeks), len(records)), np.nan)
+        for j, r in enumerate(records):
+            for w, v in r["weekly_points"].items():
+                weekly_points[week_rows[w], j] = v
+            for w, v in r["proj_weekly_points"].items():
+                proj_weekly_points[week_rows[w], j] = v
+
+        # Make collection; records have `Player`'s fields and are trusted, so skip validation
+        players = cls.construct(
+            ids=np.fromiter((r["id"] for r in records), dtype=np.int64, count=len(records)),
+            names=np.array([r["name"] for r in records], dtype=object),
+            positions=np.array([r["position"] for r in records], dtype=object),
+            pro_teams=np.array([r["pro_team"] for r in records], dtype=object),
+            weeks=np.array(weeks, dtype=np.int64),
+            points=np.fromiter((r["points"] for r in records), dtype=float, count=len(records)),
+            weekly_points=weekly_points,
+            proj_points=np.fromiter((r["proj_points"] for r in records), dtype=float, count=len(records)),
+            proj_weekly_points=proj_weekly_points,
+        )
+
+        return players
+
+    @classmethod
+    def from_players(cls, players: Iterable[Player]) -> "PlayerArrays":
+        return cls.from_records([p.__dict__ for p in players])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def players(self) -> Iterator[Player]:
+        for j in range(len(self)):
+            yield self.player(j)
+
+    def player(self, j: int) -> Player:
+        # Materialize one player (ex: for code that expects models)
+        weekly = {int(w): float(v) for w, v in zip(self.weeks, self.weekly_points[:, j]) if not np.isnan(v)}
+        proj_weekly = {int(w): float(v) for w, v in zip(self.weeks, self.proj_weekly_points[:, j]) if not np.isnan(v)}
+        player = Player.construct(
+            id=int(self.ids[j]),
+            name=self.names[j],
+            position=self.positions[j],
+            pro_team=self.pro_teams[j],
+            points=float(self.points[j]),
+            weekly_points=weekly,
+            proj_points=float(self.proj_points[j]),
+            proj_weekly_points=proj_weekly,
+        )
+
+        return player
+
+    def to_frame(self, projected: bool = False) -> pd.DataFrame:
+        # Players x weeks frame (like the production players CSV) over the points array, without copying it
+        points = self.proj_weekly_points if projected else self.weekly_points
+        index = pd.MultiIndex.from_arrays(
+            [self.ids, self.names, self.positions, self.pro_teams], names=["id", "name", "position", "pro_team"]
+        )
+        frame = pd.DataFrame(points.T, index=index, columns=[f"week{w}" for w in self.weeks], copy=False)
+
+        return frame
+
+
 class ProGame(BaseModel):
     home_id: int
     away_id: int
@@ -32,6 +122,119 @@ class ProGame(BaseModel):
         return hash(repr(self))
 
 
+class ProSchedule(BaseModel):
+    """
+    Pro games held column-wise, sorted by week, date, and teams, with duplicates (ex: a game listed under both teams)
+    dropped on integer keys. Games are indexed by week (`week_offsets`) and by team (`opponents`).
+    """
+
+    home_ids: np.ndarray
+    away_ids: np.ndarray
+    weeks: np.ndarray
+    dates: np.ndarray  # datetime64[D]
+    week_offsets: np.ndarray  # games in week `w` are rows `week_offsets[w]:week_offsets[w + 1]`
+    opponents: np.ndarray  # teams x weeks opponent IDs (-1 without a game)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @classmethod
+    def from_arrays(
+        cls, home_ids: Iterable[int], away_ids: Iterable[int], weeks: Iterable[int], dates: Iterable[Any]
+    ) -> "ProSchedule":
+        # Dedupe and sort on integer keys
+        dates_arr = np.asarray(dates).astype("datetime64[D]")
+        keys = np.stack(
+            [
+                np.asarray(weeks, dtype=np.int64),
+                dates_arr.astype(np.int64),
+                np.asarray(home_ids, dtype=np.int64),
+                np.asarray(away_ids, dtype=np.int64),
+            ],
+            axis=1,
+        ).reshape(-1, 4)
+        keys = np.unique(keys, axis=0)
+        weeks_arr, home_arr, away_arr = keys[:, 0], keys[:, 2], keys[:, 3]
+
+        # Index by week and team
+        max_week = int(weeks_arr.max()) if len(keys) > 0 else 0
+        num_teams = int(max(home_arr.max(), away_arr.max())) + 1 if len(keys) > 0 else 0
+        week_offsets = np.searchsorted(weeks_arr, np.arange(max_week + 2))
+        opponents = np.full((num_teams, max_week + 1), -1, dtype=np.int64)
+        opponents[home_arr, weeks_arr] = away_arr
+        opponents[away_arr, weeks_arr] = home_arr
+
+        # Make schedule; arrays are built here, so skip validation
+        schedule = cls.construct(
+            home_ids=home_arr,
+            away_ids=away_arr,
+            weeks=weeks_arr,
+            dates=keys[:, 1].astype("datetime64[D]"),
+            week_offsets=week_offsets,
+            opponents=opponents,
+        )
+
+        return schedule
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "ProSchedule":
+        # Load a frame like `to_frame`'s (ex: a saved `pro_schedule.csv`)
+        return cls.from_arrays(frame["home_id"], frame["away_id"], frame["week"], pd.to_datetime(frame["date"]))
+
+    def __len__(self) -> int:
+        return len(self.weeks)
+
+    def week(self, week: int) -> slice:
+        if week < 0 or week + 1 >= len(self.week_offsets):
+            return slice(0, 0)
+        return slice(int(self.week_offsets[week]), int(self.week_offsets[week + 1]))
+
+    def team(self, team_id: int) -> np.ndarray:
+        # Rows of a team's games
+        return np.flatnonzero((self.home_ids == team_id) | (self.away_ids == team_id))
+
+    def bye_weeks(self) -> np.ndarray:
+        # First week without a game among weeks with games, by team (0 if none)
+        played = self.week_offsets[1:] > self.week_offsets[:-1]
+        byes = (self.opponents == -1) & played
+        bye_weeks = np.where(byes.any(axis=1), byes.argmax(axis=1), 0)
+
+        return bye_weeks
+
+    def by_week(self) -> Dict[int, List[ProGame]]:
+        # Games as models (ex: for `BaseLeague.get_pro_schedule`)
+        dates = self.dates.astype(object)
+        schedule: Dict[int, List[ProGame]] = {}
+        for i in range(len(self)):
+            week = int(self.weeks[i])
+            game = ProGame.construct(
+                home_id=int(self.home_ids[i]), away_id=int(self.away_ids[i]), week=week, date=dates[i]
+            )
+            schedule.setdefault(week, []).append(game)
+
+        return schedule
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {"home_id": self.home_ids, "away_id": self.away_ids, "week": self.weeks, "date": self.dates}
+        )
+
+    def team_frame(self) -> pd.DataFrame:
+        # One row per team per game, for joining against players by team
+        frame = pd.DataFrame(
+            {
+                "team_id": np.concatenate([self.home_ids, self.away_ids]),
+                "week": np.tile(self.weeks, 2),
+                "opponent_id": np.concatenate([self.away_ids, self.home_ids]),
+                "home": np.repeat([True, False], len(self)),
+                "date": np.tile(self.dates, 2),
+            }
+        )
+        frame = frame.sort_values(["team_id", "week", "date"], kind="stable", ignore_index=True)
+
+        return frame
+
+
 class ProTeam(BaseModel):
     id: int
     name: str
@@ -52,14 +255,23 @@ class BaseLeague(BaseModel):
     year: int
     name: Optional[str] = None
 
-    def get_pro_schedule(self) -> Tuple[Dict[int, ProTeam], Dict[int, List[ProGame]]]:  # pragma: no cover
+    def get_pro_schedule_table(self) -> Tuple[Dict[int, ProTeam], ProSchedule]:  # pragma: no cover
         raise NotImplementedError
 
+    def get_pro_schedule(self) -> Tuple[Dict[int, ProTeam], Dict[int, List[ProGame]]]:
+        # Games as models, by week; see `get_pro_schedule_table`
+        pro_teams, schedule = self.get_pro_schedule_table()
+        return pro_teams, schedule.by_week()
+
     def get_picks(self) -> List[Pick]:  # pragma: no cover
         raise NotImplementedError
 
     def get_players(self, max_players: Optional[int] = None) -> Dict[int, Player]:  # pragma: no cover
         raise NotImplementedError
 
+    def get_player_arrays(self, max_players: Optional[int] = None) -> PlayerArrays:
+        # Platforms override this to skip building (and validating) a model per player
+        return PlayerArrays.from_players(self.get_players(max_players).values())
+
     def get_teams(self) -> Dict[int, Team]:  # pragma: no cover
         raise NotImplementedError
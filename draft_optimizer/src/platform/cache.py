@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from draft_optimizer.src.trace import count
+from draft_optimizer.src.utils import DATA_DIR
+
+# Specify cache directory
+CACHE_DIR = os.path.join(DATA_DIR, "cache", "http")
+
+# Specify time-to-lives (seconds); static data changes rarely, while picks and rosters change during a draft
+SCHEDULE_TTL = 7 * 24 * 60 * 60  # pro schedule and pro teams
+PLAYERS_TTL = 24 * 60 * 60  # player info and projections
+VOLATILE_TTL = 15  # picks and rosters
+
+
+class ResponseCache:
+    """
+    Cache of JSON responses on disk (and in memory), keyed by request; each lookup gives how stale a response can be.
+
+    Writes are atomic, so several processes (ex: app sessions) can share a cache directory.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = CACHE_DIR):
+        # Save data
+        self.cache_dir = cache_dir
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        # Save entries (key -> (fetched at, response)) and counters
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        # Hash request parts (ex: platform, league, year, URL, params)
+        return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(str(self.cache_dir), f"{key}.json")
+
+    def get(self, key: str, ttl: float) -> Optional[Any]:
+        # Check memory, then disk
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None and self.cache_dir is not None:
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    raw = json.load(f)
+                entry = (raw["fetched_at"], raw["data"])
+            except (OSError, ValueError, KeyError):
+                entry = None
+
+        # Check age
+        with self._lock:
+            if entry is None or time.time() - entry[0] > ttl:
+                self.misses += 1
+                count("http_cache.misses")
+                return None
+            self.hits += 1
+            self._entries[key] = entry
+        count("http_cache.hits")
+
+        return entry[1]
+
+    def put(self, key: str, data: Any):
+        # Save to memory
+        entry = (time.time(), data)
+        with self._lock:
+            self._entries[key] = entry
+
+        # Save to disk
+        if self.cache_dir is not None:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({"fetched_at": entry[0], "data": data}, f)
+                os.replace(tmp_path, self._path(key))
+            except (OSError, TypeError):
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def fetch(self, key: str, ttl: float, fetch: Callable[[], Any]) -> Any:
+        # Get a fresh-enough response or refetch it
+        data = self.get(key, ttl)
+        if data is None:
+            data = fetch()
+            self.put(key, data)
+
+        return data
@@ -1,16 +1,189 @@
+import json
 import os
-from typing import Dict, List, Optional, Set, Tuple
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
+import numpy as np
 from espn_api.football import League as ESPN_League
+from espn_api.football.constant import POSITION_MAP, PRO_TEAM_MAP
+from espn_api.requests.espn_requests import EspnFantasyRequests
 
-from draft_optimizer.src.models import BaseLeague, Pick, Player, ProGame, ProTeam, Team
+from draft_optimizer.src.models import BaseLeague, Pick, Player, PlayerArrays, ProSchedule, ProTeam, Team
+from draft_optimizer.src.platform.cache import CACHE_DIR, PLAYERS_TTL, SCHEDULE_TTL, VOLATILE_TTL, ResponseCache
+from draft_optimizer.src.platform.fetch import BACKOFF, MAX_RETRIES, fetch_chunks, get_json, make_session
 
 # Get env vars
 ESPN_S2 = os.getenv("ESPN_FANTASY_S2")
 ESPN_SWID = os.getenv("ESPN_FANTASY_SWID")
 
+# Specify player fetching defaults
+CHUNK_SIZE = 500
+MAX_WORKERS = 8
+
+# Specify cache time-to-lives by view; requests for several views (ex: teams with rosters) use the shortest
+VIEW_TTLS = {"proTeamSchedules_wl": SCHEDULE_TTL, "players_wl": PLAYERS_TTL, "kona_playercard": PLAYERS_TTL}
+
+
+class CachedEspnRequests(EspnFantasyRequests):
+    """
+    ESPN requests that go through a response cache, so static data (ex: the pro schedule) isn't refetched for every
+    league and volatile data (ex: draft picks) is refetched at most every `VOLATILE_TTL` seconds.
+    """
+
+    def __init__(self, cache: ResponseCache, **kwargs):
+        # Call super
+        super().__init__(**kwargs)
+
+        # Save data
+        self.cache = cache
+
+    def _cached(self, fetch: Callable[[], Any], endpoint: str, params: Optional[dict], headers: Optional[dict]) -> Any:
+        # Get TTL
+        views = (params or {}).get("view", [])
+        views = [views] if isinstance(views, str) else views
+        ttl = min([VIEW_TTLS.get(view, VOLATILE_TTL) for view in views] or [VOLATILE_TTL])
+
+        # Fetch
+        key = self.cache.key("espn", self.league_id, self.year, endpoint, params, headers)
+        data = self.cache.fetch(key, ttl, fetch)
+
+        return data
+
+    def get(self, params: Optional[dict] = None, headers: Optional[dict] = None, extend: str = ""):
+        fetch = partial(super().get, params=params, headers=headers, extend=extend)
+        return self._cached(fetch, self.ENDPOINT + extend, params, headers)
+
+    def league_get(self, params: Optional[dict] = None, headers: Optional[dict] = None, extend: str = ""):
+        fetch = partial(super().league_get, params=params, headers=headers, extend=extend)
+        return self._cached(fetch, self.LEAGUE_ENDPOINT + extend, params, headers)
+
+
+def player_record(data: Dict[str, Any], year: int) -> Dict[str, Any]:
+    # Get player record
+    player = data["playerPoolEntry"]["player"] if "playerPoolEntry" in data else data.get("player", data)
+    name = player.get("fullName", data.get("fullName", ""))
+
+    # Get main position (D/ST is the only position with a "/")
+    position = ""
+    for slot in player.get("eligibleSlots", []):
+        slot_pos = POSITION_MAP.get(slot, "")
+        if (slot != 25 and "/" not in slot_pos) or "/" in name:
+            position = slot_pos
+            break
+
+    # Get actual and projected points by scoring period (0 is the season)
+    points: Dict[int, float] = {}
+    proj_points: Dict[int, float] = {}
+    for stats in player.get("stats", []):
+        if stats.get("seasonId") != year or stats.get("statSplitTypeId") == 2:
+            continue
+        period_points = points if stats.get("statSourceId") == 0 else proj_points
+        period_points[stats.get("scoringPeriodId")] = round(stats.get("appliedTotal", 0), 2)
+
+    # Make record (`Player`'s fields)
+    pro_team = PRO_TEAM_MAP.get(player.get("proTeamId"), "None")
+    record = {
+        "id": int(player.get("id", data.get("id"))),
+        "name": name,
+        "position": position,
+        "pro_team": pro_team.upper() if pro_team != "None" else None,
+        "points": float(points.get(0, 0)),
+        "weekly_points": {int(k): v for k, v in points.items() if k not in proj_points},
+        "proj_points": float(proj_points.get(0, 0)),
+        "proj_weekly_points": {},
+    }
+
+    return record
+
+
+def fetch_player_records(
+    endpoint: str,
+    player_ids: Sequence[int],
+    year: int,
+    scoring_period: int,
+    cookies: Optional[Dict[str, str]] = None,
+    cache: Optional[ResponseCache] = None,
+    chunk_size: int = CHUNK_SIZE,
+    max_workers: int = MAX_WORKERS,
+    max_retries: int = MAX_RETRIES,
+    backoff: float = BACKOFF,
+) -> Iterator[Dict[int, Dict[str, Any]]]:
+    """
+    Fetch player cards from a league endpoint in concurrent chunks, yielding each chunk's player records (see
+    `player_record`) as it arrives.
+
+    Responses are cached for `PLAYERS_TTL` seconds if a `cache` is given.
+    """
+    session = make_session(max_workers)
+
+    def fetch(chunk: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+        # Request player cards; ESPN filters are passed as a header
+        filters = {
+            "players": {
+                "filterIds": {"value": list(chunk)},
+                "filterStatsForTopScoringPeriodIds": {
+                    "value": scoring_period,
+                    "additionalValue": [f"00{year}", f"10{year}"],
+                },
+            }
+        }
+        headers = {"x-fantasy-filter": json.dumps(filters)}
+        params = {"view": "kona_playercard"}
+        fetch_raw = partial(
+            get_json, session, endpoint, params, headers, cookies, max_retries=max_retries, backoff=backoff
+        )
+        if cache is None:
+            raw = fetch_raw()
+        else:
+            raw = cache.fetch(cache.key("espn", endpoint, params, headers), PLAYERS_TTL, fetch_raw)
+
+        # Parse
+        records = [player_record(p, year) for p in raw.get("players", [])]
+        records_dict = {r["id"]: r for r in records}
+
+        return records_dict
+
+    try:
+        yield from fetch_chunks(fetch, player_ids, chunk_size, max_workers)
+    finally:
+        session.close()
+
+
+def fetch_players(
+    endpoint: str, player_ids: Sequence[int], year: int, scoring_period: int, **kwargs
+) -> Iterator[Dict[int, Player]]:
+    # Validate records into models; see `fetch_player_records`
+    for records in fetch_player_records(endpoint, player_ids, year, scoring_period, **kwargs):
+        yield {k: Player(**r) for k, r in records.items()}
+
+
+def parse_pro_schedule(raw: Dict[str, Any]) -> Tuple[Dict[int, ProTeam], ProSchedule]:
+    # Get teams (except FA)
+    teams = [t for t in raw["settings"]["proTeams"] if t["id"] != 0]
+    team_objs = {
+        t["id"]: ProTeam(
+            id=t["id"], name=t["name"], abbrev=t["abbrev"].upper(), location=t["location"], bye_week=t["byeWeek"]
+        )
+        for t in teams
+    }
+
+    # Flatten games (each is listed under both teams, and a team can have several a week; ex: rescheduled games)
+    games = [
+        (g["homeProTeamId"], g["awayProTeamId"], int(week), g["date"])
+        for t in teams
+        for week, week_games in t.get("proGamesByScoringPeriod", {}).items()
+        for g in week_games
+    ]
+    games_arr = np.array(games, dtype=np.int64).reshape(-1, 4)
+    dates = games_arr[:, 3].astype("datetime64[ms]")  # epoch milliseconds
+    schedule = ProSchedule.from_arrays(games_arr[:, 0], games_arr[:, 1], games_arr[:, 2], dates)
+
+    return team_objs, schedule
+
 
 class League(BaseLeague):
+    cache_dir: Optional[str] = CACHE_DIR  # `None` caches in memory only
+    _cache: ResponseCache
     _espn_league: ESPN_League
 
     class Config:
@@ -21,50 +194,34 @@ class League(BaseLeague):
         # Call super (assigns all but private attributes)
         super().__init__(**data)
 
-        # Generate private attributes
-        self._espn_league = ESPN_League(league_id=self.id, year=self.year, espn_s2=ESPN_S2, swid=ESPN_SWID)
+        # Generate private attributes; requests go through the cache, so set it up before fetching the league
+        self._cache = ResponseCache(self.cache_dir)
+        self._espn_league = ESPN_League(
+            league_id=self.id, year=self.year, espn_s2=ESPN_S2, swid=ESPN_SWID, fetch_league=False
+        )
+        espn_request = self._espn_league.espn_request
+        self._espn_league.espn_request = CachedEspnRequests(
+            cache=self._cache,
+            sport="nfl",
+            year=self.year,
+            league_id=self.id,
+            cookies=espn_request.cookies,
+            logger=espn_request.logger,
+        )
+        self._espn_league.fetch_league()
 
-    def get_pro_schedule(self) -> Tuple[Dict[int, ProTeam], Dict[int, List[ProGame]]]:
-        # Get raw data
+    def get_pro_schedule_table(self) -> Tuple[Dict[int, ProTeam], ProSchedule]:
+        # Get raw data, then parse
         raw = self._espn_league.espn_request.get_pro_schedule()
+        pro_teams, schedule = parse_pro_schedule(raw)
 
-        # Parse
-        teams = raw["settings"]["proTeams"]
-        team_objs: Dict[int, ProTeam] = {}
-        schedule: Dict[int, List[ProGame]] = {}
-        added: Set[ProGame] = set()
-        for team in teams:
-            if team["id"] != 0:  # FA
-                # Make team object
-                team_obj = ProTeam(
-                    id=team["id"],
-                    name=team["name"],
-                    abbrev=team["abbrev"].upper(),
-                    location=team["location"],
-                    bye_week=team["byeWeek"],
-                )
-                team_objs[team_obj.id] = team_obj
-
-                # Build schedule
-                games = team.get("proGamesByScoringPeriod", {})
-                for week, week_games in games.items():
-                    # Add week if missing
-                    if week not in schedule.keys():
-                        schedule[week] = []
-
-                    # Loop over games each week (won't necessarily be length 1; ex: rescheduled games)
-                    for game in week_games:
-                        # Make game object
-                        game_obj = ProGame(
-                            home_id=game["homeProTeamId"], away_id=game["awayProTeamId"], week=week, date=game["date"]
-                        )
-                        if game_obj not in added:
-                            schedule[week].append(game_obj)
-                            added |= {game_obj}
-
-        return team_objs, schedule
+        return pro_teams, schedule
 
     def get_picks(self) -> List[Pick]:
+        # Refresh picks (only refetched once the cached draft is stale)
+        self._espn_league.draft = []
+        self._espn_league.refresh_draft()
+
         # Get picks
         espn_picks = self._espn_league.draft
         picks = [
@@ -73,40 +230,59 @@ class League(BaseLeague):
 
         return picks
 
-    def get_players(self, max_players: Optional[int] = None) -> Dict[int, Player]:
+    def iter_player_records(
+        self, max_players: Optional[int] = None, chunk_size: int = CHUNK_SIZE, max_workers: int = MAX_WORKERS
+    ) -> Iterator[Dict[int, Dict[str, Any]]]:
         # Get player IDs
         player_ids = [k for k in self._espn_league.player_map.keys() if isinstance(k, int)]
         if max_players is not None:
             player_ids = player_ids[0:max_players]
 
+        # Get player records, chunk by chunk
+        espn_request = self._espn_league.espn_request
+        yield from fetch_player_records(
+            espn_request.LEAGUE_ENDPOINT,
+            player_ids,
+            self.year,
+            self._espn_league.finalScoringPeriod,
+            cookies=espn_request.cookies,
+            cache=self._cache,
+            chunk_size=chunk_size,
+            max_workers=max_workers,
+        )
+
+    def iter_players(
+        self, max_players: Optional[int] = None, chunk_size: int = CHUNK_SIZE, max_workers: int = MAX_WORKERS
+    ) -> Iterator[Dict[int, Player]]:
+        for records in self.iter_player_records(max_players, chunk_size=chunk_size, max_workers=max_workers):
+            yield {k: Player(**r) for k, r in records.items()}
+
+    def get_players(
+        self, max_players: Optional[int] = None, chunk_size: int = CHUNK_SIZE, max_workers: int = MAX_WORKERS
+    ) -> Dict[int, Player]:
         # Get players
-        chunk_size = 500
-        espn_players = []
-        for i in range(0, len(player_ids), chunk_size):
-            chunk = player_ids[i : i + chunk_size]
-            chunk_players = self._espn_league.player_info(playerId=chunk)
-            if not isinstance(chunk_players, list):
-                chunk_players = [chunk_players]
-            espn_players += chunk_players
-        players = [
-            Player(
-                id=p.playerId,
-                name=p.name,
-                position=p.position,
-                pro_team=p.proTeam.upper() if p.proTeam != "None" else None,
-                points=p.total_points,
-                weekly_points={k: v["points"] for k, v in p.stats.items() if "projected_points" not in v.keys()},
-                proj_points=p.projected_total_points,
-                proj_weekly_points={},
-            )
-            for p in espn_players
-            if p is not None
-        ]
-        players_dict = {p.id: p for p in players if p is not None}
+        players_dict: Dict[int, Player] = {}
+        for chunk_players in self.iter_players(max_players, chunk_size=chunk_size, max_workers=max_workers):
+            players_dict.update(chunk_players)
 
         return players_dict
 
+    def get_player_arrays(
+        self, max_players: Optional[int] = None, chunk_size: int = CHUNK_SIZE, max_workers: int = MAX_WORKERS
+    ) -> PlayerArrays:
+        # Get records (in fetched order), then build arrays in bulk
+        records = [
+            r
+            for chunk_records in self.iter_player_records(max_players, chunk_size=chunk_size, max_workers=max_workers)
+            for r in chunk_records.values()
+        ]
+
+        return PlayerArrays.from_records(records)
+
     def get_teams(self) -> Dict[int, Team]:
+        # Refresh teams and rosters (only refetched once the cached league is stale)
+        self._espn_league.refresh()
+
         # Get teams
         espn_teams = self._espn_league.teams
         teams = {
@@ -0,0 +1,89 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from draft_optimizer.src.trace import span
+
+# Specify request defaults
+TIMEOUT = 30
+MAX_RETRIES = 3
+BACKOFF = 0.5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def make_session(max_connections: int = 10) -> requests.Session:
+    # Keep connections alive across requests (and threads)
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    return session
+
+
+def get_json(
+    session: requests.Session,
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    cookies: Optional[Dict[str, str]] = None,
+    max_retries: int = MAX_RETRIES,
+    backoff: float = BACKOFF,
+    timeout: float = TIMEOUT,
+) -> Any:
+    """
+    GET a JSON response, retrying connection errors and retryable statuses with jittered exponential backoff.
+    """
+    with span("fetch", url=url) as attrs:
+        for attempt in range(max_retries + 1):
+            attrs["attempts"] = attempt + 1
+            try:
+                response = session.get(url, params=params, headers=headers, cookies=cookies, timeout=timeout)
+                attrs["status"] = response.status_code
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response.json()
+                error: Exception = requests.HTTPError(
+                    f"{response.status_code} for url: {response.url}", response=response
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            # Back off before retrying
+            if attempt < max_retries:
+                time.sleep(backoff * 2**attempt * (1 + random.random()))
+
+        raise error
+
+
+def chunked(items: Sequence[T], chunk_size: int) -> List[Sequence[T]]:
+    return [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+
+def fetch_chunks(
+    fetch: Callable[[Sequence[T]], R], items: Sequence[T], chunk_size: int, max_workers: int = 8
+) -> Iterator[R]:
+    """
+    Fetch `items` in chunks across a bounded thread pool, yielding each chunk's result as soon as it's done.
+    """
+    chunks = chunked(items, chunk_size)
+    if len(chunks) <= 1 or max_workers <= 1:
+        for chunk in chunks:
+            yield fetch(chunk)
+        return
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+        futures = [pool.submit(fetch, chunk) for chunk in chunks]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:  # ex: a chunk failed, or the caller stopped early
+                future.cancel()
@@ -0,0 +1,294 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import requests
+from espn_api.football.constant import PRO_TEAM_MAP
+
+from draft_optimizer.src.models import BaseLeague, Pick, Player, PlayerArrays, ProSchedule, ProTeam, Team
+from draft_optimizer.src.platform.cache import CACHE_DIR, PLAYERS_TTL, SCHEDULE_TTL, VOLATILE_TTL, ResponseCache
+from draft_optimizer.src.platform.fetch import BACKOFF, MAX_RETRIES, fetch_chunks, get_json, make_session
+
+# Specify endpoints; league data is on the documented API, while stats, projections, and schedules aren't
+API_URL = "https://api.sleeper.app/v1"
+STATS_URL = "https://api.sleeper.com"
+
+# Specify fetching defaults
+POSITIONS = ["DEF", "K", "QB", "RB", "TE", "WR"]
+NUM_WEEKS = 18
+MAX_WORKERS = 8
+
+# Map pro teams to ESPN's IDs, so players and schedules line up across platforms
+PRO_TEAM_IDS = {abbrev: team_id for team_id, abbrev in PRO_TEAM_MAP.items() if team_id != 0}
+PRO_TEAM_IDS["WAS"] = PRO_TEAM_IDS["WSH"]
+
+
+def player_id(sleeper_id: str) -> Optional[int]:
+    # Defenses are keyed by team; use ESPN's D/ST IDs for them
+    if sleeper_id in PRO_TEAM_IDS:
+        return -16000 - PRO_TEAM_IDS[sleeper_id]
+    if sleeper_id.isdigit():
+        return int(sleeper_id)
+
+    return None
+
+
+def sleeper_id(player_id: int) -> str:
+    # Invert `player_id` (ex: for tables keyed by Sleeper IDs)
+    if player_id < 0:
+        return PRO_TEAM_MAP[-16000 - player_id].replace("WSH", "WAS")
+
+    return str(player_id)
+
+
+def name_key(name: str, position: str) -> Tuple[str, str]:
+    # Normalize names for matching across platforms (ex: "D.J. Moore Jr." and "DJ Moore")
+    words = re.sub(r"[^a-z0-9 ]", "", name.lower()).split()
+    words = [w for w in words if w not in ["jr", "sr", "ii", "iii", "iv", "v"]]
+
+    return "".join(words), position
+
+
+def score(stats: Dict[str, float], scoring: Dict[str, float]) -> float:
+    # Score stats with a league's settings (keyed like the stats), falling back to PPR points
+    if len(scoring) == 0:
+        return round(stats.get("pts_ppr", 0), 2)
+
+    return round(sum(stats.get(k, 0) * v for k, v in scoring.items()), 2)
+
+
+def player_record(
+    data: Dict[str, Any], weekly_points: Dict[int, float], proj_weekly_points: Dict[int, float]
+) -> Optional[Dict[str, Any]]:
+    # Get ID
+    player_id_ = player_id(str(data.get("player_id", "")))
+    if player_id_ is None:
+        return None
+
+    # Get name and position
+    position = data.get("position") or ""
+    name = data.get("full_name") or f"{data.get('first_name', '')} {data.get('last_name', '')}".strip()
+    if position == "DEF":
+        position = "D/ST"
+        name = f"{data.get('last_name', '')} D/ST"
+
+    # Make record (`Player`'s fields)
+    pro_team = data.get("team")
+    record = {
+        "id": player_id_,
+        "name": name,
+        "position": position,
+        "pro_team": "WSH" if pro_team == "WAS" else pro_team,
+        "points": round(sum(weekly_points.values()), 2),
+        "weekly_points": weekly_points,
+        "proj_points": round(sum(proj_weekly_points.values()), 2),
+        "proj_weekly_points": proj_weekly_points,
+    }
+
+    return record
+
+
+def espn_ids(
+    dump: Mapping[str, Dict[str, Any]], names: Iterable[Any], positions: Iterable[Any], ids: Iterable[Any]
+) -> Dict[int, int]:
+    """
+    Map Sleeper players (by `player_id`) to ESPN IDs, so picks line up with ESPN-keyed player tables.
+
+    Players are matched by the player dump's `espn_id`, else by name and position among `names`/`positions`/`ids` (ex:
+    a table's players; names that aren't unique are skipped), like the production notebooks join Sleeper's players.
+    Defenses already use ESPN's D/ST IDs.
+    """
+    # Index ESPN players by name; ambiguous names map to nothing
+    by_name: Dict[Tuple[str, str], Optional[int]] = {}
+    for name, position, id_ in zip(names, positions, ids):
+        key = name_key(str(name), str(position))
+        by_name[key] = None if key in by_name else int(id_)
+
+    # Match players
+    mapping: Dict[int, int] = {}
+    for dump_id, data in dump.items():
+        player_id_ = player_id(str(data.get("player_id", dump_id)))
+        if player_id_ is None:
+            continue
+        espn_id = str(data.get("espn_id") or "")
+        if player_id_ < 0:
+            mapping[player_id_] = player_id_
+        elif espn_id.isdigit():
+            mapping[player_id_] = int(espn_id)
+        else:
+            record = player_record(data, {}, {})
+            match = None if record is None else by_name.get(name_key(record["name"], record["position"]))
+            if match is not None:
+                mapping[player_id_] = match
+
+    return mapping
+
+
+def espn_pick_ids(picks: Sequence[Pick], mapping: Mapping[int, Any]) -> List[str]:
+    # Get picks' ESPN IDs (see `espn_ids`); unmatched players keep their Sleeper ID, prefixed so it can't collide
+    return [
+        str(mapping[p.player_id]) if p.player_id in mapping else f"sleeper:{sleeper_id(p.player_id)}" for p in picks
+    ]
+
+
+class League(BaseLeague):
+    cache_dir: Optional[str] = CACHE_DIR  # `None` caches in memory only
+    api_url: str = API_URL
+    stats_url: str = STATS_URL
+    _cache: ResponseCache
+    _session: requests.Session
+    _league: Dict[str, Any]
+
+    class Config:
+        arbitrary_types_allowed = True
+        underscore_attrs_are_private = True
+
+    def __init__(self, **data):
+        # Call super (assigns all but private attributes)
+        super().__init__(**data)
+
+        # Generate private attributes
+        self._cache = ResponseCache(self.cache_dir)
+        self._session = make_session(MAX_WORKERS)
+        self._league = self._get(f"{self.api_url}/league/{self.id}", PLAYERS_TTL)
+        if self.name is None:
+            self.name = self._league.get("name")
+
+    def _get(
+        self,
+        url: str,
+        ttl: float,
+        params: Optional[Dict[str, Any]] = None,
+        max_retries: int = MAX_RETRIES,
+        backoff: float = BACKOFF,
+    ) -> Any:
+        # Fetch through the cache
+        key = self._cache.key("sleeper", url, params)
+        fetch = partial(get_json, self._session, url, params, max_retries=max_retries, backoff=backoff)
+        data = self._cache.fetch(key, ttl, fetch)
+
+        return data
+
+    def get_pro_schedule_table(self) -> Tuple[Dict[int, ProTeam], ProSchedule]:
+        # Get raw data
+        raw = self._get(f"{self.stats_url}/schedule/nfl/regular/{self.year}", SCHEDULE_TTL)
+
+        # Build schedule
+        games = [g for g in raw if g["home"] in PRO_TEAM_IDS and g["away"] in PRO_TEAM_IDS]
+        schedule = ProSchedule.from_arrays(
+            [PRO_TEAM_IDS[g["home"]] for g in games],
+            [PRO_TEAM_IDS[g["away"]] for g in games],
+            [int(g["week"]) for g in games],
+            np.array([g["date"] for g in games], dtype="datetime64[D]"),
+        )
+
+        # Make team objects; Sleeper only has abbreviations
+        bye_weeks = schedule.bye_weeks()
+        team_ids = np.unique(np.concatenate([schedule.home_ids, schedule.away_ids]))
+        team_objs: Dict[int, ProTeam] = {}
+        for team_id in team_ids.tolist():
+            abbrev = PRO_TEAM_MAP[team_id]
+            team_objs[team_id] = ProTeam(
+                id=team_id, name=abbrev, abbrev=abbrev, location=abbrev, bye_week=int(bye_weeks[team_id])
+            )
+
+        return team_objs, schedule
+
+    def get_picks(self) -> List[Pick]:
+        # Get raw data (refetched once stale)
+        draft_id = self._league.get("draft_id")
+        if draft_id is None:
+            return []
+        raw = self._get(f"{self.api_url}/draft/{draft_id}/picks", VOLATILE_TTL)
+
+        # Get picks
+        num_teams = self._league.get("total_rosters") or len({p["roster_id"] for p in raw}) or 1
+        picks = []
+        for p in sorted(raw, key=lambda p: p["pick_no"]):
+            player_id_ = player_id(str(p["player_id"]))
+            if player_id_ is not None:
+                pick = (p["pick_no"] - 1) % num_teams + 1
+                picks.append(Pick(round=p["round"], pick=pick, player_id=player_id_, team_id=p["roster_id"]))
+
+        return picks
+
+    def get_espn_ids(self, names: Iterable[Any], positions: Iterable[Any], ids: Iterable[Any]) -> Dict[int, int]:
+        # Map players to ESPN IDs (see `espn_ids`) with the player dump
+        dump = self._get(f"{self.api_url}/players/nfl", PLAYERS_TTL)
+
+        return espn_ids(dump, names, positions, ids)
+
+    def iter_weekly(
+        self, weeks: Sequence[int], modes: Sequence[str] = ("stats", "projections"), max_workers: int = MAX_WORKERS
+    ) -> Iterator[Tuple[str, int, List[Dict[str, Any]]]]:
+        """
+        Fetch weekly stats and/or projections concurrently, yielding `(mode, week, rows)` as each arrives.
+        """
+        params = {"season_type": "regular", "position[]": POSITIONS}
+
+        def fetch(chunk: Sequence[Tuple[str, int]]) -> Tuple[str, int, List[Dict[str, Any]]]:
+            mode, week = chunk[0]
+            rows = self._get(f"{self.stats_url}/{mode}/nfl/{self.year}/{week}", PLAYERS_TTL, params)
+            return mode, week, rows
+
+        yield from fetch_chunks(fetch, [(m, w) for m in modes for w in weeks], 1, max_workers)
+
+    def get_player_records(
+        self, max_players: Optional[int] = None, num_weeks: int = NUM_WEEKS, max_workers: int = MAX_WORKERS
+    ) -> List[Dict[str, Any]]:
+        # Get the player dump while weekly data is fetched
+        weekly: Dict[str, Dict[str, Dict[int, float]]] = {"stats": {}, "projections": {}}
+        scoring = self._league.get("scoring_settings") or {}
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            dump_future = pool.submit(self._get, f"{self.api_url}/players/nfl", PLAYERS_TTL)
+            for mode, week, rows in self.iter_weekly(range(1, num_weeks + 1), max_workers=max_workers):
+                for row in rows:
+                    if row.get("game_id") is not None:  # ex: byes
+                        points = score(row.get("stats") or {}, scoring)
+                        weekly[mode].setdefault(str(row["player_id"]), {})[week] = points
+            dump = dump_future.result()
+
+        # Parse players with stats or projections
+        player_ids = [k for k in dump.keys() if k in weekly["stats"] or k in weekly["projections"]]
+        if max_players is not None:
+            player_ids = player_ids[0:max_players]
+        records = [
+            player_record(dump[k], weekly["stats"].get(k, {}), weekly["projections"].get(k, {})) for k in player_ids
+        ]
+
+        return [r for r in records if r is not None]
+
+    def get_players(
+        self, max_players: Optional[int] = None, num_weeks: int = NUM_WEEKS, max_workers: int = MAX_WORKERS
+    ) -> Dict[int, Player]:
+        records = self.get_player_records(max_players, num_weeks=num_weeks, max_workers=max_workers)
+        return {r["id"]: Player(**r) for r in records}
+
+    def get_player_arrays(
+        self, max_players: Optional[int] = None, num_weeks: int = NUM_WEEKS, max_workers: int = MAX_WORKERS
+    ) -> PlayerArrays:
+        records = self.get_player_records(max_players, num_weeks=num_weeks, max_workers=max_workers)
+        return PlayerArrays.from_records(records)
+
+    def get_teams(self) -> Dict[int, Team]:
+        # Get raw data (refetched once stale)
+        users = self._get(f"{self.api_url}/league/{self.id}/users", VOLATILE_TTL)
+        rosters = self._get(f"{self.api_url}/league/{self.id}/rosters", VOLATILE_TTL)
+
+        # Get teams
+        users_dict = {u["user_id"]: u for u in users}
+        teams: Dict[int, Team] = {}
+        for roster in rosters:
+            user = users_dict.get(roster.get("owner_id"), {})
+            owner = user.get("display_name", "")
+            player_ids = [player_id(str(p)) for p in roster.get("players") or []]
+            teams[roster["roster_id"]] = Team(
+                id=roster["roster_id"],
+                name=(user.get("metadata") or {}).get("team_name") or owner,
+                owner=owner,
+                player_ids=[p for p in player_ids if p is not None],
+            )
+
+        return teams
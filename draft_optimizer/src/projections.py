@@ -0,0 +1,432 @@
+import argparse
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from draft_optimizer.src.models import ProSchedule
+from draft_optimizer.src.trace import count, span
+from draft_optimizer.src.utils import DATA_DIR
+
+# Specify model; bump the version when the model changes so cached fits are redone
+MODEL_VERSION = "v6"
+POSITIONS = ["QB", "RB", "TE", "WR"]  # modeled; other positions keep the platform's projections
+NUM_DRAWS = 1000
+NUM_TUNE = 2000
+MAX_SAMPLES = 500  # posterior draws kept per fit
+
+# Specify caches; bump the data version when the columnar layout changes
+CACHE_DIR = os.path.join(DATA_DIR, "cache", "projections")
+DATA_VERSION = 1
+
+# Weekly points are saved as dict reprs (ex: "{1: 10.5, 2: 3.0}")
+WEEKLY_PATTERN = re.compile(r"(\d+)\s*:\s*([^,}\s]+)")
+
+
+def get_league_dir(league_id: int, year: int) -> str:
+    # Scraped by `scrape_espn.ipynb`
+    return os.path.join(DATA_DIR, f"espn_{league_id}", str(year))
+
+
+def parse_weekly(player_ids: Sequence[int], values: Sequence[str]) -> pd.DataFrame:
+    """
+    Parse saved weekly points into long format (`player_id`, `week`, `points`), dropping weeks without points.
+    """
+    ids, weeks, points = [], [], []
+    for player_id, value in zip(player_ids, values):
+        if not isinstance(value, str):
+            continue
+        for week, week_points in WEEKLY_PATTERN.findall(value):
+            ids.append(player_id)
+            weeks.append(int(week))
+            points.append(float(week_points))
+    weekly = pd.DataFrame(
+        {
+            "player_id": np.array(ids, dtype=np.int64),
+            "week": np.array(weeks, dtype=np.int64),
+            "points": np.array(points, dtype=np.float64),
+        }
+    )
+
+    return weekly.loc[weekly["points"].notna()].reset_index(drop=True)
+
+
+def _write_atomic(path: str, write: Callable[[str], None]):
+    # Write to a temporary file and swap it in, so readers never see a partial file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _save_arrays(path: str, arrays: Dict[str, Any]):
+    def write(tmp_path: str):
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+
+    _write_atomic(path, write)
+
+
+def _save_frames(path: str, frames: Dict[str, pd.DataFrame]):
+    # Save frames column-wise, as one `.npz` (strings as fixed-width unicode, so no pickling)
+    arrays = {}
+    for name, frame in frames.items():
+        for col in frame.columns:
+            values = frame[col].to_numpy()
+            arrays[f"{name}/{col}"] = values.astype(str) if values.dtype == object else values
+
+    _save_arrays(path, arrays)
+
+
+def _load_frames(path: str) -> Dict[str, pd.DataFrame]:
+    columns: Dict[str, Dict[str, np.ndarray]] = {}
+    with np.load(path, allow_pickle=False) as data:
+        for key in data.files:
+            name, col = key.split("/", 1)
+            columns.setdefault(name, {})[col] = data[key]
+
+    return {name: pd.DataFrame(cols) for name, cols in columns.items()}
+
+
+def load_season(league_dir: str, cache_dir: str = CACHE_DIR) -> Dict[str, pd.DataFrame]:
+    """
+    Load a season's scraped CSVs as frames: `players`, `weekly` and `proj_weekly` (long format), `games` (one row per
+    team per game), and `teams`.
+
+    Parsed frames are cached column-wise, keyed by the CSVs' sizes and modification times, so later loads skip parsing.
+    """
+    # Maybe load from the cache
+    paths = [os.path.join(league_dir, f) for f in ["pro_players.csv", "pro_schedule.csv", "pro_teams.csv"]]
+    hasher = hashlib.sha1(f"{DATA_VERSION}".encode())
+    for path in paths:
+        stat = os.stat(path)
+        hasher.update(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    cache_path = os.path.join(cache_dir, "data", f"{hasher.hexdigest()}.npz")
+    if os.path.isfile(cache_path):
+        count("projections.data.hits")
+        return _load_frames(cache_path)
+    count("projections.data.misses")
+
+    # Parse
+    with span("projections.parse", league_dir=league_dir):
+        players_raw = pd.read_csv(paths[0])
+        player_cols = ["id", "name", "position", "pro_team", "points", "proj_points"]
+        players = players_raw[player_cols].copy()
+        players["pro_team"] = players["pro_team"].fillna("FA").astype(str)
+        weekly = parse_weekly(players_raw["id"].tolist(), players_raw["weekly_points"].tolist())
+        proj_weekly = parse_weekly(players_raw["id"].tolist(), players_raw["proj_weekly_points"].tolist())
+        games = ProSchedule.from_frame(pd.read_csv(paths[1])).team_frame().drop("date", axis=1)
+        teams = pd.read_csv(paths[2])[["id", "abbrev"]]
+    frames = {"players": players, "weekly": weekly, "proj_weekly": proj_weekly, "games": games, "teams": teams}
+
+    # Save
+    _save_frames(cache_path, frames)
+
+    return frames
+
+
+class ModelData(BaseModel):
+    """
+    Inputs to the projection model for a position and season: past weekly points by opponent and venue, and the
+    season's games for each projected player along with their projected season points.
+    """
+
+    position: str
+    year: int
+    years: List[int]  # past seasons, then the projected one
+    historic: pd.DataFrame  # year, week, player_id, opponent_id, home, points
+    future: pd.DataFrame  # week, player_id, opponent_id, home; sorted by player, then week
+    season_points: pd.Series  # by player_id, in `future`'s order
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @property
+    def digest(self) -> str:
+        # Hash everything the fit depends on
+        hasher = hashlib.sha1(f"{MODEL_VERSION}:{self.position}:{self.year}:{self.years}".encode())
+        for frame in (self.historic, self.future, self.season_points.reset_index()):
+            hasher.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+
+        return hasher.hexdigest()
+
+
+def _season_games(season: Dict[str, pd.DataFrame], position: str) -> pd.DataFrame:
+    # Join a season's players at a position to their team's games; games without an opponent are byes (-1)
+    players = season["players"]
+    players = players.loc[players["position"] == position, ["id", "pro_team"]]
+    team_ids = season["teams"].set_index("abbrev")["id"]
+    players = players.assign(team_id=players["pro_team"].map(team_ids)).dropna(subset=["team_id"])
+    players = players.astype({"team_id": np.int64}).rename({"id": "player_id"}, axis=1)
+    games = season["games"].merge(players[["player_id", "team_id"]], on="team_id").drop("team_id", axis=1)
+
+    return games
+
+
+def model_data(seasons: Dict[int, Dict[str, pd.DataFrame]], position: str, year: int) -> ModelData:
+    # Get past weekly points, with opponents and venues where known
+    years = sorted(y for y in seasons.keys() if y <= year)
+    historic_frames = []
+    for y in years[0:-1]:
+        season = seasons[y]
+        is_pos = season["players"].loc[season["players"]["position"] == position, "id"]
+        weekly = season["weekly"].loc[season["weekly"]["player_id"].isin(is_pos)]
+        historic_y = weekly.merge(_season_games(season, position), on=["player_id", "week"], how="left")
+        historic_frames.append(historic_y.assign(year=y))
+    historic_cols = ["year", "week", "player_id", "opponent_id", "home", "points"]
+    if len(historic_frames) > 0:
+        historic = pd.concat(historic_frames, axis=0, ignore_index=True)
+        historic = historic.fillna({"opponent_id": -1, "home": False}).astype({"opponent_id": np.int64, "home": bool})
+        historic = historic[historic_cols].sort_values(historic_cols[0:3], ignore_index=True)
+    else:
+        historic = pd.DataFrame({col: np.zeros(0, dtype=np.int64) for col in historic_cols})
+
+    # Get the projected season's games for players expected to play
+    season = seasons[year]
+    players = season["players"]
+    season_points = players.loc[(players["position"] == position) & (players["proj_points"] > 0)]
+    season_points = season_points.set_index("id")["proj_points"].sort_index()
+    season_points.index.name = "player_id"
+    future = _season_games(season, position)
+    future = future.loc[future["player_id"].isin(season_points.index)]
+    future = future[["week", "player_id", "opponent_id", "home"]].sort_values(["player_id", "week"], ignore_index=True)
+    season_points = season_points.loc[season_points.index.isin(future["player_id"])]
+
+    return ModelData(
+        position=position, year=year, years=years, historic=historic, future=future, season_points=season_points
+    )
+
+
+def fit_position(data: ModelData, draws: int = NUM_DRAWS, tune: int = NUM_TUNE, seed: int = 0) -> np.ndarray:
+    """
+    Fit the weekly projection model (`weekly_proj_v6.ipynb`) for a position; returns posterior draws of each future
+    game's points (samples x rows of `data.future`).
+
+    Needs PyMC (and JAX, which samples much faster).
+    """
+    import pymc as pm
+
+    try:
+        import pytensor.tensor as at
+    except ImportError:  # PyMC 4
+        import aesara.tensor as at
+
+    # Encode
+    historic, future = data.historic, data.future
+    teams = np.union1d(np.union1d(historic["opponent_id"], future["opponent_id"]), [-1])  # -1 for byes
+    players = np.union1d(historic["player_id"], future["player_id"])
+    coords = {"teams": teams, "players": players, "years": data.years}
+    hist_year_idx = np.searchsorted(data.years, historic["year"])
+    hist_opp_idx = np.searchsorted(teams, historic["opponent_id"])
+    hist_player_idx = np.searchsorted(players, historic["player_id"])
+    hist_home = historic["home"].to_numpy(dtype=float)
+    future_year_idx = np.full(len(future), len(data.years) - 1)
+    future_opp_idx = np.searchsorted(teams, future["opponent_id"])
+    future_player_idx = np.searchsorted(players, future["player_id"])
+    future_home = future["home"].to_numpy(dtype=float)
+
+    # Sum each player's games (rows are sorted by player)
+    future_players, player_rows = np.unique(future["player_id"], return_inverse=True)
+    cum_sum_matrix = (player_rows[None, :] == np.arange(len(future_players))[:, None]).astype(float)
+
+    def yearly_effect(name: str, std, offset, dims):
+        # Random walk over years (non-centered, for better sampling)
+        yearly = pm.Deterministic(f"yearly_{name}", std * offset, dims=dims)
+        zeros = at.shape_padleft(at.zeros_like(yearly[0, :]))
+        return pm.Deterministic(name, yearly - at.concatenate([zeros, yearly.cumsum(axis=0)[:-1]], axis=0), dims=dims)
+
+    with pm.Model(coords=coords):
+        # Opponent- and player-specific parameters
+        opp_std = pm.HalfNormal("opp_std", sigma=7)
+        opp_offset = pm.Normal("opp_offset", mu=0, sigma=7, dims=["years", "teams"])
+        opp = yearly_effect("opp", opp_std, opp_offset, ["years", "teams"])
+        player_std = pm.HalfNormal("player_std", sigma=7)
+        player_mu = pm.Normal("player_mu", mu=0, sigma=7)
+        player_offset = pm.Normal("player_offset", mu=0, sigma=7, dims=["years", "players"])
+        player = yearly_effect("player", player_std, player_offset + player_mu / player_std, ["years", "players"])
+
+        # Home-field advantage
+        yearly_home = pm.Normal("yearly_home", mu=0, sigma=1, dims="years")
+        home = pm.Deterministic("home", yearly_home - at.concatenate([[0.0], yearly_home.cumsum()[:-1]]), dims="years")
+
+        # Weekly points: centered on player traits, the opponent, and home-field advantage
+        historic_mu = (
+            player[hist_year_idx, hist_player_idx] + opp[hist_year_idx, hist_opp_idx] + home[hist_year_idx] * hist_home
+        )
+        future_mu = player[future_year_idx, future_player_idx] + opp[future_year_idx, future_opp_idx]
+        future_weekly_points = pm.Deterministic("future_weekly_points", future_mu + home[future_year_idx] * future_home)
+
+        # Likelihoods: past weekly points and projected season points
+        weekly_points_std = pm.HalfNormal("weekly_points_std", sigma=7)
+        if len(historic) > 0:
+            pm.Normal("historic_weekly_points", mu=historic_mu, sigma=weekly_points_std, observed=historic["points"])
+        season_points_std = pm.HalfNormal("season_points_std", sigma=7)
+        pm.Normal(
+            "future_season_points",
+            mu=at.dot(cum_sum_matrix, future_weekly_points),
+            sigma=season_points_std,
+            observed=data.season_points.to_numpy(),
+        )
+
+        # Sample
+        try:
+            import pymc.sampling_jax
+
+            trace = pymc.sampling_jax.sample_numpyro_nuts(draws=draws, tune=tune, random_seed=seed)
+        except ImportError:
+            trace = pm.sample(draws=draws, tune=tune, init="jitter+adapt_diag_grad", random_seed=seed)
+
+    posterior = trace.posterior["future_weekly_points"]
+
+    return posterior.values.reshape(-1, posterior.shape[-1])  # chains and draws -> samples
+
+
+class ProjectionResult(BaseModel):
+    players_path: str
+    draws_path: str
+    refit: List[str]  # positions fit (rather than loaded from the cache)
+
+
+def get_draws(
+    data: ModelData,
+    fit: Callable[[ModelData], np.ndarray] = fit_position,
+    cache_dir: str = CACHE_DIR,
+    force: bool = False,
+    seed: int = 0,
+) -> Tuple[np.ndarray, bool]:
+    """
+    Get posterior draws for a position and season, fitting only if its inputs (or the model) changed; returns
+    `(draws, refit)`. Draws are thinned to `MAX_SAMPLES` and cached by the inputs' hash.
+    """
+    # Maybe load from the cache
+    path = os.path.join(cache_dir, "fits", f"{data.position}_{data.year}_{MODEL_VERSION}_{data.digest}.npy")
+    if os.path.isfile(path) and not force:
+        count("projections.fits.hits")
+        return np.load(path), False
+    count("projections.fits.misses")
+
+    # Fit
+    with span("projections.fit", position=data.position, year=data.year, rows=len(data.historic)):
+        draws = np.asarray(fit(data), dtype=np.float32)
+    if len(draws) > MAX_SAMPLES:
+        rng = np.random.default_rng(seed)
+        draws = draws[np.sort(rng.choice(len(draws), MAX_SAMPLES, replace=False))]
+
+    # Save
+    def write(tmp_path: str):
+        with open(tmp_path, "wb") as f:
+            np.save(f, draws, allow_pickle=False)
+
+    _write_atomic(path, write)
+
+    return draws, True
+
+
+def update_projections(
+    league_id: int,
+    years: Sequence[int],
+    points_mode: str,
+    positions: Sequence[str] = POSITIONS,
+    fit: Callable[[ModelData], np.ndarray] = fit_position,
+    cache_dir: str = CACHE_DIR,
+    prod_dir: Optional[str] = None,
+    force: bool = False,
+) -> ProjectionResult:
+    """
+    Project the last of `years` from the others and write the production players table that `load_players` reads,
+    along with the posterior draws (for risk-aware drafting) and the season's schedule (for byes).
+
+    Modeled players get posterior mean weekly points; everyone else keeps the platform's weekly projections. Seasons
+    load through the columnar cache and positions are only refit when their inputs change.
+    """
+    # Load seasons
+    year = max(years)
+    seasons = {y: load_season(get_league_dir(league_id, y), cache_dir) for y in years}
+
+    # Get draws by position
+    refit = []
+    draws_frames = []
+    for position in positions:
+        data = model_data(seasons, position, year)
+        if len(data.future) == 0:
+            continue
+        draws, was_refit = get_draws(data, fit=fit, cache_dir=cache_dir, force=force)
+        if was_refit:
+            refit.append(position)
+        draws_frames.append((data.future, draws))
+
+    # Get weekly points: platform projections, replaced by posterior means where modeled
+    season = seasons[year]
+    weekly = season["proj_weekly"].set_index(["player_id", "week"])["points"]
+    for future, draws in draws_frames:
+        modeled = pd.Series(draws.mean(axis=0), index=pd.MultiIndex.from_frame(future[["player_id", "week"]]))
+        weekly = weekly.loc[~weekly.index.get_level_values("player_id").isin(future["player_id"])]
+        weekly = pd.concat([weekly, modeled.clip(lower=0)])
+    num_weeks = int(season["games"]["week"].max())
+    weekly_points = weekly.unstack("week").reindex(columns=range(1, num_weeks + 1)).fillna(0)
+    weekly_points.columns = [f"week{w}" for w in weekly_points.columns]
+
+    # Make the production table
+    players = season["players"].set_index("id")[["name", "position", "pro_team"]]
+    players = players.join(weekly_points, how="inner")
+    players["sum_weeks"] = players[weekly_points.columns].sum(axis=1)
+    players["adp"] = players["sum_weeks"].rank(ascending=False)
+    players.index.name = "id"
+
+    # Write the table and draws
+    prod_dir = os.path.join(DATA_DIR, "production", str(year)) if prod_dir is None else prod_dir
+    points_mode = points_mode.lower().replace(" ", "_")
+    players_path = os.path.join(prod_dir, f"players_{points_mode}.csv")
+    _write_atomic(players_path, lambda tmp_path: players.to_csv(tmp_path, index=True))
+    draws_path = os.path.join(prod_dir, f"draws_{points_mode}.npz")
+    draws_all: Dict[str, Any] = {
+        "player_ids": np.zeros(0, dtype=np.int64),
+        "weeks": np.zeros(0, dtype=np.int64),
+        "draws": np.zeros((0, 0), dtype=np.float32),
+    }
+    if len(draws_frames) > 0:
+        num_samples = min(len(draws) for _, draws in draws_frames)
+        draws_all["player_ids"] = np.concatenate([future["player_id"].to_numpy() for future, _ in draws_frames])
+        draws_all["weeks"] = np.concatenate([future["week"].to_numpy() for future, _ in draws_frames])
+        draws_all["draws"] = np.concatenate([draws[0:num_samples] for _, draws in draws_frames], axis=1)
+
+    _save_arrays(draws_path, draws_all)
+
+    # Copy the schedule, for lineup-aware solves (see `load_availability`)
+    league_dir = get_league_dir(league_id, year)
+    for name in ["pro_schedule.csv", "pro_teams.csv"]:
+        _write_atomic(os.path.join(prod_dir, name), partial(shutil.copyfile, os.path.join(league_dir, name)))
+
+    return ProjectionResult(players_path=players_path, draws_path=draws_path, refit=refit)
+
+
+def main():
+    # Parse args
+    parser = argparse.ArgumentParser(description="Refresh weekly projections and the production players table.")
+    parser.add_argument("--league-id", type=int, required=True)
+    parser.add_argument("--years", type=int, nargs="+", required=True, help="past seasons, then the projected one")
+    parser.add_argument("--points-mode", default="PPR", help="names the output (ex: players_ppr.csv)")
+    parser.add_argument("--positions", nargs="+", default=POSITIONS)
+    parser.add_argument("--force", action="store_true", help="refit even if the inputs haven't changed")
+    args = parser.parse_args()
+
+    # Run
+    result = update_projections(args.league_id, args.years, args.points_mode, args.positions, force=args.force)
+    print(f"Refit: {', '.join(result.refit) or 'none'}")
+    print(f"Wrote {result.players_path}")
+
+
+if __name__ == "__main__":
+    main()
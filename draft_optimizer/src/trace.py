@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from draft_optimizer.src.utils import DATA_DIR
+
+# Specify defaults
+MAX_EVENTS = 2000  # recent spans kept in memory
+LOG_PATH = os.path.join(DATA_DIR, "logs", "trace.jsonl")
+
+
+class Tracer:
+    """
+    Named spans (timings with attributes) and counters, cheap enough to leave on in the app.
+
+    Totals are kept per span name; only the most recent `max_events` spans are kept individually. Memoized functions
+    count `memo.<name>.misses` in their bodies (which only run on a miss) and are called inside a `<name>` span, so
+    hits are the spans that didn't miss.
+    """
+
+    def __init__(self, max_events: int = MAX_EVENTS):
+        self.enabled = True
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        self.counters: Dict[str, int] = {}
+        self._totals: Dict[str, List[float]] = {}  # name -> [count, total ms, max ms, last ms]
+        self._lock = threading.Lock()
+
+    def record(self, name: str, ms: float, **attrs: Any):
+        # Record a span timed elsewhere (ex: by a solver)
+        if not self.enabled:
+            return
+        event = {"name": name, "ts": time.time(), "ms": ms, "thread": threading.current_thread().name, **attrs}
+        with self._lock:
+            self.events.append(event)
+            totals = self._totals.setdefault(name, [0, 0.0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += ms
+            totals[2] = max(totals[2], ms)
+            totals[3] = ms
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        # Time a block; the yielded attributes can be updated in it (ex: with a response's status)
+        start = time.perf_counter()
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs["error"] = type(e).__name__
+            raise
+        finally:
+            self.record(name, 1000 * (time.perf_counter() - start), **attrs)
+
+    def count(self, name: str, n: int = 1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self) -> List[Dict[str, Any]]:
+        # Totals by span name, slowest first
+        with self._lock:
+            totals = dict(self._totals)
+        rows = [
+            {"name": name, "count": int(c), "total_ms": t, "mean_ms": t / c, "max_ms": m, "last_ms": last}
+            for name, (c, t, m, last) in totals.items()
+        ]
+
+        return sorted(rows, key=lambda r: -r["total_ms"])
+
+    def memo_stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            counters = dict(self.counters)
+            calls = {name: int(totals[0]) for name, totals in self._totals.items()}
+        rows = []
+        for key, misses in counters.items():
+            if key.startswith("memo.") and key.endswith(".misses"):
+                name = key[len("memo.") : -len(".misses")]
+                num_calls = max(calls.get(name, 0), misses)
+                rows.append({"name": name, "calls": num_calls, "hits": num_calls - misses, "misses": misses})
+
+        return rows
+
+    def recent(self, prefix: str = "", n: int = 20) -> List[Dict[str, Any]]:
+        # Most recent spans whose names start with `prefix`, newest first
+        with self._lock:
+            events = list(self.events)
+        matches = [e for e in reversed(events) if e["name"].startswith(prefix)]
+
+        return matches[0:n]
+
+    def dump(self, path: Optional[str] = None) -> str:
+        """
+        Append recent spans, then the totals and counters, to a JSON lines file; returns its path.
+        """
+        path = LOG_PATH if path is None else path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._lock:
+            events = list(self.events)
+            counters = dict(self.counters)
+        with open(path, "a", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event, default=str) + "\n")
+            snapshot = {"name": "snapshot", "ts": time.time(), "summary": self.summary(), "counters": counters}
+            f.write(json.dumps(snapshot, default=str) + "\n")
+
+        return path
+
+    def reset(self):
+        with self._lock:
+            self.events.clear()
+            self.counters.clear()
+            self._totals.clear()
+
+
+# Process-wide tracer (shared by app sessions and platform fetches)
+TRACER = Tracer()
+span = TRACER.span
+record = TRACER.record
+count = TRACER.count
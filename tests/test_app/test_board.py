@@ -0,0 +1,43 @@
+import numpy as np
+
+from draft_optimizer.app.board import ALL_POSITIONS, DraftBoard
+from draft_optimizer.app.table import PlayerTable
+from tests.test_app.test_optimize import PLAYERS, TABLE
+
+
+def check_board(board: DraftBoard, table: PlayerTable, draft_rows: np.ndarray):
+    # Match a board to masks over the full table
+    available = ~table.mask(draft_rows)
+    assert np.array_equal(board.available, available)
+    order = table.display_order
+    assert board.options() == order[available[order]].tolist()
+    for pos in [ALL_POSITIONS] + table.pos_keys:
+        mask = available if pos == ALL_POSITIONS else available & table.pos_mask(pos)
+        assert board.top(pos, 3).tolist() == table.top(mask, 3).tolist()
+
+
+def test_draft_board():
+    # Pick the top players, then some further down
+    board = DraftBoard(TABLE)
+    check_board(board, TABLE, np.zeros(0, dtype=int))
+    picks = [2, 1, 3, 7, 9]
+    for i in range(1, len(picks) + 1):
+        assert board.sync(picks[0:i]) == (0, 1)
+        check_board(board, TABLE, np.array(picks[0:i]))
+
+    # Go back (players return to the top), then diverge
+    assert board.sync(picks[0:2]) == (3, 0)
+    check_board(board, TABLE, np.array(picks[0:2]))
+    assert board.sync([2, 4, 1]) == (1, 2)
+    check_board(board, TABLE, np.array([2, 4, 1]))
+
+    # Unknown positions are empty
+    assert len(board.top("K")) == 0
+
+    # Ties keep row order, like the table
+    players = PLAYERS.copy()
+    players["sum_weeks"] = 1.0
+    table = PlayerTable.from_players(players)
+    board = DraftBoard(table)
+    board.sync([0, 5])
+    check_board(board, table, np.array([0, 5]))
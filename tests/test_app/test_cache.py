@@ -0,0 +1,74 @@
+import os
+
+import numpy as np
+
+from draft_optimizer.app.cache import ResultCache, draft_key
+from draft_optimizer.app.optimize import RosterOptimizer, poss_opt_picks, poss_opt_picks_all
+from tests.test_app.test_optimize import CONTEXT, POS_CONSTS
+
+
+def test_draft_key():
+    # Order of picks doesn't matter
+    key = draft_key("abc", 4, POS_CONSTS, 0, [2, 7], [1, 2, 7], "auto")
+    assert key == draft_key("abc", 4, {"WR": (1, 2), "RB": (1, 2), "QB": (1, 1)}, 0, [7, 2], [7, 1, 2], "auto")
+
+    # Everything else does
+    assert key != draft_key("abd", 4, POS_CONSTS, 0, [2, 7], [1, 2, 7], "auto")
+    assert key != draft_key("abc", 5, POS_CONSTS, 0, [2, 7], [1, 2, 7], "auto")
+    assert key != draft_key("abc", 4, {**POS_CONSTS, "QB": (1, 2)}, 0, [2, 7], [1, 2, 7], "auto")
+    assert key != draft_key("abc", 4, POS_CONSTS, 1, [2, 7], [1, 2, 7], "auto")
+    assert key != draft_key("abc", 4, POS_CONSTS, 0, [2], [1, 2, 7], "auto")
+    assert key != draft_key("abc", 4, POS_CONSTS, 0, [2, 7], [1, 2, 3, 7], "auto")
+    assert key != draft_key("abc", 4, POS_CONSTS, 0, [2, 7], [1, 2, 7], "milp")
+
+
+def test_result_cache(tmp_path):
+    # Least recently used entries are evicted
+    cache = ResultCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Entries on disk outlive the in-memory cache
+    cache = ResultCache(max_size=1, cache_dir=str(tmp_path))
+    cache.put("a", np.arange(3))
+    cache.put("b", np.arange(4))
+    assert np.array_equal(ResultCache(cache_dir=str(tmp_path)).get("a"), np.arange(3))
+    cache.clear(disk=True)
+    assert cache.get("a") is None
+
+    # Least recently used files are removed past the disk limit (reads count as uses)
+    cache = ResultCache(max_size=1, cache_dir=str(tmp_path), max_disk_size=2)
+    for i, key in enumerate(["a", "b"]):
+        cache.put(key, i)
+        os.utime(os.path.join(str(tmp_path), f"{key}.pkl"), (i, i))
+    assert ResultCache(cache_dir=str(tmp_path)).get("a") == 0
+    cache.put("c", 2)
+    assert sorted(os.listdir(str(tmp_path))) == ["a.pkl", "c.pkl"]
+
+
+def test_poss_opt_picks_cache(tmp_path):
+    # Solve a draft state
+    cache = ResultCache(cache_dir=str(tmp_path))
+    optimizer = RosterOptimizer(CONTEXT, cache=cache)
+    picks_idx = {0: {2}, 1: {1, 3}}
+    picked_idx = {1, 2, 3}
+    result = poss_opt_picks(optimizer, 0, picks_idx, picked_idx)
+    assert cache.misses == 1 and len(cache) == 1
+
+    # Going back to it is a cache hit, including from a fresh optimizer sharing the disk cache
+    assert poss_opt_picks(optimizer, 0, picks_idx, picked_idx) is result
+    optimizer = RosterOptimizer(CONTEXT, cache=ResultCache(cache_dir=str(tmp_path)))
+    assert poss_opt_picks(optimizer, 0, picks_idx, picked_idx).rows == result.rows
+
+    # All teams at once; team 0 is cached, team 1 is solved and cached
+    results = poss_opt_picks_all(optimizer, picks_idx, picked_idx, max_workers=1)
+    assert list(results.keys()) == [0, 1]
+    assert results[0].rows == result.rows
+    assert optimizer.cache is not None and optimizer.cache.hits == 2
+    poss_opt_picks_all(optimizer, picks_idx, picked_idx, max_workers=1)
+    assert optimizer.cache.hits == 4
@@ -0,0 +1,80 @@
+import threading
+
+import pytest
+
+from draft_optimizer.app import draft_log as draft_log_module
+from draft_optimizer.app.draft_log import DraftLog, open_draft_log
+
+# Specify a two-team snake draft
+DRAFT_ORDER = [0, 1, 1, 0, 0, 1]
+
+
+def test_draft_log(tmp_path):
+    # Append picks; every pick's state is kept
+    log = DraftLog(str(tmp_path / "draft.sqlite"), DRAFT_ORDER)
+    assert log.state().pick == 0 and log.state(0).picks == []
+    state = log.append(["a", "b", "c"])
+    assert state.picks == ["a", "b", "c"] and state.rosters == {0: ["a"], 1: ["b", "c"]}
+    assert log.state(2).picks == ["a", "b"] and log.state(2).rosters == {0: ["a"], 1: ["b"]}
+    with pytest.raises(ValueError):
+        log.state(4)
+
+    # Appending after an earlier pick fails unless rewinding
+    with pytest.raises(ValueError):
+        log.append(["d"], start=2)
+    assert log.state().picks == ["a", "b", "c"]
+    log.save_warm_starts(1, {0: ["a", "c"]})
+    state = log.append(["d"], start=1, rewind=True)
+    assert state.picks == ["a", "d"] and log.state(1).warm_starts == {0: ["a", "c"]}
+    with pytest.raises(ValueError):
+        log.state(3)
+
+    # History includes rewound picks
+    events = log.events()
+    assert [(e["kind"], e["pick"], e["player_id"]) for e in events] == [
+        ("pick", 0, "a"),
+        ("pick", 1, "b"),
+        ("pick", 2, "c"),
+        ("rewind", 1, None),
+        ("pick", 1, "d"),
+    ]
+    assert log.events(since=events[-2]["seq"]) == events[-1:]
+
+    # Reopening reads the same state
+    assert DraftLog(log.path, DRAFT_ORDER).state() == log.state()
+
+
+def test_draft_log_writers(tmp_path):
+    # Writers racing for the same picks each get one pick or a conflict; none are lost or duplicated
+    path = str(tmp_path / "draft.sqlite")
+    DraftLog(path, DRAFT_ORDER)
+    made = []
+
+    def write(name: str):
+        log = DraftLog(path, DRAFT_ORDER)
+        for _ in range(20):
+            state = log.state()
+            if state.pick >= len(DRAFT_ORDER):
+                return
+            try:
+                state = log.append([f"{name}{state.pick}"], start=state.pick)
+                made.append(state.picks[-1])
+            except ValueError:
+                pass
+
+    threads = [threading.Thread(target=write, args=(name,)) for name in "xyz"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    picks = DraftLog(path, DRAFT_ORDER).state().picks
+    assert sorted(picks) == sorted(made) and [int(p[1:]) for p in picks] == list(range(len(DRAFT_ORDER)))
+
+
+def test_open_draft_log(tmp_path, monkeypatch):
+    # Picks saved in settings are imported once
+    monkeypatch.setattr(draft_log_module, "DRAFTS_DIR", str(tmp_path))
+    settings = {"draft_order": DRAFT_ORDER, "draft_picks": ["a", "b"]}
+    assert open_draft_log("league.json", settings).state().picks == ["a", "b"]
+    open_draft_log("league.json", settings).rewind(0)
+    assert open_draft_log("league.json", settings).state().picks == []
@@ -0,0 +1,137 @@
+import itertools
+
+import numpy as np
+
+from draft_optimizer.app.lineup import LineupSlots, LineupSolver, availability
+from draft_optimizer.app.optimize import GAP_TOL, OptimizerContext, RosterOptimizer
+from draft_optimizer.app.table import PlayerTable
+from draft_optimizer.src.models import ProSchedule
+from tests.test_app.test_optimize import make_players
+
+# Specify a pool with byes: three pro teams, one playing a doubleheader each week
+NUM_WEEKS = 4
+POSITIONS = np.array(["QB", "QB", "RB", "RB", "RB", "WR", "WR", "WR", "WR", "RB"])
+PRO_TEAMS = np.array(["A", "B", "A", "B", "C", "A", "B", "C", "C", "FA"])
+BYES = {"A": 1, "B": 2, "C": 3}
+SLOTS = {"QB": 1, "RB": 1, "WR": 1, "FLEX": 1}
+POS_CONSTS = {"QB": (1, 2), "RB": (1, 3), "WR": (1, 3)}
+NUM_PLAYERS = 6
+
+
+def make_schedule() -> ProSchedule:
+    team_ids = {"A": 0, "B": 1, "C": 2}
+    games = []
+    for week in range(1, NUM_WEEKS + 1):
+        playing = [team_ids[t] for t in team_ids if BYES[t] != week]
+        games.append((playing[0], playing[-1], week) if len(playing) == 2 else (playing[0], playing[1], week))
+        if len(playing) == 3:
+            games.append((playing[2], playing[0], week))
+    home_ids, away_ids, weeks = zip(*games)
+    dates = np.datetime64("2022-09-08") + 7 * np.array(weeks)
+
+    return ProSchedule.from_arrays(home_ids, away_ids, weeks, dates)
+
+
+def make_table() -> PlayerTable:
+    rng = np.random.default_rng(0)
+    points = rng.integers(0, 20, size=(len(POSITIONS), NUM_WEEKS)).astype(float)
+    players = make_players(points, POSITIONS).reset_index()
+    players["pro_team"] = PRO_TEAMS
+
+    return PlayerTable.from_players(players.set_index(["id", "name", "position", "pro_team"]))
+
+
+def brute_force_lineup(points: np.ndarray, positions: np.ndarray) -> float:
+    # Best lineup points for one week, over every set of starters that fits the slots
+    best = 0.0
+    for num_starters in range(0, 5):
+        for starters in itertools.combinations(range(len(points)), num_starters):
+            pos = positions[list(starters)]
+            num_qb, num_rb, num_wr = (pos == "QB").sum(), (pos == "RB").sum(), (pos == "WR").sum()
+            if num_qb <= 1 and max(num_rb - 1, 0) + max(num_wr - 1, 0) <= 1:
+                best = max(best, points[list(starters)].sum())
+
+    return best
+
+
+def test_availability():
+    # Players miss their team's bye; free agents and weeks past the schedule are available
+    table = make_table()
+    players = table.num_players
+    available = availability(table, make_schedule(), {"A": 0, "B": 1, "C": 2})
+    assert available.shape == (NUM_WEEKS, players)
+    for row in range(players):
+        team = PRO_TEAMS[row]
+        expected = [team not in BYES or BYES[team] != week for week in range(1, NUM_WEEKS + 1)]
+        assert available[:, row].tolist() == expected
+
+    # Weeks the schedule doesn't cover are available
+    short = ProSchedule.from_arrays([0, 1], [1, 2], [1, 2], np.datetime64("2022-09-08") + np.arange(2))
+    available = availability(table, short, {"A": 0, "B": 1, "C": 2})
+    assert available[2:].all()
+
+
+def test_lineup_solver():
+    # Make solver
+    table = make_table()
+    context = OptimizerContext.from_table(table, NUM_PLAYERS, POS_CONSTS)
+    available_weeks = availability(table, make_schedule(), {"A": 0, "B": 1, "C": 2})
+    solver = LineupSolver(context, available_weeks, SLOTS)
+    slots = LineupSlots(context, SLOTS)
+    pos_idx, min_pos, max_pos = context.pos_limits()
+
+    # Check lineups, and find the best roster, by brute force
+    best = -np.inf
+    for roster_idx in itertools.combinations(range(table.num_players), NUM_PLAYERS):
+        roster = table.mask(roster_idx)
+        counts = np.bincount(pos_idx[roster], minlength=len(min_pos))
+        weekly = slots.weekly_points(table.points[:, roster], available_weeks[:, roster], pos_idx[roster])
+        expected = [
+            brute_force_lineup(np.where(available_weeks[w, roster], table.points[w, roster], 0), POSITIONS[roster])
+            for w in range(NUM_WEEKS)
+        ]
+        assert np.allclose(weekly, expected)
+        if np.all(counts >= min_pos) and np.all(counts <= max_pos):
+            best = max(best, weekly.min())
+
+    # Solve, and after picks
+    for available, fixed in [
+        (np.ones(table.num_players, dtype=bool), np.zeros(table.num_players, dtype=bool)),
+        (~table.mask([0, 5]), table.mask([1])),
+    ]:
+        result = solver.solve(available | fixed, fixed)
+        assert result.roster is not None
+        assert result.roster.sum() == NUM_PLAYERS and not np.any(fixed & ~result.roster)
+        assert result.value <= result.bound + 1e-9
+        if not fixed.any():
+            assert result.value == best
+
+    # The search alone finds the best roster too on a pool this small, and it plugs into the optimizer
+    search = LineupSolver(context, available_weeks, SLOTS, exact=False)
+    assert search.solve(np.ones(table.num_players, dtype=bool), np.zeros(table.num_players, dtype=bool)).value == best
+    assert search.cache_id != solver.cache_id
+    optimizer = RosterOptimizer(context, extra_backends={"lineup": solver})
+    result = optimizer.solve(
+        np.ones(table.num_players, dtype=bool), np.zeros(table.num_players, dtype=bool), backend="lineup"
+    )
+    assert result.backend == "lineup" and result.value == best and result.gap >= -GAP_TOL
+
+
+def test_lineup_backend_switch():
+    # Switching backends on a key only reuses results for the same objective
+    table = make_table()
+    context = OptimizerContext.from_table(table, NUM_PLAYERS, POS_CONSTS)
+    available_weeks = availability(table, make_schedule(), {"A": 0, "B": 1, "C": 2})
+    solver = LineupSolver(context, available_weeks, SLOTS)
+    optimizer = RosterOptimizer(context, extra_backends={"lineup": solver})
+    available = np.ones(table.num_players, dtype=bool)
+    fixed = np.zeros(table.num_players, dtype=bool)
+    lineup = solver.solve(available, fixed)
+    milp = optimizer.solve(available, fixed, key=0, backend="milp")
+    for backend in ["lineup", "greedy", "lineup"]:
+        result = optimizer.solve(available, fixed, key=0, backend=backend)
+        if backend == "lineup":
+            assert result.backend == "lineup" and result.value == lineup.value
+        else:
+            # The built-in backends all maximize min weekly points, so the optimal MILP roster is reused
+            assert result is milp
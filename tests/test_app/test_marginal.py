@@ -0,0 +1,76 @@
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+import pytest
+
+from draft_optimizer.app.cache import ResultCache
+from draft_optimizer.app.marginal import MarginalScorer
+from draft_optimizer.app.optimize import RosterOptimizer
+from tests.test_app.test_optimize import CONTEXT, TABLE, brute_force
+
+
+@pytest.mark.parametrize("backend", ["milp", "greedy"])
+def test_marginal_scorer(backend: str):
+    # Make scorer
+    optimizer = RosterOptimizer(CONTEXT)
+    scorer = MarginalScorer(optimizer)
+
+    # Score from an empty roster and after picks
+    states: List[Tuple[Dict[int, Set[int]], Set[int]]] = [
+        ({0: set()}, set()),
+        ({0: {0}, 1: {3}}, {0, 3}),
+        ({0: {0, 4, 7}}, {0, 4, 7}),
+    ]
+    for picks_idx, picked_idx in states:
+        marginals = scorer.score(0, picks_idx, picked_idx, num_exact=2, max_workers=1, backend=backend)
+        available, fixed = CONTEXT.masks({0: picks_idx[0]}, picked_idx)
+        for row in np.flatnonzero(available).tolist():
+            # Values are feasible and bounds hold; players that don't fit get neither
+            expected = brute_force(available, fixed[0] | TABLE.mask([row]))
+            if np.isinf(expected):
+                assert np.isinf(marginals.value[row]) and np.isinf(marginals.bound[row])
+                continue
+            assert marginals.value[row] <= expected + 1e-9 <= marginals.bound[row] + 2e-9
+            if marginals.exact[row]:
+                assert marginals.value[row] == pytest.approx(expected)
+
+        # With the MILP, the optimal roster's players change nothing and the best players are found exactly
+        assert marginals.base.value <= brute_force(available, fixed[0])
+        if backend == "milp":
+            assert np.all(marginals.delta(np.flatnonzero(marginals.base.roster & ~fixed[0])) == 0)
+            rows = np.flatnonzero(available)
+            best = max(brute_force(available, fixed[0] | TABLE.mask([row])) for row in rows.tolist())
+            assert marginals.value[rows].max() == pytest.approx(best)
+        assert np.all(np.isinf(marginals.value[~available]))
+
+
+def test_marginal_scorer_cache(tmp_path):
+    # Re-solves are cached as the draft state after the pick, so picking the player reads them back
+    cache = ResultCache(cache_dir=str(tmp_path))
+    optimizer = RosterOptimizer(CONTEXT, cache=cache, backend="milp")
+    marginals = MarginalScorer(optimizer).score(0, {0: set()}, set(), num_exact=10, max_workers=1)
+    assert marginals.num_solved > 0
+    row = int(np.flatnonzero(marginals.exact & ~marginals.base.roster)[0])
+    key = optimizer.cache_key(0, {row}, {row}, "milp")
+    assert cache.get(key).value == pytest.approx(marginals.value[row])
+
+
+def test_solve_teams_full():
+    # Full rosters that break position limits are infeasible
+    optimizer = RosterOptimizer(CONTEXT)
+    available = np.zeros(TABLE.num_players, dtype=bool)
+    results = optimizer.solve_teams(available, {0: TABLE.mask([0, 1, 3, 7]), 1: TABLE.mask([0, 3, 4, 7])})
+    assert results[0].roster is None and results[0].value == -np.inf
+    assert results[1].roster is not None
+
+
+def test_marginal_scorer_keys():
+    # Re-solves in worker processes leave no per-player keys behind
+    optimizer = RosterOptimizer(CONTEXT, backend="milp")
+    try:
+        marginals = MarginalScorer(optimizer).score(0, {0: set()}, set(), num_exact=4, max_workers=2)
+    finally:
+        optimizer.shutdown()
+    assert marginals.num_solved > 1
+    assert [key for key, _ in optimizer._last.keys()] == [0]
+    assert optimizer._warm_starts == {}
@@ -0,0 +1,83 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from draft_optimizer.app.mock import MockJob, load_results, mock_draft, run_sweep, shard_path
+from draft_optimizer.app.optimize import OptimizerContext, RosterOptimizer
+from draft_optimizer.app.table import PlayerTable
+from tests.test_app.test_optimize import POS_CONSTS, make_players
+
+# Specify a small league
+NUM_TEAMS = 3
+ROSTER_SIZE = 4
+DRAFT_ORDER = [0, 1, 2, 2, 1, 0, 0, 1, 2, 2, 1, 0]
+
+
+def make_league(tmp_path) -> MockJob:
+    # Write players and settings like the app does
+    rng = np.random.default_rng(0)
+    positions = np.array(["QB"] * 6 + ["RB"] * 10 + ["WR"] * 10)
+    points = rng.integers(0, 20, size=(len(positions), 5)).astype(float)
+    players = make_players(points, positions)
+    players["adp"] = players["sum_weeks"].rank(ascending=False)
+    players_path = os.path.join(tmp_path, "players.csv")
+    players.to_csv(players_path)
+    settings = {
+        "league_name": "test",
+        "year": 2022,
+        "points_mode": "PPR",
+        "num_teams": NUM_TEAMS,
+        "roster_size": ROSTER_SIZE,
+        "pos_consts": POS_CONSTS,
+        "draft_order": DRAFT_ORDER,
+    }
+    settings_path = os.path.join(tmp_path, "test.json")
+    with open(settings_path, "w", encoding="utf-8") as f:
+        json.dump(settings, f)
+
+    return MockJob.from_settings(settings_path, [0], players_path=players_path)
+
+
+def test_mock_draft(tmp_path):
+    # Make optimizer
+    job = make_league(tmp_path)
+    table = PlayerTable.from_csv(job.players_path)
+    optimizer = RosterOptimizer(OptimizerContext.from_table(table, job.num_players, job.pos_consts))
+
+    # Draft; the same seed draws the same draft
+    draft_order = np.array(DRAFT_ORDER)
+    results = mock_draft(optimizer, draft_order, [0], seed=1)
+    assert results["optimizer"].tolist() == [True, False, False]
+    assert np.all(np.isfinite(results["min_points"]))
+    assert set(results["rank"].tolist()) <= set(range(1, NUM_TEAMS + 1)) and 1 in results["rank"]
+    assert results["solve_time"][0] > 0 and np.all(results["solve_time"][1:] == 0)
+    again = mock_draft(optimizer, draft_order, [0], seed=1)
+    assert all(np.array_equal(results[col], again[col]) for col in ["min_points", "rank"])
+
+
+def test_run_sweep(tmp_path):
+    # Run
+    job = make_league(tmp_path)
+    jobs = [job, job.copy(update={"teams": [1, 2]})]
+    out_dir = os.path.join(tmp_path, "sweep")
+    results = run_sweep(jobs, out_dir, num_drafts=5, chunk_size=2, max_workers=1)
+    assert len(results) == len(jobs) * 5 * NUM_TEAMS
+    assert results.groupby("job")["optimizer"].sum().tolist() == [5, 10]
+    assert len(os.listdir(os.path.join(out_dir, "shards"))) == 6
+
+    # Resume after losing a chunk; drafts are the same
+    os.remove(shard_path(out_dir, 1, 2))
+    os.remove(os.path.join(out_dir, "results.npz"))
+    assert load_results(out_dir)["job"].tolist().count(1) == 3 * NUM_TEAMS  # partial results
+    resumed = run_sweep(jobs, out_dir, num_drafts=5, chunk_size=2, max_workers=2)
+    pd.testing.assert_frame_equal(results.drop(columns="solve_time"), resumed.drop(columns="solve_time"))
+    loaded = load_results(out_dir)
+    assert loaded["settings_file"].unique().tolist() == ["test.json"]
+    pd.testing.assert_frame_equal(loaded.drop(columns="settings_file"), resumed)
+
+    # A different sweep can't resume into the same directory
+    with pytest.raises(ValueError):
+        run_sweep(jobs, out_dir, num_drafts=5, chunk_size=2, seed=1, max_workers=1)
@@ -0,0 +1,288 @@
+import itertools
+import os
+import pickle
+import time
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from draft_optimizer.app.lineup import LineupSolver
+from draft_optimizer.app.optimize import GAP_TOL, OptimizerContext, RosterOptimizer, RosterSolver
+from draft_optimizer.app.stochastic import PointSamples, StochasticSolver
+from draft_optimizer.app.table import PlayerTable, bundle_path
+from draft_optimizer.src.trace import TRACER
+
+# Specify a small player pool
+POSITIONS = np.array(["QB", "QB", "QB", "RB", "RB", "RB", "RB", "WR", "WR", "WR"])
+POINTS = np.array(
+    [
+        [20, 15, 0],
+        [17, 16, 12],
+        [16, 17, 15],
+        [16, 14, 9],
+        [12, 16, 11],
+        [13, 14, 0],
+        [9, 8, 10],
+        [14, 0, 13],
+        [11, 12, 10],
+        [6, 9, 8],
+    ],
+    dtype=float,
+)
+NUM_PLAYERS_CONST = 4
+MIN_POS_CONST = {"QB": 1, "RB": 1, "WR": 1}
+MAX_POS_CONST = {"QB": 1, "RB": 2, "WR": 2}
+POS_CONSTS = {pos: (MIN_POS_CONST[pos], MAX_POS_CONST[pos]) for pos in MIN_POS_CONST.keys()}
+
+
+def make_players(points: np.ndarray, positions: np.ndarray) -> pd.DataFrame:
+    # Make players with the same layout as `load_players`
+    players = pd.DataFrame(points, columns=[f"week{i + 1}" for i in range(points.shape[1])])
+    players["sum_weeks"] = points.sum(axis=1)
+    players.index = pd.MultiIndex.from_arrays(
+        [
+            [str(i) for i in range(len(positions))],
+            [f"{pos}{i}" for i, pos in enumerate(positions)],
+            positions,
+            ["FA"] * len(positions),
+        ],
+        names=["id", "name", "position", "pro_team"],
+    )
+
+    return players
+
+
+PLAYERS = make_players(POINTS, POSITIONS)
+TABLE = PlayerTable.from_players(PLAYERS)
+CONTEXT = OptimizerContext.from_table(TABLE, NUM_PLAYERS_CONST, POS_CONSTS)
+
+
+def brute_force(available: np.ndarray, fixed: np.ndarray) -> float:
+    # Score every feasible roster
+    best = -np.inf
+    for roster_idx in itertools.combinations(range(len(POSITIONS)), NUM_PLAYERS_CONST):
+        roster = np.zeros(len(POSITIONS), dtype=bool)
+        roster[list(roster_idx)] = True
+        if np.any(roster & ~(available | fixed)) or np.any(fixed & ~roster):
+            continue
+        pos_counts = {pos: np.sum(POSITIONS[roster] == pos) for pos in MIN_POS_CONST.keys()}
+        if any(pos_counts[pos] < MIN_POS_CONST[pos] or pos_counts[pos] > MAX_POS_CONST[pos] for pos in pos_counts):
+            continue
+        best = max(best, POINTS[roster].sum(axis=0).min())
+
+    return best
+
+
+def test_roster_optimizer():
+    # Make optimizer
+    optimizer = RosterOptimizer(CONTEXT)
+    num_all = len(POSITIONS)
+
+    # Play out a few picks; team 0 takes players 2 and 7 while others take 1 and 3
+    available = np.ones(num_all, dtype=bool)
+    fixed = np.zeros(num_all, dtype=bool)
+    for player_idx, is_team in [(2, True), (1, False), (3, False), (7, True)]:
+        available[player_idx] = False
+        fixed[player_idx] |= is_team
+        result = optimizer.solve(available, fixed, key=0)
+        roster = result.roster
+        assert roster is not None
+        assert result.gap <= GAP_TOL
+        assert roster.sum() == NUM_PLAYERS_CONST
+        assert np.all(roster[fixed])
+        assert not np.any(roster & ~(available | fixed))
+        assert POINTS[roster].sum(axis=0).min() == brute_force(available, fixed)
+
+    # Rewind to the start (loosened bounds must re-solve)
+    available = np.ones(num_all, dtype=bool)
+    fixed = np.zeros(num_all, dtype=bool)
+    roster = optimizer.solve(available, fixed, key=0).roster
+    assert POINTS[roster].sum(axis=0).min() == brute_force(available, fixed)
+
+
+def test_roster_optimizer_teams():
+    # Make optimizer
+    optimizer = RosterOptimizer(CONTEXT)
+    num_all = len(POSITIONS)
+
+    # Team 0 took player 2 and team 1 took players 1 and 3
+    available = np.ones(num_all, dtype=bool)
+    available[[1, 2, 3]] = False
+    fixed = {team: np.zeros(num_all, dtype=bool) for team in range(3)}
+    fixed[0][2] = True
+    fixed[1][[1, 3]] = True
+
+    # Solve all teams across a pool; asking for a different size rebuilds it
+    try:
+        results = optimizer.solve_teams(available, fixed, max_workers=2)
+        pool = optimizer._get_pool(2)
+        assert optimizer._get_pool(3) is not pool and optimizer._get_pool(3)._max_workers == 3
+    finally:
+        optimizer.shutdown()
+    assert set(results.keys()) == {0, 1, 2}
+    for team, result in results.items():
+        roster = result.roster
+        assert roster is not None
+        assert np.all(roster[fixed[team]])
+        assert POINTS[roster].sum(axis=0).min() == brute_force(available, fixed[team])
+
+
+@pytest.mark.parametrize("backend", ["greedy", "milp"])
+def test_roster_optimizer_backends(backend: str):
+    # Make optimizer
+    optimizer = RosterOptimizer(CONTEXT, backend=backend)
+    num_all = len(POSITIONS)
+
+    # Every backend returns a feasible roster whose bound brackets the optimum
+    available = np.ones(num_all, dtype=bool)
+    available[[0, 1, 3]] = False
+    fixed = np.zeros(num_all, dtype=bool)
+    fixed[0] = True
+    result = optimizer.solve(available, fixed, key=0)
+    roster = result.roster
+    assert roster is not None
+    assert result.backend == backend
+    assert roster[0] and roster.sum() == NUM_PLAYERS_CONST
+    assert result.value == POINTS[roster].sum(axis=0).min()
+    assert result.value <= brute_force(available, fixed) <= result.bound
+    assert 0 <= result.gap < 1
+
+    # Solves are traced with their size
+    event = TRACER.recent(f"solve.{backend}", 1)[0]
+    assert event["players"] == (available | fixed).sum() and event["fixed"] == 1 and event["weeks"] == 3
+
+    # Infeasible (no WRs left) is reported rather than returning an empty roster
+    available[[7, 8, 9]] = False
+    result = optimizer.solve(available, fixed, key=1)
+    assert result.roster is None
+    assert result.rows == set()
+    assert result.gap == np.inf
+    assert TRACER.recent(f"solve.{backend}", 1)[0]["status"] == "infeasible"
+
+
+def test_roster_solver():
+    # Backends must implement `solve`
+    class Incomplete(RosterSolver):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete(CONTEXT)  # type: ignore[abstract]
+
+
+def test_optimizer_context():
+    # Arrays are read-only
+    with pytest.raises(ValueError):
+        CONTEXT.table.points[0, 0] = 0
+
+    # Picklable (and still read-only)
+    context = pickle.loads(pickle.dumps(CONTEXT))
+    assert np.array_equal(context.table.points, POINTS.T)
+    assert not context.table.points.flags.writeable
+
+    # Convert picks to masks and back
+    available, fixed = CONTEXT.masks({0: {2, 7}, 1: {1}}, {1, 2, 7})
+    assert not np.any(available[[1, 2, 7]])
+    assert CONTEXT.rows(fixed[0]) == {2, 7}
+
+
+def test_player_table():
+    # Compiled layout
+    assert TABLE.points.shape == (POINTS.shape[1], len(POSITIONS))
+    assert TABLE.points.dtype == np.float32
+    assert TABLE.points.flags.c_contiguous
+
+    # Look up rows
+    rows = TABLE.rows_of(["7", "2"])
+    assert rows.tolist() == [7, 2]
+    assert TABLE.display_names[7] == "WR7 (WR, FA)"
+
+    # Best available by position
+    available = ~TABLE.mask(rows)
+    top_wrs = TABLE.top(available & TABLE.pos_mask("WR"), 2)
+    assert top_wrs.tolist() == [8, 9]
+    assert TABLE.frame(top_wrs)["id"].tolist() == ["8", "9"]
+
+
+def test_greedy_bound():
+    # Random pools; the heuristic never beats the MILP and its bound never undercuts it
+    for seed in range(5):
+        rng = np.random.default_rng(seed)
+        num_all = 30
+        points = np.round(20 * rng.exponential(0.5, (num_all, 1)) * rng.uniform(0.5, 1.5, (num_all, 3)), 2)
+        players = make_players(points, POSITIONS[np.arange(num_all) % len(POSITIONS)])
+        context = OptimizerContext.from_table(PlayerTable.from_players(players), NUM_PLAYERS_CONST, POS_CONSTS)
+        optimizer = RosterOptimizer(context)
+        available = context.pool.copy()
+        fixed = np.zeros(num_all, dtype=bool)
+        greedy = optimizer.solve(available, fixed, key="greedy", backend="greedy")
+        exact = optimizer.solve(available, fixed, key="milp", backend="milp")
+        assert exact.backend == "milp" and exact.gap == 0
+        assert greedy.value <= exact.value + 1e-4
+        assert exact.value <= greedy.bound + 1e-4
+
+
+def make_hard_context(num_all: int = 200, seed: int = 0) -> OptimizerContext:
+    # A random pool the MILP takes far longer than a test to prove optimal
+    rng = np.random.default_rng(seed)
+    positions = rng.choice(["QB", "RB", "WR"], size=num_all)
+    points = rng.gamma(2.0, 5.0, size=(num_all, 17))
+    table = PlayerTable.from_players(make_players(points, positions))
+
+    return OptimizerContext.from_table(table, 8, {"QB": (1, 2), "RB": (2, 4), "WR": (2, 4)})
+
+
+def make_hard_backends(context: OptimizerContext) -> Dict[str, RosterSolver]:
+    # Lineups over the pool's positions (far too slow to solve exactly), and noisy samples of its points
+    rng = np.random.default_rng(0)
+    points = context.table.points
+    draws = points[None] * (1 + 0.5 * rng.normal(size=(100,) + points.shape))
+    samples = PointSamples(samples=draws.astype(np.float32), digest="hard")
+
+    return {
+        "lineup": LineupSolver(context, slots={"QB": 1, "RB": 2, "WR": 2, "FLEX": 1}),
+        "stochastic": StochasticSolver(context, samples),
+    }
+
+
+@pytest.mark.parametrize("backend", ["milp", "auto", "lineup", "stochastic"])
+def test_time_budget(backend: str):
+    # Solves stop within the budget with the best roster found and a bound
+    context = make_hard_context()
+    optimizer = RosterOptimizer(context, backend=backend, time_budget=0.1, extra_backends=make_hard_backends(context))
+    available = context.pool.copy()
+    fixed = np.zeros(len(available), dtype=bool)
+    start = time.perf_counter()
+    result = optimizer.solve(available, fixed)
+    assert time.perf_counter() - start < 2
+    assert result.roster is not None and result.roster.sum() == 8
+    assert result.value <= result.bound
+    assert result.gap > GAP_TOL
+    if backend in ["milp", "auto"]:
+        assert result.value == pytest.approx(context.table.points[:, result.roster].sum(axis=1).min(), rel=1e-5)
+
+
+def test_player_table_bundle(tmp_path):
+    # Compile a CSV on first load
+    players_path = str(tmp_path / "players_ppr.csv")
+    PLAYERS.to_csv(players_path, index=True)
+    table = PlayerTable.from_csv(players_path)
+    assert os.path.isdir(bundle_path(players_path))
+
+    # Later loads are memory-mapped, with integer ids on disk
+    bundle = PlayerTable.load(bundle_path(players_path))
+    assert bundle is not None
+    assert isinstance(bundle.points, np.memmap) and not bundle.points.flags.writeable
+    assert np.load(os.path.join(bundle_path(players_path), "ids.npy")).dtype == np.int64
+    for field in ["ids", "names", "positions", "pro_teams", "points", "sum_weeks", "adp", "display_names"]:
+        assert np.array_equal(getattr(bundle, field).astype(str), getattr(table, field).astype(str))
+    assert bundle.rows == table.rows and bundle.digest == TABLE.digest
+    assert bundle.frame(bundle.top(bundle.pos_mask("WR"), 2)).equals(table.frame(table.top(table.pos_mask("WR"), 2)))
+
+    # Stale bundles are rebuilt
+    players = PLAYERS.copy()
+    players["week1"] += 1
+    players.to_csv(players_path, index=True)
+    os.utime(players_path, (time.time() + 10, time.time() + 10))
+    assert PlayerTable.from_csv(players_path).digest != TABLE.digest
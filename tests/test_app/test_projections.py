@@ -0,0 +1,148 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from draft_optimizer.app.stochastic import PointSamples
+from draft_optimizer.app.table import PlayerTable
+from draft_optimizer.src import projections
+from draft_optimizer.src.projections import ModelData, load_season, parse_weekly, update_projections
+
+LEAGUE_ID = 1
+YEARS = [2021, 2022]
+NUM_WEEKS = 3
+
+
+def write_season(data_dir: str, year: int, proj_scale: float = 1.0):
+    # Two teams that play each other every week
+    league_dir = os.path.join(data_dir, f"espn_{LEAGUE_ID}", str(year))
+    os.makedirs(league_dir, exist_ok=True)
+    teams = pd.DataFrame(
+        {"id": [1, 2], "name": ["A", "B"], "abbrev": ["AAA", "BBB"], "location": ["X", "Y"], "bye_week": [0, 0]}
+    )
+    schedule = pd.DataFrame(
+        {
+            "home_id": [1, 2, 1],
+            "away_id": [2, 1, 2],
+            "week": [1, 2, 3],
+            "date": [f"{year}-09-0{w}" for w in [1, 2, 3]],
+        }
+    )
+    players = pd.DataFrame(
+        {
+            "id": [10, 11, 20, 21, 30],
+            "name": ["Q1", "Q2", "R1", "R2", "K1"],
+            "position": ["QB", "QB", "RB", "RB", "K"],
+            "pro_team": ["AAA", "BBB", "AAA", "BBB", "AAA"],
+            "points": [60.0, 45.0, 30.0, 24.0, 20.0],
+            "weekly_points": [
+                "{1: 20.0, 2: 25.5, 3: 14.5}",
+                "{1: 15.0, 2: 15.0, 3: 15.0}",
+                "{1: 10.0, 2: 10.0, 3: 10.0}",
+                "{1: 8.0, 2: 8.0, 3: nan}",
+                "{1: 6.0, 2: 7.0, 3: 7.0}",
+            ],
+            "proj_points": [v * proj_scale for v in [66.0, 48.0, 30.0, 21.0, 21.0]],
+            "proj_weekly_points": [
+                "{1: 22.0, 2: 22.0, 3: 22.0}",
+                "{1: 16.0, 2: 16.0, 3: 16.0}",
+                "{1: 10.0, 2: 10.0, 3: 10.0}",
+                "{1: 7.0, 2: 7.0, 3: 7.0}",
+                "{1: 7.0, 2: 7.0, 3: 7.0}",
+            ],
+        }
+    )
+    teams.to_csv(os.path.join(league_dir, "pro_teams.csv"), index=False)
+    schedule.to_csv(os.path.join(league_dir, "pro_schedule.csv"), index=False)
+    players.to_csv(os.path.join(league_dir, "pro_players.csv"), index=False)
+
+    return league_dir
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(projections, "DATA_DIR", str(tmp_path))
+    for year in YEARS:
+        write_season(str(tmp_path), year)
+
+    return str(tmp_path)
+
+
+def fake_fit(data: ModelData) -> np.ndarray:
+    # Each player's projected season points spread over their games, plus noise
+    fake_fit.calls.append(data.position)  # type: ignore[attr-defined]
+    games = data.future.groupby("player_id")["week"].transform("size").to_numpy()
+    means = data.season_points.loc[data.future["player_id"]].to_numpy() / games
+    rng = np.random.default_rng(0)
+
+    return means[None, :] + rng.normal(0, 1, size=(20, len(means)))
+
+
+def test_parse_weekly():
+    # Parse
+    weekly = parse_weekly([1, 2, 3], ["{1: 2.5, 3: -1.0}", "{2: nan}", float("nan")])
+
+    # Check
+    assert weekly["player_id"].tolist() == [1, 1]
+    assert weekly["week"].tolist() == [1, 3]
+    assert weekly["points"].tolist() == [2.5, -1.0]
+
+
+def test_load_season(data_dir, tmp_path):
+    # Load twice; the second load reads the columnar cache
+    league_dir = projections.get_league_dir(LEAGUE_ID, 2022)
+    cache_dir = str(tmp_path / "cache")
+    season = load_season(league_dir, cache_dir)
+    cached = load_season(league_dir, cache_dir)
+
+    # Check
+    assert len(os.listdir(os.path.join(cache_dir, "data"))) == 1
+    assert set(cached.keys()) == {"players", "weekly", "proj_weekly", "games", "teams"}
+    for name, frame in season.items():
+        pd.testing.assert_frame_equal(frame, cached[name], check_dtype=False)
+    assert len(season["weekly"]) == 14  # one week without points
+    assert season["games"]["opponent_id"].tolist()[0:3] == [2, 2, 2]
+
+    # Changing the source reloads it
+    write_season(data_dir, 2022, proj_scale=2.0)
+    os.utime(os.path.join(league_dir, "pro_players.csv"), ns=(0, 0))
+    changed = load_season(league_dir, cache_dir)
+    assert len(os.listdir(os.path.join(cache_dir, "data"))) == 2
+    assert changed["players"]["proj_points"].iloc[0] == 2 * season["players"]["proj_points"].iloc[0]
+
+
+def test_update_projections(data_dir, tmp_path):
+    # Run
+    fake_fit.calls = []  # type: ignore[attr-defined]
+    cache_dir, prod_dir = str(tmp_path / "cache"), str(tmp_path / "production")
+    result = update_projections(LEAGUE_ID, YEARS, "PPR", fit=fake_fit, cache_dir=cache_dir, prod_dir=prod_dir)
+
+    # Check the table loads like a production one
+    assert result.refit == ["QB", "RB"]  # no TEs or WRs
+    table = PlayerTable.from_csv(result.players_path, write_bundle=False)
+    assert table.weeks == [f"week{w}" for w in range(1, NUM_WEEKS + 1)]
+    assert sorted(table.ids.tolist()) == ["10", "11", "20", "21", "30"]
+    kicker = table.rows["30"]
+    assert table.points[:, kicker].tolist() == [7.0, 7.0, 7.0]  # platform projections
+    qb = table.rows["10"]
+    assert table.sum_weeks[qb] == pytest.approx(66.0, abs=3.0)
+
+    # Check draws align to the table
+    with np.load(result.draws_path) as data:
+        samples = PointSamples.from_draws(table, data["player_ids"], data["weeks"], data["draws"])
+    assert samples.num_samples == 20
+    assert samples.samples.mean(axis=0)[:, qb] == pytest.approx(table.points[:, qb], abs=1e-4)
+
+    # Rerunning refits nothing; changing a season's projections refits its positions
+    rerun = update_projections(LEAGUE_ID, YEARS, "PPR", fit=fake_fit, cache_dir=cache_dir, prod_dir=prod_dir)
+    assert rerun.refit == []
+    league_dir = write_season(data_dir, 2022, proj_scale=1.5)
+    os.utime(os.path.join(league_dir, "pro_players.csv"), ns=(0, 0))
+    changed = update_projections(LEAGUE_ID, YEARS, "PPR", fit=fake_fit, cache_dir=cache_dir, prod_dir=prod_dir)
+    assert changed.refit == ["QB", "RB"]
+    only_qbs = update_projections(
+        LEAGUE_ID, YEARS, "PPR", positions=["QB"], fit=fake_fit, cache_dir=cache_dir, prod_dir=prod_dir
+    )
+    assert only_qbs.refit == []
+    assert fake_fit.calls == ["QB", "RB", "QB", "RB"]  # type: ignore[attr-defined]
@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+
+from draft_optimizer.app.lineup import LineupSolver, availability
+from draft_optimizer.app.marginal import MarginalScorer
+from draft_optimizer.app.optimize import GAP_TOL, OptimizerContext, RosterOptimizer
+from draft_optimizer.app.service import OptimizeJob, OptimizeService
+from tests.test_app.test_lineup import NUM_PLAYERS, POS_CONSTS, SLOTS, make_schedule, make_table
+from tests.test_app.test_optimize import CONTEXT, brute_force, make_hard_backends, make_hard_context
+
+
+def wait_done(service: OptimizeService, job: OptimizeJob):
+    while not job.done:
+        service.wait({job.id: job.version}, timeout=5)
+
+
+@pytest.mark.parametrize("backend", ["auto", "milp", "greedy"])
+def test_optimize_service(backend: str):
+    # Optimize in the background, across a pool
+    optimizer = RosterOptimizer(CONTEXT)
+    service = OptimizeService(optimizer, max_workers=2)
+    service.start()
+    try:
+        picks_idx = {0: {2}, 1: {1, 3}, 2: set()}
+        job = service.submit(picks_idx, {1, 2, 3}, generation=1, backend=backend)
+        assert service.wait({job.id: 0}, timeout=5)
+        wait_done(service, job)
+        assert job.status == "done" and job.error is None
+        assert set(job.results.keys()) == {0, 1, 2}
+
+        # Rosters are feasible, and optimal for the MILP
+        available, fixed = CONTEXT.masks(picks_idx, {1, 2, 3})
+        for team, result in job.results.items():
+            assert result.roster is not None and np.all(result.roster[fixed[team]])
+            expected = brute_force(available, fixed[team])
+            assert result.value <= expected + 1e-9 <= result.bound + 2e-9
+            if backend != "greedy":
+                assert result.gap <= GAP_TOL
+
+        # Resubmitting the same state finds the job
+        assert service.submit(picks_idx, {1, 2, 3}, generation=1, backend=backend) is job
+        assert service.get(job.id) is job
+    finally:
+        service.stop(timeout=5)
+        optimizer.shutdown()
+    assert not service.running
+
+
+def test_optimize_service_lineup():
+    # Backends with their own objective replace the heuristic's rosters with theirs
+    table = make_table()
+    context = OptimizerContext.from_table(table, NUM_PLAYERS, POS_CONSTS)
+    solver = LineupSolver(context, availability(table, make_schedule(), {"A": 0, "B": 1, "C": 2}), SLOTS)
+    optimizer = RosterOptimizer(context, extra_backends={"lineup": solver})
+    service = OptimizeService(optimizer, max_workers=2)
+    service.start()
+    try:
+        picks_idx = {0: {0}, 1: {1}}
+        job = service.submit(picks_idx, {0, 1}, generation=1, backend="lineup")
+        wait_done(service, job)
+        assert job.status == "done"
+        available, fixed = context.masks(picks_idx, {0, 1})
+        for team, result in job.results.items():
+            assert result.backend == "lineup"
+            assert result.value == solver.solve(available | fixed[team], fixed[team]).value
+    finally:
+        service.stop(timeout=5)
+        optimizer.shutdown()
+
+
+def test_optimize_service_scores():
+    # Score players for the team on the clock in the background
+    service = OptimizeService(RosterOptimizer(CONTEXT), max_workers=1)
+    service.start()
+    try:
+        picks_idx = {0: {0}, 1: {3}}
+        job = service.submit(picks_idx, {0, 3}, generation=1, backend="milp", time_budget=None, team=0)
+        wait_done(service, job)
+        assert job.status == "done" and job.results == {}
+        assert job.marginals is not None
+        expected = MarginalScorer(RosterOptimizer(CONTEXT)).score(0, picks_idx, {0, 3}, max_workers=1, backend="milp")
+        assert np.array_equal(job.marginals.value, expected.value)
+
+        # Scoring is its own job, apart from optimizing the same state
+        assert service.submit(picks_idx, {0, 3}, generation=1, backend="milp", time_budget=None) is not job
+    finally:
+        service.stop(timeout=5)
+
+
+def test_optimize_service_stale():
+    # Queue jobs without running them
+    service = OptimizeService(RosterOptimizer(CONTEXT), max_workers=1)
+    first = service.submit({0: set(), 1: set()}, set(), generation=1)
+    other = service.submit({0: {0}, 1: set()}, {0}, generation=1)
+    assert first.status == other.status == "queued"
+
+    # A newer pick cancels them, and a late submission for an older one is cancelled as it's made
+    newer = service.submit({0: {0}, 1: {3}}, {0, 3}, generation=2)
+    assert first.status == other.status == "cancelled"
+    late = service.submit({0: {0}, 1: set()}, {0}, generation=1)
+    assert late.status == "cancelled" and late is not other
+
+    # Only the newest job runs
+    service.start()
+    try:
+        wait_done(service, newer)
+        assert newer.status == "done" and len(newer.results) == 2
+        assert first.results == {} and late.results == {}
+    finally:
+        service.stop(timeout=5)
+
+
+def test_optimize_service_time_budget():
+    # Jobs run out of time with every team's best roster so far, whatever the backend
+    context = make_hard_context()
+    optimizer = RosterOptimizer(context, extra_backends=make_hard_backends(context))
+    service = OptimizeService(optimizer, max_workers=2)
+    service.start()
+    try:
+        for backend in ["milp", "lineup", "stochastic"]:
+            job = service.submit({0: set(), 1: set()}, set(), generation=1, backend=backend, time_budget=0.2)
+            wait_done(service, job)
+            assert job.status == ("timeout" if backend == "milp" else "done")
+            assert job.elapsed < 3
+            for result in job.results.values():
+                assert result.roster is not None and result.roster.sum() == 8
+                assert result.value <= result.bound
+                assert backend == "milp" or result.backend == backend  # the MILP keeps the heuristic's if better
+
+        # A running job is cancelled by a newer pick between passes (its solves stop at their share of the budget)
+        job = service.submit({0: set(), 1: set()}, set(), generation=2, backend="milp", time_budget=1)
+        while job.status == "queued" or len(job.results) < 2:
+            service.wait({job.id: job.version}, timeout=5)
+        newer = service.submit({0: {0}, 1: set()}, {0}, generation=3, backend="greedy")
+        assert job.status == "cancelled"
+        wait_done(service, newer)
+        assert newer.status == "done"
+        assert newer.started is not None and job.finished is not None and newer.started - job.finished < 2
+    finally:
+        service.stop(timeout=5)
+        optimizer.shutdown()
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from draft_optimizer.app.optimize import OptimizerContext
+from draft_optimizer.app.simulate import simulate_picks
+from draft_optimizer.app.table import PlayerTable
+
+# Specify a league: 4 teams, 4 rounds (snake)
+NUM_TEAMS = 4
+NUM_PLAYERS_CONST = 4
+POS_CONSTS = {"QB": (1, 1), "RB": (1, 2), "WR": (1, 2)}
+DRAFT_ORDER = np.array([0, 1, 2, 3, 3, 2, 1, 0] * 2)
+
+
+def make_table(num_players: int = 40, num_weeks: int = 6, seed: int = 0) -> PlayerTable:
+    # Make players with skewed, noisy weekly points
+    rng = np.random.default_rng(seed)
+    positions = np.array(["QB", "RB", "WR"])[np.arange(num_players) % 3]
+    base = 20 * rng.exponential(0.5, num_players)
+    points = np.round(base[:, None] * (1 + 0.1 * rng.standard_normal((num_players, num_weeks))), 2)
+    players = pd.DataFrame(points, columns=[f"week{i + 1}" for i in range(num_weeks)])
+    players["sum_weeks"] = points.sum(axis=1)
+    players["adp"] = players["sum_weeks"].rank(ascending=False)
+    players.index = pd.MultiIndex.from_arrays(
+        [[str(i) for i in range(num_players)], [f"P{i}" for i in range(num_players)], positions, ["FA"] * num_players],
+        names=["id", "name", "position", "pro_team"],
+    )
+
+    return PlayerTable.from_players(players)
+
+
+def test_simulate_picks():
+    # Make context
+    table = make_table()
+    context = OptimizerContext.from_table(table, NUM_PLAYERS_CONST, POS_CONSTS)
+
+    # Rank picks for team 0, on the clock at the first pick
+    draft_rows = np.array([], dtype=np.int64)
+    sims = simulate_picks(context, DRAFT_ORDER, draft_rows, 0, num_candidates=5, num_sims=200, max_workers=1)
+    assert len(sims) == 5
+    assert np.all(sims["p_available"] == 1)
+    assert sims["exp_min_points"].is_monotonic_decreasing
+
+    # Deterministic given a seed, including across workers
+    sims_again = simulate_picks(context, DRAFT_ORDER, draft_rows, 0, num_candidates=5, num_sims=200, max_workers=2)
+    pd.testing.assert_frame_equal(sims, sims_again)
+
+    # Team 3 picks after three other teams, so the best player isn't always there
+    best = table.top(context.pool, 1)
+    sims = simulate_picks(context, DRAFT_ORDER, draft_rows, 3, candidates=best, num_sims=200, max_workers=1)
+    assert sims.loc[0, "p_available"] < 1
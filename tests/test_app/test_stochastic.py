@@ -0,0 +1,123 @@
+import itertools
+import os
+import time
+from typing import List
+
+import numpy as np
+import pytest
+
+from draft_optimizer.app.cache import ResultCache
+from draft_optimizer.app.optimize import RosterOptimizer, poss_opt_picks
+from draft_optimizer.app.stochastic import PointSamples, StochasticSolver, risk, solve_stochastic
+from tests.test_app.test_optimize import CONTEXT, MAX_POS_CONST, MIN_POS_CONST, NUM_PLAYERS_CONST, POSITIONS, TABLE
+
+
+def make_samples(num_samples: int = 40, seed: int = 0) -> PointSamples:
+    # Draw every player's weekly points around the projections; riskier players have wider spreads
+    rng = np.random.default_rng(seed)
+    num_weeks, num_all = TABLE.points.shape
+    spread = np.linspace(0.1, 1.0, num_all)
+    draws = TABLE.points[None] * (1 + spread * rng.normal(size=(num_samples, num_weeks, num_all)))
+    player_ids: List[str] = np.tile(TABLE.ids, num_weeks).tolist()
+    weeks: List[int] = np.repeat(np.arange(1, num_weeks + 1), num_all).tolist()
+
+    return PointSamples.from_draws(TABLE, player_ids, weeks, draws.reshape(num_samples, -1), max_samples=None)
+
+
+def brute_force(samples: np.ndarray, available: np.ndarray, fixed: np.ndarray, objective: str) -> float:
+    # Score every feasible roster
+    best = -np.inf
+    for combo in itertools.combinations(range(len(POSITIONS)), NUM_PLAYERS_CONST):
+        roster = np.zeros(len(POSITIONS), dtype=bool)
+        roster[list(combo)] = True
+        counts = {pos: np.sum(POSITIONS[roster] == pos) for pos in MIN_POS_CONST}
+        if np.any(roster & ~(available | fixed)) or np.any(fixed & ~roster):
+            continue
+        if any(counts[pos] < MIN_POS_CONST[pos] or counts[pos] > MAX_POS_CONST[pos] for pos in MIN_POS_CONST):
+            continue
+        best = max(best, float(risk(samples[:, :, roster].sum(axis=2).min(axis=1), objective)))
+
+    return best
+
+
+def test_risk():
+    # CVaR is the mean of the worst tail; it's at most the mean
+    mins = np.arange(10, dtype=float)[:, None] * [1, 2]
+    assert risk(mins, "expected").tolist() == [4.5, 9.0]
+    assert risk(mins, "cvar", alpha=0.2).tolist() == [0.5, 1.0]
+    assert risk(mins, "cvar", alpha=0.01).tolist() == [0.0, 0.0]
+    with pytest.raises(ValueError):
+        risk(mins, "max")
+
+
+def test_point_samples(tmp_path):
+    # Draws are scattered by player and week; the rest keep the projections
+    draws = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+    samples = PointSamples.from_draws(TABLE, ["0", "1", "missing"], [1, 3, 1], draws)
+    assert samples.samples.shape == (2,) + TABLE.points.shape
+    assert samples.samples[:, 0, 0].tolist() == [1.0, 4.0] and samples.samples[:, 2, 1].tolist() == [2.0, 5.0]
+    assert np.all(samples.samples[:, 1, :] == TABLE.points[1])
+
+    # Round-trip
+    samples.save(str(tmp_path / "samples"))
+    loaded = PointSamples.load(str(tmp_path / "samples"))
+    assert loaded is not None and loaded.digest == samples.digest
+    assert np.array_equal(loaded.samples, samples.samples)
+    assert PointSamples.load(str(tmp_path / "missing")) is None
+
+    # Saves replace the samples whole, leaving no temporary files
+    samples.save(str(tmp_path / "samples"))
+    assert sorted(os.listdir(str(tmp_path))) == ["samples"]
+    assert sorted(os.listdir(str(tmp_path / "samples"))) == ["meta.json", "samples.npy"]
+
+
+@pytest.mark.parametrize("objective", ["cvar", "expected"])
+def test_stochastic_solver(objective: str):
+    # Make optimizer
+    samples = make_samples()
+    solver = StochasticSolver(CONTEXT, samples, objective=objective)
+    optimizer = RosterOptimizer(CONTEXT, backend="stochastic", extra_backends={"stochastic": solver})
+    num_all = len(POSITIONS)
+
+    # Solves match brute force over the samples, within the bound
+    available = np.ones(num_all, dtype=bool)
+    fixed = np.zeros(num_all, dtype=bool)
+    for player_idx, is_team in [(None, False), (2, True), (1, False), (7, True)]:
+        if player_idx is not None:
+            available[player_idx] = False
+            fixed[player_idx] |= is_team
+        result = optimizer.solve(available, fixed, key=0)
+        assert result.roster is not None and result.backend == "stochastic"
+        assert np.all(result.roster[fixed]) and result.roster.sum() == NUM_PLAYERS_CONST
+        best = brute_force(samples.samples, available, fixed, objective)
+        assert result.value == pytest.approx(best) and result.value <= result.bound + 1e-6
+
+
+def test_stochastic_deadline():
+    # Past the deadline, the greedy fill is kept without swaps
+    samples = make_samples().samples
+    pos_idx, min_pos, max_pos = CONTEXT.pos_limits()
+    available = np.ones(len(POSITIONS), dtype=bool)
+    fixed = np.zeros(len(POSITIONS), dtype=bool)
+    args = (samples, pos_idx, min_pos, max_pos, NUM_PLAYERS_CONST, available, fixed)
+    roster, value, bound = solve_stochastic(*args, deadline=time.perf_counter())
+    no_swaps = solve_stochastic(*args, max_iters=0)
+    assert roster is not None and np.array_equal(roster, no_swaps[0]) and value == no_swaps[1] <= bound
+
+
+def test_stochastic_cache_keys():
+    # Results are cached per objective and samples
+    samples = make_samples()
+    keys = set()
+    for objective, seed in [("cvar", 0), ("expected", 0), ("cvar", 1)]:
+        solver = StochasticSolver(CONTEXT, make_samples(seed=seed), objective=objective)
+        optimizer = RosterOptimizer(CONTEXT, cache=ResultCache(), extra_backends={"stochastic": solver})
+        keys.add(optimizer.cache_key(0, [], [], "stochastic"))
+        assert poss_opt_picks(optimizer, 0, {0: set()}, set(), backend="stochastic").roster is not None
+    assert len(keys) == 3
+
+    # Samples must match the table, and the backend must be added to be used
+    with pytest.raises(ValueError):
+        StochasticSolver(CONTEXT, samples.copy(update={"samples": samples.samples[:, 1:]}))
+    with pytest.raises(ValueError):
+        RosterOptimizer(CONTEXT, backend="stochastic")
@@ -0,0 +1,90 @@
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from draft_optimizer.app.survival import NOISE, PickSurvival, norm_cdf, team_picks
+from draft_optimizer.app.table import PlayerTable
+from tests.test_app.test_optimize import TABLE
+
+
+def test_norm_cdf():
+    x = np.linspace(-6, 6, 101)
+    expected = np.array([0.5 * math.erfc(-v / math.sqrt(2)) for v in x])
+    assert np.allclose(norm_cdf(x), expected, atol=1e-7)
+
+
+def test_pick_survival():
+    # Pick, go back, and diverge; ranks match a recount over the players left
+    survival = PickSurvival(TABLE)
+    order = np.lexsort((np.arange(TABLE.num_players), TABLE.adp))
+    for picks in ([2, 1, 3, 7], [2, 1], [2, 4, 1]):
+        survival.sync(picks)
+        available = ~TABLE.mask(picks)
+        expected = np.zeros(TABLE.num_players)
+        expected[order[available[order]]] = np.arange(1, available.sum() + 1)
+        assert np.array_equal(survival.ranks(), expected)
+    assert survival.sync([2, 4, 1, 0]) == (0, 1)
+
+    # Picked players are gone, picks being made now are certain, and later picks are less likely
+    rows = np.arange(TABLE.num_players)
+    probs = survival.probs(rows, np.array([4, 5, 8, 20]))
+    assert np.all(probs[[0, 1, 2, 4]] == 0)
+    assert np.all(probs[survival.available, 0] == 1)
+    assert np.all(np.diff(probs, axis=1) <= 0)
+
+    # Next picks skip the pick on the clock
+    draft_order = np.array([0, 1, 2, 2, 1, 0, 0, 1, 2])
+    assert team_picks(draft_order, 1, 4).tolist() == [4, 7]
+    assert np.array_equal(survival.next_pick_probs(rows, draft_order, 1), survival.probs(rows, np.array([7]))[:, 0])
+
+
+def test_pick_survival_model():
+    # Players taken in order of noisy ADP survive at the modeled rates
+    num_players, num_sims, num_picks = 40, 4000, 10
+    rng = np.random.default_rng(0)
+    draws = np.arange(1, num_players + 1)[None, :] * np.exp(NOISE * rng.standard_normal((num_sims, num_players)))
+    taken_at = np.argsort(np.argsort(draws, axis=1), axis=1)  # pick each player is taken at
+    empirical = (taken_at[:, :, None] >= np.arange(1, num_picks + 1)).mean(axis=0)
+
+    # Check
+    players = pd.DataFrame(
+        {
+            "id": np.arange(num_players),
+            "name": "X",
+            "position": "RB",
+            "pro_team": "T",
+            "week1": 0.0,
+            "sum_weeks": 0.0,
+            "adp": np.arange(1, num_players + 1),
+        }
+    ).set_index(["id", "name", "position", "pro_team"])
+    survival = PickSurvival(PlayerTable.from_players(players))
+    probs = survival.probs(np.arange(num_players), np.arange(1, num_picks + 1))
+    assert np.abs(probs - empirical).mean() < 0.01
+    assert np.abs(probs - empirical).max() < 0.15  # worst when rank and picks are close
+
+
+def test_pick_survival_speed():
+    # Incremental updates and full tables for a 500-player pool take milliseconds
+    num_players = 500
+    players = pd.DataFrame(
+        {
+            "id": np.arange(num_players),
+            "name": "X",
+            "position": "RB",
+            "pro_team": "T",
+            "week1": 0.0,
+            "sum_weeks": 0.0,
+            "adp": np.random.default_rng(0).permutation(num_players) + 1,
+        }
+    ).set_index(["id", "name", "position", "pro_team"])
+    survival = PickSurvival(PlayerTable.from_players(players))
+    draft_order = np.tile(np.r_[np.arange(12), np.arange(12)[::-1]], 8)
+    rows = np.arange(num_players)
+    start = time.perf_counter()
+    for pick in range(0, len(draft_order) - 1):
+        survival.sync(list(range(pick)))
+        survival.probs(rows, team_picks(draft_order, 0, pick))
+    assert (time.perf_counter() - start) / (len(draft_order) - 1) < 0.01
@@ -0,0 +1,118 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List
+
+import pytest
+
+from draft_optimizer.app.optimize import RosterOptimizer
+from draft_optimizer.app.service import OptimizeService
+from draft_optimizer.app.sync import DraftSync, diff_picks, refresh_optimizer, resolve_picks
+from draft_optimizer.src.platform.fetch import get_json, make_session
+from tests.test_app.test_optimize import CONTEXT
+
+
+@pytest.fixture
+def platform_stub() -> Iterator[Dict]:
+    # Serve a draft's picks so far; tests make picks (or fail requests) by editing the state
+    state: Dict = {"picks": [], "fail": False, "requests": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            state["requests"] += 1
+            if state["fail"]:
+                self.send_response(500)
+                self.end_headers()
+                return
+            body = json.dumps({"picks": [{"playerId": p} for p in state["picks"]]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state["url"] = f"http://127.0.0.1:{server.server_port}/draft"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_diff_picks():
+    # New picks are appended
+    assert diff_picks(["1", "2"], ["1", "2", "3"]) == (2, ["3"])
+    assert diff_picks([], ["1"]) == (0, ["1"])
+
+    # Nothing changes when in sync or when the platform lags behind
+    assert diff_picks(["1", "2"], ["1", "2"]) == (2, [])
+    assert diff_picks(["1", "2"], ["1"]) == (2, [])
+
+    # Picks after a difference are replaced
+    assert diff_picks(["1", "2", "3"], ["1", "4"]) == (1, ["4"])
+
+
+def test_resolve_picks():
+    # Picks resolve to rows in order and by team; unknown IDs (ex: no projections) are skipped and reported
+    draft_rows, picks_idx, missing = resolve_picks(CONTEXT.table, [0, 1, 1, 0], ["2", "99", "1", "7"])
+    assert draft_rows.tolist() == [2, 1, 7]
+    assert picks_idx == {0: {2, 7}, 1: {1}}
+    assert missing == ["99"]
+
+    # Strict lookups still raise
+    assert CONTEXT.table.rows_of(["2", "99"], skip_missing=True).tolist() == [2]
+    with pytest.raises(KeyError):
+        CONTEXT.table.rows_of(["2", "99"])
+
+
+def test_draft_sync(platform_stub):
+    # Follow the stub's picks
+    session = make_session()
+    updates: List = []
+
+    def fetch_picks() -> List[str]:
+        data = get_json(session, platform_stub["url"], max_retries=0)
+        return [p["playerId"] for p in data["picks"]]
+
+    sync = DraftSync(fetch_picks, picks=["1"], interval=0.01, max_picks=4, on_update=lambda *args: updates.append(args))
+    platform_stub["picks"] = ["1", "2"]
+    sync.start()
+    try:
+        # Only new picks are applied
+        assert sync.wait(0, timeout=5)
+        assert sync.picks == ["1", "2"]
+        assert updates == [(["1", "2"], 1, ["2"])]
+
+        # Platform corrections replace later picks; picks past the end of the draft are ignored
+        version = sync.version
+        platform_stub["picks"] = ["1", "3", "4", "5", "6"]
+        assert sync.wait(version, timeout=5)
+        assert sync.picks == ["1", "3", "4", "5"]
+        assert updates[-1] == (["1", "3", "4", "5"], 1, ["3", "4", "5"])
+
+        # Errors are kept (and polling continues) without touching the picks
+        version = sync.version
+        platform_stub["fail"] = True
+        num_requests = platform_stub["requests"]
+        assert not sync.wait(version, timeout=0.2)
+        assert sync.last_error is not None
+        assert platform_stub["requests"] > num_requests + 1
+        assert sync.picks == ["1", "3", "4", "5"]
+    finally:
+        sync.stop(timeout=5)
+    assert not sync.running
+
+
+def test_refresh_optimizer():
+    # Queue synced picks on the service; the page's submission for the same state then finds the job
+    # note: ID "99" isn't in the table (ex: no projections), so it's skipped
+    service = OptimizeService(RosterOptimizer(CONTEXT))
+    draft_order = [0, 1, 1, 0]
+    job = refresh_optimizer(service, draft_order, ["2", "1", "99"], generation=1)
+    assert job.picks_idx == {0: {2}, 1: {1}} and job.picked_idx == {1, 2}
+    assert job.status == "queued" and job.generation == 1
+    assert service.submit({0: {2}, 1: {1}}, {1, 2}, generation=1) is job
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from draft_optimizer.src.trace import Tracer
+
+
+def test_tracer(tmp_path):
+    # Time spans, with attributes set inside them
+    tracer = Tracer(max_events=3)
+    for i in range(4):
+        with tracer.span("load", i=i) as attrs:
+            attrs["rows"] = 10 * i
+    tracer.record("solve.milp", 5.0, status="optimal")
+    assert [e["i"] for e in tracer.recent("load")] == [3, 2]  # newest first; older events are dropped
+    assert tracer.recent("solve.")[0]["status"] == "optimal"
+
+    # Totals cover every span
+    summary = {r["name"]: r for r in tracer.summary()}
+    assert summary["load"]["count"] == 4 and summary["solve.milp"]["max_ms"] == 5.0
+
+    # Errors are recorded and re-raised
+    with pytest.raises(KeyError):
+        with tracer.span("fail"):
+            raise KeyError("x")
+    assert tracer.recent("fail")[0]["error"] == "KeyError"
+
+    # Memoized calls are spans; misses are counted in the memoized body
+    tracer.count("memo.load.misses")
+    assert tracer.memo_stats() == [{"name": "load", "calls": 4, "hits": 3, "misses": 1}]
+
+    # Dump appends events and a snapshot
+    path = tracer.dump(str(tmp_path / "trace.jsonl"))
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [e["name"] for e in lines] == ["load", "solve.milp", "fail", "snapshot"]
+    assert lines[-1]["counters"] == {"memo.load.misses": 1}
+
+    # Reset, or disable
+    tracer.reset()
+    tracer.enabled = False
+    with tracer.span("load"):
+        pass
+    tracer.count("memo.load.misses")
+    assert tracer.summary() == [] and tracer.counters == {}
@@ -0,0 +1,27 @@
+import time
+
+from draft_optimizer.src.platform.cache import ResponseCache
+
+
+def test_response_cache(tmp_path):
+    # Keys depend on every part
+    key = ResponseCache.key("espn", 1, 2022, "url", {"view": "a"})
+    assert key == ResponseCache.key("espn", 1, 2022, "url", {"view": "a"})
+    assert key != ResponseCache.key("espn", 1, 2022, "url", {"view": "b"})
+
+    # Fetch once, then reuse while fresh
+    cache = ResponseCache(str(tmp_path))
+    calls = []
+    for _ in range(2):
+        assert cache.fetch(key, 60, lambda: calls.append(1) or {"a": [1, 2]}) == {"a": [1, 2]}
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Entries persist on disk
+    assert ResponseCache(str(tmp_path)).get(key, 60) == {"a": [1, 2]}
+
+    # Stale entries are refetched
+    time.sleep(0.01)
+    assert cache.get(key, 0.001) is None
+    cache.fetch(key, 0.001, lambda: calls.append(1) or {})
+    assert len(calls) == 2
@@ -1,4 +1,133 @@
-from draft_optimizer.src.platform.espn import League
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from draft_optimizer.src.models import ProSchedule
+from draft_optimizer.src.platform import espn
+from draft_optimizer.src.platform.cache import ResponseCache
+from draft_optimizer.src.platform.espn import CachedEspnRequests, League, fetch_players, parse_pro_schedule
+
+# Specify stub player data
+YEAR = 2022
+PLAYER_IDS = list(range(1, 26)) + [-16001]
+
+
+def stub_player(player_id: int) -> Dict:
+    # Make a player card like ESPN's `kona_playercard` view
+    is_dst = player_id < 0
+    stats = [
+        {"seasonId": YEAR, "statSourceId": 0, "scoringPeriodId": 0, "appliedTotal": 100 + player_id / 3},
+        {"seasonId": YEAR, "statSourceId": 1, "scoringPeriodId": 0, "appliedTotal": 120.0},
+        {"seasonId": YEAR, "statSourceId": 0, "scoringPeriodId": 1, "appliedTotal": 10.0},
+        {"seasonId": YEAR - 1, "statSourceId": 0, "scoringPeriodId": 2, "appliedTotal": 99.0},
+    ]
+    player = {
+        "id": player_id,
+        "fullName": "Falcons D/ST" if is_dst else f"Player {player_id}",
+        "eligibleSlots": [16, 20, 21] if is_dst else [25, 3, 2, 23, 20, 21],
+        "proTeamId": 1 if player_id % 2 else 0,
+        "stats": stats,
+    }
+
+    return {"id": player_id, "player": player}
+
+
+@pytest.fixture
+def espn_stub() -> Iterator[Dict]:
+    # Serve player cards (failing each chunk's first request to exercise retries), the pro schedule, and the draft
+    state: Dict = {"requests": Counter(), "views": Counter()}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            # Get response
+            view = parse_qs(urlparse(self.path).query)["view"][0]
+            state["views"][view] += 1
+            if view == "kona_playercard":
+                filters = json.loads(self.headers["x-fantasy-filter"])
+                ids = filters["players"]["filterIds"]["value"]
+                state["requests"][ids[0]] += 1
+                if state["requests"][ids[0]] == 1:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                data: Dict = {"players": [stub_player(i) for i in ids]}
+            elif view == "proTeamSchedules_wl":
+                data = {"settings": {"proTeams": []}}
+            else:
+                data = {"draftDetail": {"drafted": True, "picks": []}}
+
+            # Send
+            body = json.dumps(data).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state["url"] = f"http://127.0.0.1:{server.server_port}/leagues/1"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_players(espn_stub: Dict):
+    # Fetch in concurrent chunks; results stream back chunk by chunk
+    chunks = list(fetch_players(espn_stub["url"], PLAYER_IDS, YEAR, 18, chunk_size=10, max_workers=3, backoff=0.01))
+    assert sorted(len(c) for c in chunks) == [6, 10, 10]
+    assert sum(espn_stub["requests"].values()) == 6  # each chunk failed once, then succeeded
+
+    # Parse
+    players = {k: v for c in chunks for k, v in c.items()}
+    assert sorted(players.keys()) == sorted(PLAYER_IDS)
+    assert players[1].position == "RB" and players[1].pro_team == "ATL"
+    assert players[2].pro_team is None
+    assert players[-16001].position == "D/ST"
+    assert players[3].points == 101.0 and players[3].proj_points == 120.0
+    assert players[3].weekly_points == {1: 10.0}
+
+
+def test_fetch_players_cache(espn_stub: Dict, tmp_path):
+    # Fetch twice through a cache; the second fetch (from a new process's cache) doesn't hit the endpoint
+    cache = ResponseCache(str(tmp_path))
+    players = [c for c in fetch_players(espn_stub["url"], PLAYER_IDS, YEAR, 18, cache=cache, backoff=0.01)]
+    num_requests = espn_stub["views"]["kona_playercard"]
+    cache = ResponseCache(str(tmp_path))
+    players_again = [c for c in fetch_players(espn_stub["url"], PLAYER_IDS, YEAR, 18, cache=cache, backoff=0.01)]
+    assert players_again == players
+    assert espn_stub["views"]["kona_playercard"] == num_requests
+
+
+def test_cached_espn_requests(espn_stub: Dict, tmp_path, monkeypatch):
+    # Point requests at the stub
+    request = CachedEspnRequests(cache=ResponseCache(str(tmp_path)), sport="nfl", year=YEAR, league_id=1)
+    request.ENDPOINT = espn_stub["url"]
+    request.LEAGUE_ENDPOINT = espn_stub["url"]
+
+    # Static data is fetched once
+    for _ in range(3):
+        assert request.get_pro_schedule() == {"settings": {"proTeams": []}}
+    assert espn_stub["views"]["proTeamSchedules_wl"] == 1
+
+    # Volatile data is reused until it's stale
+    request.get_league_draft()
+    request.get_league_draft()
+    assert espn_stub["views"]["mDraftDetail"] == 1
+    monkeypatch.setattr(espn, "VOLATILE_TTL", -1)
+    request.get_league_draft()
+    request.get_pro_schedule()
+    assert espn_stub["views"]["mDraftDetail"] == 2
+    assert espn_stub["views"]["proTeamSchedules_wl"] == 1
 
 
 def test_league():
@@ -29,3 +158,41 @@ def test_league():
     # Get players
     players = league.get_players(max_players=1)
     assert len(players) > 0
+
+
+def test_parse_pro_schedule():
+    # Each game is listed under both teams; dates are epoch milliseconds
+    def game(home: int, away: int, date: int) -> Dict:
+        return {"homeProTeamId": home, "awayProTeamId": away, "date": date}
+
+    day = 24 * 60 * 60 * 1000
+    games = {1: {"1": [game(1, 2, day * 19250)], "2": [game(3, 1, day * 19257)]}, 2: {"1": [game(1, 2, day * 19250)]}}
+    games[3] = {"2": [game(3, 1, day * 19257)], "3": [game(3, 2, day * 19264)]}
+    teams = [{"id": 0, "name": "FA", "abbrev": "FA", "location": "", "byeWeek": 0}] + [
+        {"id": i, "name": f"T{i}", "abbrev": f"t{i}", "location": "", "byeWeek": 4 - i, "proGamesByScoringPeriod": g}
+        for i, g in games.items()
+    ]
+    pro_teams, schedule = parse_pro_schedule({"settings": {"proTeams": teams}})
+    assert sorted(pro_teams.keys()) == [1, 2, 3] and pro_teams[1].abbrev == "T1"
+
+    # Games are deduped and sorted
+    assert len(schedule) == 3
+    assert schedule.to_frame().values.tolist()[0][0:3] == [1, 2, 1]
+    assert str(schedule.dates[0]) == "2022-09-15"
+
+    # Lookups by week and team
+    assert schedule.weeks[schedule.week(2)].tolist() == [2]
+    assert schedule.week(9) == slice(0, 0)
+    assert schedule.team(1).tolist() == [0, 1]
+    assert schedule.opponents[2, 1:].tolist() == [1, -1, 3]
+    assert schedule.bye_weeks()[1:].tolist() == [3, 2, 1]
+
+    # Team rows for joins, and a round trip through a frame (ex: CSV)
+    team_frame = schedule.team_frame()
+    assert team_frame.loc[team_frame["team_id"] == 1, ["week", "opponent_id", "home"]].values.tolist() == [
+        [1, 2, True],
+        [2, 3, False],
+    ]
+    frame = schedule.to_frame()
+    assert ProSchedule.from_frame(frame).to_frame().equals(frame)
+    assert [len(v) for v in schedule.by_week().values()] == [1, 1, 1]
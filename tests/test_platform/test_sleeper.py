@@ -0,0 +1,176 @@
+import json
+import os
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from draft_optimizer.app.sync import DraftSync, resolve_picks
+from draft_optimizer.app.table import PlayerTable
+from draft_optimizer.src.models import PlayerArrays
+from draft_optimizer.src.platform.sleeper import League, espn_pick_ids, name_key, player_id, score, sleeper_id
+
+# Specify recorded responses (by path)
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "sleeper.json")
+LEAGUE_ID = 123
+YEAR = 2022
+
+
+@pytest.fixture
+def sleeper_stub() -> Iterator[Dict]:
+    # Serve recorded responses; other weeks have no data yet
+    with open(FIXTURES_PATH, "r", encoding="utf-8") as f:
+        fixtures = json.load(f)
+    state: Dict = {"requests": Counter()}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            # Get response
+            path = urlparse(self.path).path
+            state["requests"][path] += 1
+            data = fixtures.get(path, [])
+
+            # Send
+            body = json.dumps(data).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state["url"] = f"http://127.0.0.1:{server.server_port}"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_ids_and_scoring():
+    # Defenses use ESPN's D/ST IDs
+    assert player_id("4034") == 4034
+    assert player_id("ATL") == -16001
+    assert player_id("WAS") == -16028
+    assert player_id("OAK") is None
+    assert [sleeper_id(i) for i in [4034, -16001, -16028]] == ["4034", "ATL", "WAS"]
+
+    # Score with league settings, or PPR without them
+    stats = {"rec": 2.0, "rec_yd": 15.0, "pts_ppr": 3.5}
+    assert score(stats, {"rec": 0.5, "rec_yd": 0.1, "rec_td": 6.0}) == 2.5
+    assert score(stats, {}) == 3.5
+
+    # Names match across platforms' punctuation and suffixes
+    assert name_key("D.J. Moore Jr.", "WR") == name_key("DJ Moore", "WR") != name_key("DJ Moore", "RB")
+
+
+def test_league(sleeper_stub: Dict, tmp_path):
+    # Get league
+    url = sleeper_stub["url"]
+    league = League(id=LEAGUE_ID, year=YEAR, cache_dir=str(tmp_path), api_url=f"{url}/v1", stats_url=url)
+    assert league.name == "Sleeper League"
+
+    # Get pro schedule
+    pro_teams, pro_schedule = league.get_pro_schedule()
+    assert sorted(t.abbrev for t in pro_teams.values()) == ["CHI", "MIN", "SF", "WSH"]
+    assert pro_teams[28].bye_week == 3 and pro_teams[25].bye_week == 0
+    assert [len(pro_schedule[w]) for w in [1, 2, 3]] == [2, 2, 1]
+    assert pro_schedule[1][0].away_id == 28  # sorted by week, date, then teams
+
+    # Get teams
+    teams = league.get_teams()
+    assert teams[1].name == "Team One" and teams[2].name == "owner2"
+    assert teams[2].player_ids == [6794, -16028]
+
+    # Get picks (in draft order)
+    picks = league.get_picks()
+    assert [(p.round, p.pick, p.team_id, p.player_id) for p in picks] == [
+        (1, 1, 1, 4034),
+        (1, 2, 2, 6794),
+        (2, 1, 2, -16028),
+        (2, 2, 1, -16001),
+    ]
+
+    # Get players with stats or projections; every week is fetched once, along with the player dump
+    players = league.get_players()
+    assert sorted(players.keys()) == [-16028, -16001, 4034, 6794]
+    assert players[4034].weekly_points == {1: 19.0, 2: 10.0} and players[4034].points == 29.0
+    assert players[4034].proj_weekly_points == {1: 13.8, 2: 8.0} and players[4034].proj_points == 21.8
+    assert players[6794].weekly_points == {1: 10.5}  # bye in week 2
+    assert players[-16001].name == "Falcons D/ST" and players[-16001].position == "D/ST"
+    assert players[-16028].pro_team == "WSH"
+    assert sum(n for p, n in sleeper_stub["requests"].items() if p.startswith(("/stats", "/projections"))) == 36
+    assert sleeper_stub["requests"]["/v1/players/nfl"] == 1
+
+    # Static data is cached (including across leagues); players can be limited
+    league = League(id=LEAGUE_ID, year=YEAR, cache_dir=str(tmp_path), api_url=f"{url}/v1", stats_url=url)
+    assert len(league.get_players(max_players=2)) == 2
+    league.get_pro_schedule()
+    assert sleeper_stub["requests"]["/v1/players/nfl"] == 1
+    assert sleeper_stub["requests"]["/schedule/nfl/regular/2022"] == 1
+    assert sleeper_stub["requests"]["/v1/league/123"] == 1
+
+
+def test_player_arrays(sleeper_stub: Dict, tmp_path):
+    # Bulk load matches per-player models
+    url = sleeper_stub["url"]
+    league = League(id=LEAGUE_ID, year=YEAR, cache_dir=str(tmp_path), api_url=f"{url}/v1", stats_url=url)
+    players = league.get_players()
+    arrays = league.get_player_arrays()
+    assert len(arrays) == len(players)
+    assert {p.id: p for p in arrays.players()} == players
+    assert PlayerArrays.from_players(players.values()).ids.tolist() == arrays.ids.tolist()
+
+    # Weeks x players arrays; missing weeks are NaN
+    assert arrays.weeks.tolist() == [1, 2]
+    j = arrays.ids.tolist().index(6794)
+    assert arrays.weekly_points[0, j] == 10.5 and np.isnan(arrays.weekly_points[1, j])
+
+    # Frames share the points array
+    frame = arrays.to_frame()
+    assert frame.columns.tolist() == ["week1", "week2"]
+    assert frame.loc[4034].iloc[0].tolist() == [19.0, 10.0]
+    assert np.shares_memory(frame.to_numpy(), arrays.weekly_points)
+    assert np.shares_memory(arrays.to_frame(projected=True).to_numpy(), arrays.proj_weekly_points)
+
+
+def test_espn_ids(sleeper_stub: Dict, tmp_path):
+    # Make a table keyed by ESPN IDs, like production's; a kicker's ESPN ID is Jefferson's Sleeper ID
+    players = pd.DataFrame({"week1": [20.0, 18.0, 8.0, 6.0, 9.0], "week2": [15.0, 21.0, 7.0, 10.0, 8.0]})
+    players["sum_weeks"] = players["week1"] + players["week2"]
+    players.index = pd.MultiIndex.from_arrays(
+        [
+            ["3117251", "4262921", "-16001", "-16028", "6794"],
+            ["Christian McCaffrey", "Justin Jefferson", "Falcons D/ST", "Commanders D/ST", "Some Kicker"],
+            ["RB", "WR", "D/ST", "D/ST", "K"],
+            ["SF", "MIN", "ATL", "WSH", "CHI"],
+        ],
+        names=["id", "name", "position", "pro_team"],
+    )
+    table = PlayerTable.from_players(players)
+
+    # Map players by ESPN ID, else by name and position; defenses keep their IDs
+    url = sleeper_stub["url"]
+    league = League(id=LEAGUE_ID, year=YEAR, cache_dir=str(tmp_path), api_url=f"{url}/v1", stats_url=url)
+    positions = np.array(table.pos_keys, dtype=object)[table.positions]
+    mapping = league.get_espn_ids(table.names, positions, table.ids)
+    assert mapping == {4034: 3117251, 6794: 4262921, -16001: -16001, -16028: -16028}
+
+    # Synced picks resolve to the table
+    sync = DraftSync(lambda: espn_pick_ids(league.get_picks(), mapping))
+    sync.poll()
+    draft_rows, picks_idx, missing = resolve_picks(table, np.array([0, 1, 1, 0]), sync.picks)
+    assert table.ids[draft_rows].tolist() == ["3117251", "4262921", "-16028", "-16001"] and missing == []
+
+    # Unmatched players keep a Sleeper ID that can't be mistaken for an ESPN one, and are skipped
+    picks = espn_pick_ids(league.get_picks(), {})
+    assert picks[1] == "sleeper:6794"
+    assert resolve_picks(table, np.array([0, 1, 1, 0]), picks)[2] == picks